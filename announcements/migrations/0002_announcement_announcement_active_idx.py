@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('announcements', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-is_pinned', '-created_at'], name='announcement_active_idx'),
+        ),
+    ]
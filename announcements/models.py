@@ -25,6 +25,11 @@ class Announcement(models.Model):
         ordering = ['-is_pinned', '-created_at']
         indexes = [
             models.Index(fields=['-created_at', 'is_pinned']),
+            # Public list: active only, pinned first, newest first
+            models.Index(
+                fields=['-is_pinned', '-created_at'], name='announcement_active_idx',
+                condition=models.Q(is_active=True),
+            ),
         ]
 
     def __str__(self):
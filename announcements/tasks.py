@@ -0,0 +1,13 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from scheduler.registry import periodic_task
+from .models import Announcement
+
+
+@periodic_task(every=timedelta(minutes=5))
+def deactivate_expired_announcements():
+    """Persist expiry as is_active=False, so lists can filter on the flag and its index"""
+    now = timezone.now()
+    return Announcement.objects.filter(is_active=True, expires_at__lte=now).update(is_active=False, updated_at=now)
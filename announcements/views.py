@@ -6,20 +6,23 @@ from django.db.models import Q
 from django.utils import timezone
 from .models import Announcement, CommunityUpdate
 from .forms import AnnouncementForm, CommunityUpdateForm
+from members.decorators import admin_required
+from nja_platform.replica import use_replica
 
 
 @login_required
+@use_replica
 def announcement_list(request):
     """List all announcements"""
-    announcements = Announcement.objects.filter(is_active=True)
+    announcements = Announcement.objects.filter(is_active=True).select_related('created_by')
     
-    # Filter out expired announcements
-    announcements = [a for a in announcements if not a.is_expired()]
+    # The scheduler deactivates expired announcements; this covers the minutes until it runs
+    announcements = announcements.exclude(expires_at__lte=timezone.now())
     
     # Search
     search_query = request.GET.get('search', '')
     if search_query:
-        announcements = [a for a in announcements if search_query.lower() in a.title.lower() or search_query.lower() in a.content.lower()]
+        announcements = announcements.filter(Q(title__icontains=search_query) | Q(content__icontains=search_query))
     
     # Pagination
     paginator = Paginator(announcements, 20)
@@ -36,7 +39,7 @@ def announcement_list(request):
 @login_required
 def announcement_detail(request, pk):
     """View announcement details"""
-    announcement = get_object_or_404(Announcement, pk=pk)
+    announcement = get_object_or_404(Announcement.objects.select_related('created_by'), pk=pk)
     context = {
         'announcement': announcement,
     }
@@ -44,12 +47,9 @@ def announcement_detail(request, pk):
 
 
 @login_required
+@admin_required('Only administrators can create announcements.', 'announcements:list')
 def announcement_create(request):
     """Create new announcement"""
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can create announcements.')
-        return redirect('announcements:list')
-    
     if request.method == 'POST':
         form = AnnouncementForm(request.POST)
         if form.is_valid():
@@ -65,14 +65,11 @@ def announcement_create(request):
 
 
 @login_required
+@admin_required('Only administrators can edit announcements.', 'announcements:detail', url_kwargs={'pk': 'pk'})
 def announcement_edit(request, pk):
     """Edit announcement"""
     announcement = get_object_or_404(Announcement, pk=pk)
     
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can edit announcements.')
-        return redirect('announcements:detail', pk=pk)
-    
     if request.method == 'POST':
         form = AnnouncementForm(request.POST, instance=announcement)
         if form.is_valid():
@@ -86,9 +83,10 @@ def announcement_edit(request, pk):
 
 
 @login_required
+@use_replica
 def update_feed(request):
     """Community updates feed"""
-    updates = CommunityUpdate.objects.filter(is_active=True)
+    updates = CommunityUpdate.objects.filter(is_active=True).select_related('created_by', 'meeting')
     
     # Filter by type
     type_filter = request.GET.get('type', '')
@@ -108,12 +106,9 @@ def update_feed(request):
 
 
 @login_required
+@admin_required('Only administrators can create updates.', 'announcements:feed')
 def update_create(request):
     """Create new community update"""
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can create updates.')
-        return redirect('announcements:feed')
-    
     if request.method == 'POST':
         form = CommunityUpdateForm(request.POST)
         if form.is_valid():
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Contribution, Withdrawal, TransactionLog
+from .models import ArchivedTransactionLog, Contribution, Withdrawal, TransactionLog, TransactionLogArchive
 
 
 @admin.register(Contribution)
@@ -29,3 +29,23 @@ class TransactionLogAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
 
 
+
+
+@admin.register(ArchivedTransactionLog)
+class ArchivedTransactionLogAdmin(admin.ModelAdmin):
+    list_display = ['transaction_type', 'member', 'amount', 'created_at', 'created_by']
+    list_filter = ['transaction_type']
+    search_fields = ['member__name', 'description']
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(TransactionLogArchive)
+class TransactionLogArchiveAdmin(admin.ModelAdmin):
+    list_display = ['year', 'row_count', 'total_amount', 'archived_at']
+    readonly_fields = ['year', 'row_count', 'total_amount', 'archived_at']
@@ -5,4 +5,5 @@ class ContributionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contributions'
 
-
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,179 @@
+"""
+Hot/cold storage of the transaction log.
+
+Closed fiscal (calendar) years are moved from TransactionLog into
+ArchivedTransactionLog by ``manage.py archive_transaction_logs``, so the hot table
+and its indexes only hold the open years. ``transaction_logs()`` reads the archive
+only when a date filter reaches before the archive cutoff.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Sum, prefetch_related_objects
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import ArchivedTransactionLog, TransactionLog, TransactionLogArchive
+
+NOTHING_ARCHIVED = 0
+# transaction_logs() looks the cutoff up itself unless the caller already has it
+UNKNOWN_CUTOFF = object()
+
+
+class ArchiveVerificationError(Exception):
+    """The archived rows of a year do not add up to the rows that were moved"""
+
+
+def year_bounds(year):
+    """Start of the year and of the next one, in the current time zone"""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime(year, 1, 1), tz),
+        timezone.make_aware(datetime(year + 1, 1, 1), tz),
+    )
+
+
+def archive_cutoff():
+    """First day that is still in the hot table, or None if nothing is archived yet.
+
+    Not cached: every worker must see a year as soon as its archive commits, and
+    TransactionLogArchive holds one row per year, so the aggregate is cheap.
+    """
+    last_year = TransactionLogArchive.objects.aggregate(year=Max('year'))['year'] or NOTHING_ARCHIVED
+    if last_year == NOTHING_ARCHIVED:
+        return None
+    return year_bounds(last_year + 1)[0].date()
+
+
+def _filter(queryset, date_from, date_to, filters):
+    queryset = queryset.filter(**filters)
+    if date_from:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min)))
+    if date_to:
+        next_day = datetime.combine(date_to + timedelta(days=1), time.min)
+        queryset = queryset.filter(created_at__lt=timezone.make_aware(next_day))
+    return queryset
+
+
+def transaction_logs(date_from=None, date_to=None, *, cutoff=UNKNOWN_CUTOFF, **filters):
+    """Transaction log rows in a date range (dates, inclusive), newest first.
+
+    Without a ``date_from`` before the archive cutoff only the hot table is read
+    and a normal queryset is returned. A range that reaches into archived years
+    returns a UNION of both tables. It yields TransactionLog instances, but it
+    cannot be filtered further or use select_related(); use
+    prefetch_related_objects() on the rows you display.
+    """
+    if cutoff is UNKNOWN_CUTOFF:
+        cutoff = archive_cutoff()
+    hot = _filter(TransactionLog.objects.all(), date_from, date_to, filters)
+    if cutoff is None or (date_from or cutoff) >= cutoff:
+        return hot.order_by('-created_at')
+    cold = _filter(ArchivedTransactionLog.objects.all(), date_from, date_to, filters)
+    if date_to and date_to < cutoff:
+        return cold.order_by('-created_at')
+    return hot.order_by().union(cold.order_by(), all=True).order_by('-created_at')
+
+
+def with_related(logs, *fields):
+    """select_related() for a single-table result; a UNION cannot join, so its rows are prefetched"""
+    if logs.query.combinator:
+        rows = list(logs)
+        prefetch_related_objects(rows, *fields)
+        return rows
+    return logs.select_related(*fields)
+
+
+def date_range(params):
+    """(date_from, date_to) from ``date_from``/``date_to`` query parameters; invalid dates are ignored"""
+    dates = []
+    for name in ('date_from', 'date_to'):
+        try:
+            dates.append(parse_date(params.get(name, '')))
+        except ValueError:
+            dates.append(None)
+    return tuple(dates)
+
+
+def _totals(queryset):
+    """{transaction_type: (rows, amount)} for verification"""
+    return {
+        row['transaction_type']: (row['rows'], row['amount'])
+        for row in queryset.order_by().values('transaction_type').annotate(rows=Count('id'), amount=Sum('amount'))
+    }
+
+
+def _add_totals(a, b):
+    return {
+        kind: (a.get(kind, (0, 0))[0] + b.get(kind, (0, 0))[0], a.get(kind, (0, 0))[1] + b.get(kind, (0, 0))[1])
+        for kind in a.keys() | b.keys()
+    }
+
+
+def _copy_sql(start, end):
+    hot, cold = TransactionLog._meta, ArchivedTransactionLog._meta
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in hot.concrete_fields)
+    created_at = connection.ops.quote_name(hot.get_field('created_at').column)
+    sql = (
+        f'INSERT INTO {connection.ops.quote_name(cold.db_table)} ({columns}) '
+        f'SELECT {columns} FROM {connection.ops.quote_name(hot.db_table)} '
+        f'WHERE {created_at} >= %s AND {created_at} < %s'
+    )
+    field = hot.get_field('created_at')
+    return sql, [field.get_db_prep_value(start, connection), field.get_db_prep_value(end, connection)]
+
+
+def archive_year(year):
+    """Move one year's rows to the archive in a single transaction. Returns the TransactionLogArchive.
+
+    After the copy, the archive's row count and amount per transaction type must
+    equal what it held before plus the hot rows, otherwise nothing is moved.
+    """
+    start, end = year_bounds(year)
+    with transaction.atomic():
+        # New rows are always stamped now, so nothing is written to a closed year while it moves
+        hot_rows = TransactionLog.objects.filter(created_at__gte=start, created_at__lt=end)
+        archived_rows = ArchivedTransactionLog.objects.filter(created_at__gte=start, created_at__lt=end)
+        expected = _add_totals(_totals(archived_rows), _totals(hot_rows))
+        sql, params = _copy_sql(start, end)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+        after = _totals(archived_rows)
+        if after != expected:
+            raise ArchiveVerificationError(f'{year}: expected {expected} in the archive, found {after}')
+        hot_rows.delete()
+        archive, _ = TransactionLogArchive.objects.update_or_create(
+            year=year,
+            defaults={
+                'row_count': sum(rows for rows, _ in after.values()),
+                'total_amount': sum((amount for _, amount in after.values()), 0),
+            },
+        )
+    return archive
+
+
+def archivable_years(through_year):
+    """Years up to ``through_year`` that still have rows in the hot table, oldest first"""
+    first = TransactionLog.objects.order_by('created_at').values_list('created_at', flat=True).first()
+    if first is None:
+        return []
+    return list(range(timezone.localtime(first).year, through_year + 1))
+
+
+def verify_archive():
+    """Compare each archived year's rows with the totals recorded when it was moved.
+
+    Returns a list of (year, problem) pairs; empty when everything matches.
+    """
+    problems = []
+    for archive in TransactionLogArchive.objects.order_by('year'):
+        start, end = year_bounds(archive.year)
+        totals = ArchivedTransactionLog.objects.filter(created_at__gte=start, created_at__lt=end).aggregate(
+            rows=Count('id'), amount=Sum('amount'),
+        )
+        if (totals['rows'], totals['amount'] or 0) != (archive.row_count, archive.total_amount):
+            problems.append((archive.year, f"archive has {totals['rows']} rows / {totals['amount']}, "
+                                           f"expected {archive.row_count} / {archive.total_amount}"))
+        if TransactionLog.objects.filter(created_at__gte=start, created_at__lt=end).exists():
+            problems.append((archive.year, 'hot table still has rows of this year'))
+    return problems
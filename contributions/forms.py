@@ -1,5 +1,7 @@
+from decimal import Decimal
+
 from django import forms
-from .models import Contribution, Withdrawal
+from .models import Contribution, ImportJob, Withdrawal
 from members.models import Member
 
 
@@ -21,6 +23,49 @@ class ContributionForm(forms.ModelForm):
         self.fields['member'].queryset = Member.objects.filter(is_active=True)
 
 
+class ContributionGridForm(forms.Form):
+    """Amount and category for every member in one grid, validated as a batch"""
+    description = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+        label='Description'
+    )
+
+    def __init__(self, *args, members, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.members = list(members)
+        for member in self.members:
+            self.fields[f'amount_{member.pk}'] = forms.DecimalField(
+                required=False, max_digits=10, decimal_places=2, min_value=Decimal('0.01'),
+                widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0.01'}),
+                label=member.name,
+            )
+            self.fields[f'category_{member.pk}'] = forms.ChoiceField(
+                required=False, choices=Contribution.CATEGORY_CHOICES, initial=Contribution.CATEGORY_REGULAR,
+                widget=forms.Select(attrs={'class': 'form-control'}),
+                label=f'{member.name} category',
+            )
+
+    def rows(self):
+        """(member, amount field, category field) for each grid row"""
+        for member in self.members:
+            yield member, self[f'amount_{member.pk}'], self[f'category_{member.pk}']
+
+    def entries(self):
+        """(member, amount, category) for each row with an amount"""
+        for member in self.members:
+            amount = self.cleaned_data.get(f'amount_{member.pk}')
+            if amount:
+                category = self.cleaned_data.get(f'category_{member.pk}') or Contribution.CATEGORY_REGULAR
+                yield member, amount, category
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.errors and not any(self.entries()):
+            raise forms.ValidationError('Enter an amount for at least one member.')
+        return cleaned_data
+
+
 class WithdrawalForm(forms.ModelForm):
     """Form for withdrawal requests"""
     class Meta:
@@ -42,11 +87,7 @@ class WithdrawalForm(forms.ModelForm):
         member = self.cleaned_data.get('member')
         
         if member and amount:
-            balance = member.get_current_balance()
-            if amount > balance:
-                raise forms.ValidationError(
-                    f'Withdrawal amount ({amount}) exceeds available balance ({balance})'
-                )
+            member.validate_withdrawal(amount, self.instance if self.instance.pk else None)
         return amount
 
 
@@ -60,3 +101,29 @@ class WithdrawalApprovalForm(forms.ModelForm):
         }
 
 
+
+
+class ImportJobForm(forms.ModelForm):
+    """Form for uploading a CSV or Excel file of historical records"""
+    ALLOWED_EXTENSIONS = ('.csv', '.xlsx', '.xlsm')
+
+    class Meta:
+        model = ImportJob
+        fields = ['kind', 'file']
+        widgets = {
+            'kind': forms.Select(attrs={'class': 'form-control'}),
+            'file': forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx,.xlsm'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Members are imported from the members page, which also sets up their accounts
+        self.fields['kind'].choices = [
+            (kind, label) for kind, label in self.fields['kind'].choices if kind != 'members'
+        ]
+
+    def clean_file(self):
+        file = self.cleaned_data.get('file')
+        if file and not file.name.lower().endswith(self.ALLOWED_EXTENSIONS):
+            raise forms.ValidationError('Upload a .csv or .xlsx file.')
+        return file
@@ -0,0 +1,328 @@
+"""
+Streaming import of historical contributions, withdrawals and loans from CSV or XLSX.
+
+Rows are read one at a time (``csv``, or openpyxl in read-only mode), members are
+resolved through an in-memory name/phone index built with one query, and valid
+rows are written with ``bulk_create`` in batches of BATCH_SIZE, each batch in its
+own transaction (a savepoint when called inside one). An invalid row is reported
+with its row number and never blocks the rest of the file. Transaction log entries
+are dated by their rows, and completed loans get their repayment in full.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django import forms
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+
+from loans.models import Loan, LoanInstallment, LoanRepayment
+from loans.schedule import SCHEDULED_STATUSES, schedule_for
+from members.importer import import_members, phone_key
+from members.models import Member
+from nja_platform.spreadsheets import read_rows
+from .models import Contribution, ImportJob, TransactionLog, Withdrawal
+from .statement import entry_date, invalidate_checkpoints
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# One import at a time per process, so an import never starves request threads of the database
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='nja-import')
+
+
+def _amount_field(**kwargs):
+    return forms.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'), **kwargs)
+
+
+# kind -> column -> form field used to validate that column
+COLUMNS = {
+    'contributions': {
+        'date': forms.DateField(),
+        'amount': _amount_field(),
+        'category': forms.ChoiceField(choices=Contribution.CATEGORY_CHOICES, required=False),
+        'description': forms.CharField(required=False),
+    },
+    'withdrawals': {
+        'date': forms.DateField(),
+        'amount': _amount_field(),
+        'reason': forms.CharField(required=False),
+        'status': forms.ChoiceField(choices=Withdrawal.STATUS_CHOICES, required=False),
+    },
+    'loans': {
+        'requested_date': forms.DateField(),
+        'due_date': forms.DateField(),
+        'amount': _amount_field(),
+        'interest_rate': forms.DecimalField(max_digits=5, decimal_places=2, min_value=0, required=False),
+        'purpose': forms.CharField(required=False),
+        'status': forms.ChoiceField(choices=Loan.STATUS_CHOICES, required=False),
+        'approved_date': forms.DateField(required=False),
+    },
+}
+MEMBER_COLUMNS = ('member', 'phone')
+
+
+def normalize_name(name):
+    return ' '.join(str(name).split()).casefold()
+
+
+class MemberIndex:
+    """Resolve rows to member ids by phone number or by name, loaded with one query"""
+    AMBIGUOUS = object()
+
+    def __init__(self, members=None):
+        self.by_name = {}
+        self.by_phone = {}
+        members = Member.objects.all() if members is None else members
+        for pk, name, phone in members.values_list('pk', 'name', 'phone').iterator():
+            self._add(self.by_name, normalize_name(name), pk)
+            if phone:
+                self._add(self.by_phone, phone_key(phone), pk)
+
+    def _add(self, index, key, pk):
+        index[key] = self.AMBIGUOUS if index.get(key, pk) != pk else pk
+
+    def resolve(self, name, phone):
+        """Return the member id, or raise ValueError saying why the row cannot be matched"""
+        for index, value, normalize, label in (
+            (self.by_phone, phone, phone_key, 'phone'),
+            (self.by_name, name, normalize_name, 'name'),
+        ):
+            if value in (None, ''):
+                continue
+            pk = index.get(normalize(value))
+            if pk is self.AMBIGUOUS:
+                raise ValueError(f'More than one member has the {label} "{value}".')
+            if pk is not None:
+                return pk
+        if name in (None, '') and phone in (None, ''):
+            raise ValueError('Member name or phone is required.')
+        raise ValueError(f'No member matches "{name or phone}".')
+
+
+def _clean_row(kind, row, members):
+    """Return (member id, cleaned values) for a row, or raise forms.ValidationError"""
+    errors = []
+    cleaned = {}
+    try:
+        member_id = members.resolve(row.get('member'), row.get('phone'))
+    except ValueError as exc:
+        errors.append(str(exc))
+        member_id = None
+    for column, field in COLUMNS[kind].items():
+        value = row.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+        try:
+            cleaned[column] = field.clean(value)
+        except forms.ValidationError as exc:
+            errors.extend(f'{column}: {message}' for message in exc.messages)
+    if kind == 'loans' and not errors and cleaned['due_date'] < cleaned['requested_date']:
+        errors.append('due_date: must not be before requested_date.')
+    if errors:
+        raise forms.ValidationError(errors)
+    return member_id, cleaned
+
+
+def _build(kind, member_id, values, user):
+    """Return the record for a cleaned row and its transaction log entry"""
+    if kind == 'contributions':
+        record = Contribution(
+            member_id=member_id, amount=values['amount'], date=values['date'],
+            category=values['category'] or Contribution.CATEGORY_REGULAR,
+            description=values['description'], created_by=user,
+        )
+        log = TransactionLog(
+            transaction_type='contribution', member_id=member_id, amount=record.amount,
+            description=f"Imported contribution of {record.date}: {record.description or 'No description'}",
+            created_by=user, contribution=record,
+        )
+    elif kind == 'withdrawals':
+        status = values['status'] or 'approved'
+        record = Withdrawal(
+            member_id=member_id, amount=values['amount'], date=values['date'],
+            reason=values['reason'] or 'Imported', status=status, created_by=user,
+            approved_by=user if status == 'approved' else None,
+        )
+        log = TransactionLog(
+            transaction_type='withdrawal', member_id=member_id, amount=record.amount,
+            description=f"Imported withdrawal of {record.date}: {record.reason}",
+            created_by=user, withdrawal=record,
+        )
+    else:
+        status = values['status'] or 'completed'
+        record = Loan(
+            member_id=member_id, amount=values['amount'], requested_date=values['requested_date'],
+            due_date=values['due_date'], interest_rate=values['interest_rate'] or 0,
+            purpose=values['purpose'] or 'Imported', status=status, created_by=user,
+            approved_date=values['approved_date'] or (
+                values['requested_date'] if status in SCHEDULED_STATUSES else None
+            ),
+        )
+        log = TransactionLog(
+            transaction_type='loan_granted', member_id=member_id, amount=record.amount,
+            description=f"Imported loan of {record.requested_date}: {record.purpose}",
+            created_by=user,
+        )
+    return record, log
+
+
+class ImportResult:
+    """Running totals and per-row errors of one import"""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.imported_rows = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row_number, messages):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': list(messages)})
+
+
+def _repayment_for(loan):
+    """The repayment in full of an imported completed loan, dated its due date (today at the latest)"""
+    return LoanRepayment(
+        loan=loan, amount=loan.get_total_amount(), payment_date=min(loan.due_date, timezone.localdate()),
+        status='completed', notes='Imported repayment in full', recorded_by=loan.created_by,
+    )
+
+
+def _save_batch(kind, batch, result):
+    model = type(batch[0][1])
+    try:
+        with transaction.atomic():
+            records = model.objects.bulk_create([record for _, record, _ in batch])
+            entries = list(records)
+            # The logs of contributions and withdrawals point at the records inserted just above
+            logs = [log for _, _, log in batch]
+            if model is Loan:
+                repayments = {loan.pk: _repayment_for(loan) for loan in records if loan.status == 'completed'}
+                LoanRepayment.objects.bulk_create(repayments.values())
+                LoanInstallment.objects.bulk_create([
+                    installment for loan in records if loan.status in SCHEDULED_STATUSES
+                    for installment in schedule_for(loan, [repayments[loan.pk]] if loan.pk in repayments else ())
+                ])
+                entries.extend(repayments.values())
+                logs.extend(
+                    TransactionLog(
+                        transaction_type='loan_repayment', member_id=repayment.loan.member_id,
+                        amount=repayment.amount, created_by=repayment.recorded_by,
+                        description=f'Imported repayment of {repayment.payment_date}: {repayment.loan.purpose}',
+                    )
+                    for repayment in repayments.values()
+                )
+            TransactionLog.objects.bulk_create(logs)
+            # created_at is set on insert; date each log entry by its row instead of the import
+            tz = timezone.get_current_timezone()
+            for log, entry in zip(logs, entries):
+                log.created_at = datetime.combine(entry_date(entry), time(), tzinfo=tz)
+            TransactionLog.objects.bulk_update(logs, ['created_at'])
+            # bulk_create sends no post_save signals
+            invalidate_checkpoints({record.member_id for record in records}, min(map(entry_date, entries)))
+    except DatabaseError as exc:
+        for row_number, _, _ in batch:
+            result.add_error(row_number, [f'Not saved: {exc}'])
+    else:
+        result.imported_rows += len(records)
+
+
+def import_rows(kind, rows, user=None, on_progress=None):
+    """Validate and insert (row number, {column: value}) rows in batches. Returns an ImportResult.
+
+    ``on_progress(result)`` is called after every batch.
+    """
+    members = MemberIndex()
+    result = ImportResult()
+    batch = []
+
+    def flush():
+        if batch:
+            _save_batch(kind, batch, result)
+            batch.clear()
+        if on_progress:
+            on_progress(result)
+
+    for row_number, row in rows:
+        result.total_rows += 1
+        try:
+            member_id, values = _clean_row(kind, row, members)
+        except forms.ValidationError as exc:
+            result.add_error(row_number, exc.messages)
+            continue
+        batch.append((row_number, *_build(kind, member_id, values, user)))
+        if len(batch) >= BATCH_SIZE:
+            flush()
+    flush()
+    return result
+
+
+def run_import_job(job_id):
+    """Import the file of a queued ImportJob, recording progress and errors on the job"""
+    close_old_connections()
+    # Claim the job with one conditional UPDATE: the import thread, the import_records command and the
+    # scheduler may all try to run the same queued job, and only one of them may import its file
+    claimed = ImportJob.objects.filter(pk=job_id, status='queued').update(status='running', started_at=timezone.now())
+    if not claimed:
+        return None
+    job = ImportJob.objects.select_related('created_by').get(pk=job_id)
+
+    def save_progress(result):
+        ImportJob.objects.filter(pk=job.pk).update(
+            total_rows=result.total_rows, imported_rows=result.imported_rows, error_count=result.error_count,
+        )
+
+    try:
+        with job.file.open('rb') as file:
+            rows = read_rows(file, job.file.name)
+            if job.kind == 'members':
+                result = import_members(
+                    rows, create_accounts=job.options.get('create_accounts', False),
+                    default_password_hash=job.options.get('default_password_hash', ''), on_progress=save_progress,
+                )
+            else:
+                result = import_rows(job.kind, rows, job.created_by, save_progress)
+    except Exception as exc:
+        logger.exception('Import job %s failed', job.pk)
+        job.status = 'failed'
+        job.message = f'{type(exc).__name__}: {exc}'
+    else:
+        job.status = 'completed'
+        job.total_rows = result.total_rows
+        job.imported_rows = result.imported_rows
+        job.error_count = result.error_count
+        job.errors = result.errors
+    job.finished_at = timezone.now()
+    if job.kind == 'members':
+        # Member rows may carry passwords, so the file is not kept once it has been read
+        job.file.storage.delete(job.file.name)
+    job.save(update_fields=[
+        'status', 'message', 'total_rows', 'imported_rows', 'error_count', 'errors', 'finished_at',
+    ])
+    close_old_connections()
+    return job
+
+
+def fail_stale_imports():
+    """Mark failed the jobs left running past IMPORT_RUNNING_TIMEOUT_MINUTES, e.g. by a worker that crashed.
+
+    They are not queued again: the batches they already committed would be imported twice.
+    """
+    now = timezone.now()
+    return ImportJob.objects.filter(
+        status='running', started_at__lt=now - timedelta(minutes=settings.IMPORT_RUNNING_TIMEOUT_MINUTES),
+    ).update(
+        status='failed', finished_at=now,
+        message='The import stopped before finishing. Rows imported before it stopped were kept.',
+    )
+
+
+def enqueue_import(job):
+    """Run the job on the background import thread once the current transaction commits"""
+    transaction.on_commit(lambda: _executor.submit(run_import_job, job.pk))
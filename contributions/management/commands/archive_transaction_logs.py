@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from contributions.archive import ArchiveVerificationError, archivable_years, archive_year, verify_archive, year_bounds
+from contributions.models import TransactionLog
+
+
+class Command(BaseCommand):
+    help = 'Move transaction logs of closed fiscal years into the archive table, verifying totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--through', type=int,
+                            help='Last year to archive (default: the last closed year)')
+        parser.add_argument('--dry-run', action='store_true', help='Only show what would be archived')
+        parser.add_argument('--verify', action='store_true',
+                            help='Only check the archived years against their recorded totals')
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            self._archive(options['through'] or timezone.localtime().year - 1, options['dry_run'])
+        problems = verify_archive()
+        for year, problem in problems:
+            self.stderr.write(self.style.ERROR(f'{year}: {problem}'))
+        if problems:
+            raise CommandError('Archive verification failed')
+        self.stdout.write(self.style.SUCCESS('Archive verified'))
+
+    def _archive(self, through, dry_run):
+        if through >= timezone.localtime().year:
+            raise CommandError(f'{through} is not a closed year yet.')
+        for year in archivable_years(through):
+            if dry_run:
+                start, end = year_bounds(year)
+                rows = TransactionLog.objects.filter(created_at__gte=start, created_at__lt=end).count()
+                self.stdout.write(f'{year}: {rows} transactions would be archived')
+                continue
+            try:
+                archive = archive_year(year)
+            except ArchiveVerificationError as exc:
+                raise CommandError(f'Nothing moved for {exc}')
+            self.stdout.write(f'{archive}, total {archive.total_amount}')
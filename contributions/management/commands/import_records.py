@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from contributions.importer import COLUMNS, fail_stale_imports, import_rows, run_import_job
+from nja_platform.spreadsheets import read_rows
+from contributions.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Import historical contributions, withdrawals or loans from a CSV/XLSX file, '
+        'or run the queued upload imports when no file is given'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', nargs='?', help='CSV or XLSX file to import')
+        parser.add_argument('--kind', choices=sorted(COLUMNS), help='Type of records in the file')
+        parser.add_argument('--user', help='Username recorded as creator of the imported rows')
+
+    def handle(self, *args, **options):
+        if not options['file']:
+            self._run_queued()
+            return
+        if not options['kind']:
+            raise CommandError('--kind is required when importing a file.')
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"User {options['user']} does not exist.")
+
+        start = time.perf_counter()
+        with open(options['file'], 'rb') as file:
+            result = import_rows(options['kind'], read_rows(file, options['file']), user)
+        elapsed = time.perf_counter() - start
+
+        for error in result.errors:
+            self.stdout.write(f"row {error['row']}: {'; '.join(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.imported_rows} of {result.total_rows} rows in {elapsed:.1f}s '
+            f'({result.error_count} skipped)'
+        ))
+
+    def _run_queued(self):
+        stale = fail_stale_imports()
+        if stale:
+            self.stdout.write(self.style.WARNING(f'Marked {stale} stale running imports as failed'))
+        job_ids = list(ImportJob.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True))
+        ran = 0
+        for job_id in job_ids:
+            # None when another process claimed the job first
+            job = run_import_job(job_id)
+            if job is not None:
+                ran += 1
+                self.stdout.write(f'{job}')
+        self.stdout.write(self.style.SUCCESS(f'Ran {ran} queued imports'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0002_contribution_category'),
+        ('members', '0002_member_member_date_joined_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(fields=['member', '-date'], name='contrib_member_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(fields=['date', 'category', 'amount'], name='contrib_date_cat_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdrawal',
+            index=models.Index(fields=['status', '-date'], name='withdrawal_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdrawal',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-date'], name='withdrawal_pending_idx'),
+        ),
+    ]
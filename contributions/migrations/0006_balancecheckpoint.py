@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0005_transactionlogarchive_archivedtransactionlog'),
+        ('members', '0002_member_member_date_joined_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('entry_date', models.DateField()),
+                ('entry_kind', models.PositiveSmallIntegerField()),
+                ('entry_id', models.BigIntegerField()),
+                ('savings_balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('loan_balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to='members.member')),
+            ],
+            options={
+                'ordering': ['member', 'position'],
+                'indexes': [models.Index(fields=['member', 'entry_date'], name='checkpoint_member_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('member', 'position'), name='checkpoint_member_position_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0006_balancecheckpoint'),
+    ]
+
+    operations = [
+        # contrib_member_date_idx leads with member, so it serves member lookups too
+        migrations.RemoveIndex(
+            model_name='contribution',
+            name='contributio_member__09baa1_idx',
+        ),
+    ]
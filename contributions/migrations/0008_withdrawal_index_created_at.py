@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0007_remove_contribution_member_idx'),
+        ('members', '0002_member_member_date_joined_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='withdrawal',
+            name='withdrawal_status_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='withdrawal',
+            name='withdrawal_pending_idx',
+        ),
+        migrations.AddIndex(
+            model_name='withdrawal',
+            index=models.Index(fields=['status', '-date', '-created_at'], name='withdrawal_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdrawal',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-date', '-created_at'], name='withdrawal_pending_idx'),
+        ),
+    ]
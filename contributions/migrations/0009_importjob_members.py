@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0008_withdrawal_index_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='options',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='kind',
+            field=models.CharField(choices=[('contributions', 'Contributions'), ('withdrawals', 'Withdrawals'), ('loans', 'Loans'), ('members', 'Members')], max_length=20),
+        ),
+    ]
@@ -28,7 +28,10 @@ class Contribution(models.Model):
         ordering = ['-date', '-created_at']
         indexes = [
             models.Index(fields=['-date']),
-            models.Index(fields=['member']),
+            # Member statements (and any lookup by member): filter by member and date range, newest first
+            models.Index(fields=['member', '-date'], name='contrib_member_date_idx'),
+            # Yearly and category totals read only these columns
+            models.Index(fields=['date', 'category', 'amount'], name='contrib_date_cat_amount_idx'),
         ]
 
     def __str__(self):
@@ -59,6 +62,12 @@ class Withdrawal(models.Model):
         indexes = [
             models.Index(fields=['-date']),
             models.Index(fields=['member', 'status']),
+            # Both end with the list ordering, so a status filter needs no sort step
+            models.Index(fields=['status', '-date', '-created_at'], name='withdrawal_status_date_idx'),
+            # Approval queue: pending requests are a small slice of the table
+            models.Index(
+                fields=['-date', '-created_at'], name='withdrawal_pending_idx', condition=models.Q(status='pending'),
+            ),
         ]
 
     def __str__(self):
@@ -96,3 +105,117 @@ class TransactionLog(models.Model):
         return f"{self.transaction_type} - {self.member.name if self.member else 'N/A'} - {self.amount}"
 
 
+
+
+class ArchivedTransactionLog(models.Model):
+    """TransactionLog rows of closed fiscal years, moved out of the hot table.
+
+    Same columns in the same order as TransactionLog (ids are kept), so both
+    tables can be read together with a UNION; see contributions/archive.py.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    transaction_type = models.CharField(max_length=20, choices=TransactionLog.TRANSACTION_TYPES)
+    member = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, related_name='archived_transaction_logs')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    description = models.TextField()
+    created_by = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, related_name='+')
+    created_at = models.DateTimeField()
+    contribution = models.ForeignKey(Contribution, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    withdrawal = models.ForeignKey(Withdrawal, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['member', 'transaction_type']),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction_type} - {self.member.name if self.member else 'N/A'} - {self.amount} (archived)"
+
+
+class TransactionLogArchive(models.Model):
+    """One archived fiscal (calendar) year, with the totals verified when it was moved"""
+    year = models.PositiveIntegerField(unique=True)
+    row_count = models.PositiveIntegerField()
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-year']
+
+    def __str__(self):
+        return f"{self.year}: {self.row_count} transactions archived"
+
+
+class ImportJob(models.Model):
+    """Background import of historical records or members from an uploaded CSV or XLSX file"""
+    KIND_CHOICES = [
+        ('contributions', 'Contributions'),
+        ('withdrawals', 'Withdrawals'),
+        ('loans', 'Loans'),
+        ('members', 'Members'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    file = models.FileField(upload_to='imports/%Y/%m/')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_rows = models.PositiveIntegerField(default=0)
+    imported_rows = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    # [{'row': 12, 'errors': ['...']}, ...], capped at MAX_REPORTED_ERRORS
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True)
+    # Member imports: {'create_accounts': bool, 'default_password_hash': str}
+    options = models.JSONField(default=dict, blank=True)
+    created_by = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, related_name='import_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} import ({self.status}) - {self.imported_rows}/{self.total_rows} rows"
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+
+class BalanceCheckpoint(models.Model):
+    """Running balances of a member's statement after every CHECKPOINT_INTERVAL entries.
+
+    A statement page sums only the entries after the nearest checkpoint; see
+    contributions/statement.py. Checkpoints dated on or after a new, changed or
+    deleted entry are dropped and rebuilt on the next statement.
+    """
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='balance_checkpoints')
+    # Number of statement entries up to and including the last one covered
+    position = models.PositiveIntegerField()
+    # Sort key (date, kind, id) of that last entry
+    entry_date = models.DateField()
+    entry_kind = models.PositiveSmallIntegerField()
+    entry_id = models.BigIntegerField()
+    savings_balance = models.DecimalField(max_digits=14, decimal_places=2)
+    loan_balance = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['member', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['member', 'position'], name='checkpoint_member_position_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['member', 'entry_date'], name='checkpoint_member_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.member.name} - balance after {self.position} entries ({self.entry_date})"
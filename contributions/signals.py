@@ -0,0 +1,57 @@
+"""
+Keep statement balance checkpoints in step with the entries they summarize.
+
+Single saves and deletes are handled here. ``bulk_create`` sends no signals, so the
+bulk writers (the meeting grid and the importer) call invalidate_checkpoints() themselves.
+An update that moves an entry to another member invalidates both members' checkpoints.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from loans.models import Loan, LoanRepayment
+from .models import Contribution, Withdrawal
+from .statement import entry_date, invalidate_checkpoints
+
+
+def _member_id(instance):
+    return instance.loan.member_id if isinstance(instance, LoanRepayment) else instance.member_id
+
+
+def _member_lookup(sender):
+    return 'loan__member_id' if sender is LoanRepayment else 'member_id'
+
+
+@receiver(pre_save, sender=Contribution)
+@receiver(pre_save, sender=Withdrawal)
+@receiver(pre_save, sender=Loan)
+@receiver(pre_save, sender=LoanRepayment)
+def entry_saving(sender, instance, raw=False, **kwargs):
+    """Remember whose statement an updated entry was on before the update"""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_member_id = (
+        sender.objects.filter(pk=instance.pk).values_list(_member_lookup(sender), flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Contribution)
+@receiver(post_save, sender=Withdrawal)
+@receiver(post_save, sender=Loan)
+@receiver(post_save, sender=LoanRepayment)
+def entry_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    member_ids = {_member_id(instance)}
+    previous = getattr(instance, '_previous_member_id', None)
+    if previous is not None:
+        member_ids.add(previous)
+    # An update may have moved the entry from an earlier date, so it drops every checkpoint
+    invalidate_checkpoints(member_ids, entry_date(instance) if created else None)
+
+
+@receiver(post_delete, sender=Contribution)
+@receiver(post_delete, sender=Withdrawal)
+@receiver(post_delete, sender=Loan)
+@receiver(post_delete, sender=LoanRepayment)
+def entry_deleted(sender, instance, **kwargs):
+    invalidate_checkpoints([_member_id(instance)], entry_date(instance))
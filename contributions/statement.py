@@ -0,0 +1,201 @@
+"""
+Member statement: contributions, approved withdrawals, granted loans and completed
+repayments in one chronological list with running savings and loan balances.
+
+The entries are a UNION ALL of the four tables, ordered by (date, kind, id), and the
+running balances are ``SUM() OVER`` window functions. A BalanceCheckpoint is stored
+after every CHECKPOINT_INTERVAL entries, so a page only reads the entries between
+the nearest checkpoint and its last row, however long the member's history is.
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.utils.dateparse import parse_date
+
+from loans.models import Loan, LoanRepayment
+from .models import BalanceCheckpoint, Contribution, Withdrawal
+
+CHECKPOINT_INTERVAL = 250
+CENT = Decimal('0.01')
+
+# Entries of one day are listed in this order
+CONTRIBUTION, WITHDRAWAL, LOAN, REPAYMENT = 1, 2, 3, 4
+KIND_LABELS = {
+    CONTRIBUTION: 'Contribution',
+    WITHDRAWAL: 'Withdrawal',
+    LOAN: 'Loan granted',
+    REPAYMENT: 'Loan repayment',
+}
+GRANTED_LOAN_STATUSES = ('approved', 'active', 'completed', 'defaulted')
+
+ORDER = 'entry_date, kind, entry_id'
+
+
+def _entries_sql():
+    """SELECT of every statement entry of one member; takes the member id four times"""
+    q = connection.ops.quote_name
+    contributions, withdrawals, loans, repayments = (
+        q(model._meta.db_table) for model in (Contribution, Withdrawal, Loan, LoanRepayment)
+    )
+    statuses = ', '.join(f"'{status}'" for status in GRANTED_LOAN_STATUSES)
+    # Loans add principal plus flat interest to what the member owes, as Loan.get_total_amount() does
+    return (
+        f'SELECT date AS entry_date, {CONTRIBUTION} AS kind, id AS entry_id, amount AS savings, 0 AS loan, '
+        f'description AS memo FROM {contributions} WHERE member_id = %s '
+        f'UNION ALL SELECT date, {WITHDRAWAL}, id, -amount, 0, reason FROM {withdrawals} '
+        f"WHERE member_id = %s AND status = 'approved' "
+        f'UNION ALL SELECT COALESCE(approved_date, requested_date), {LOAN}, id, 0, '
+        f'amount + amount * interest_rate / 100.0, purpose FROM {loans} '
+        f'WHERE member_id = %s AND status IN ({statuses}) '
+        f'UNION ALL SELECT r.payment_date, {REPAYMENT}, r.id, 0, -r.amount, r.notes '
+        f'FROM {repayments} r INNER JOIN {loans} l ON r.loan_id = l.id '
+        f"WHERE l.member_id = %s AND r.status = 'completed'"
+    )
+
+
+def _after(checkpoint):
+    """WHERE clause and params for the entries after a checkpoint (all entries for None)"""
+    if checkpoint is None:
+        return '', []
+    date = connection.ops.adapt_datefield_value(checkpoint.entry_date)
+    return f'WHERE ({ORDER}) > (%s, %s, %s)', [date, checkpoint.entry_kind, checkpoint.entry_id]
+
+
+def _decimal(value):
+    # SQLite sums decimal columns as floats
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def _date(value):
+    return parse_date(value) if isinstance(value, str) else value
+
+
+class StatementEntry:
+    """One statement line with the balances after it"""
+
+    def __init__(self, date, kind, entry_id, savings, loan, memo, savings_balance, loan_balance):
+        self.date = _date(date)
+        self.kind = kind
+        self.entry_id = entry_id
+        self.savings = _decimal(savings)
+        self.loan = _decimal(loan)
+        self.memo = memo or ''
+        self.savings_balance = _decimal(savings_balance)
+        self.loan_balance = _decimal(loan_balance)
+
+    @property
+    def label(self):
+        return KIND_LABELS[self.kind]
+
+
+def update_checkpoints(member_id):
+    """Add the checkpoints missing after the member's last one. Returns (checkpoints, entry count).
+
+    One window query over the entries after the last checkpoint returns every
+    CHECKPOINT_INTERVAL-th row and the final row, whose number gives the total.
+    """
+    checkpoints = list(BalanceCheckpoint.objects.filter(member_id=member_id).order_by('position'))
+    last = checkpoints[-1] if checkpoints else None
+    where, params = _after(last)
+    sql = (
+        f'SELECT entry_date, kind, entry_id, n, remaining, savings_balance, loan_balance FROM ('
+        f'SELECT entry_date, kind, entry_id, ROW_NUMBER() OVER w AS n, COUNT(*) OVER () AS remaining, '
+        f'SUM(savings) OVER w AS savings_balance, SUM(loan) OVER w AS loan_balance '
+        f'FROM ({_entries_sql()}) entries {where} '
+        f'WINDOW w AS (ORDER BY {ORDER} ROWS UNBOUNDED PRECEDING)'
+        f') numbered WHERE n %% {CHECKPOINT_INTERVAL} = 0 OR n = remaining ORDER BY n'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [member_id] * 4 + params)
+        rows = cursor.fetchall()
+
+    start = last.position if last else 0
+    if not rows:
+        return checkpoints, start
+    savings, loan = (last.savings_balance, last.loan_balance) if last else (0, 0)
+    new = [
+        BalanceCheckpoint(
+            member_id=member_id, position=start + n, entry_date=_date(date), entry_kind=kind, entry_id=entry_id,
+            savings_balance=savings + _decimal(savings_sum), loan_balance=loan + _decimal(loan_sum),
+        )
+        for date, kind, entry_id, n, _, savings_sum, loan_sum in rows
+        if n % CHECKPOINT_INTERVAL == 0
+    ]
+    if new:
+        # A concurrent statement may have stored the same checkpoints already
+        BalanceCheckpoint.objects.bulk_create(new, ignore_conflicts=True)
+    return checkpoints + new, start + rows[-1][4]
+
+
+def entry_date(record):
+    """Date a contribution, withdrawal, loan or repayment appears on the statement"""
+    if isinstance(record, Loan):
+        return record.approved_date or record.requested_date
+    if isinstance(record, LoanRepayment):
+        return record.payment_date
+    return record.date
+
+
+def invalidate_checkpoints(member_ids, since=None):
+    """Drop the checkpoints that an entry dated ``since`` changes (all of them for None)"""
+    checkpoints = BalanceCheckpoint.objects.filter(member_id__in=member_ids)
+    if since is not None:
+        checkpoints = checkpoints.filter(entry_date__gte=since)
+    checkpoints.delete()
+
+
+class MemberStatement:
+    """A member's statement entries, newest first.
+
+    Supports count() and slicing, so it can be handed to a Paginator. Each slice is
+    one window query starting at the nearest checkpoint before it.
+    """
+
+    def __init__(self, member_id):
+        self.member_id = member_id
+        self.checkpoints, self.total = update_checkpoints(member_id)
+
+    def count(self):
+        return self.total
+
+    def __len__(self):
+        return self.total
+
+    def _nearest_checkpoint(self, position):
+        nearest = None
+        for checkpoint in self.checkpoints:
+            if checkpoint.position > position:
+                break
+            nearest = checkpoint
+        return nearest
+
+    def entries(self, start, stop):
+        """Entries start..stop-1 in chronological order (0 is the oldest)"""
+        if stop <= start:
+            return []
+        checkpoint = self._nearest_checkpoint(start)
+        offset = start - (checkpoint.position if checkpoint else 0)
+        where, params = _after(checkpoint)
+        sql = (
+            f'SELECT entry_date, kind, entry_id, savings, loan, memo, '
+            f'SUM(savings) OVER w, SUM(loan) OVER w '
+            f'FROM ({_entries_sql()}) entries {where} '
+            f'WINDOW w AS (ORDER BY {ORDER} ROWS UNBOUNDED PRECEDING) '
+            f'ORDER BY {ORDER} LIMIT %s OFFSET %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self.member_id] * 4 + params + [stop - start, offset])
+            rows = cursor.fetchall()
+        savings, loan = (checkpoint.savings_balance, checkpoint.loan_balance) if checkpoint else (0, 0)
+        return [
+            StatementEntry(date, kind, entry_id, savings_delta, loan_delta, memo,
+                           savings + _decimal(savings_sum), loan + _decimal(loan_sum))
+            for date, kind, entry_id, savings_delta, loan_delta, memo, savings_sum, loan_sum in rows
+        ]
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError('MemberStatement only supports slices without a step')
+        start, stop, _ = index.indices(self.total)
+        # Newest first: item i is chronological entry total - 1 - i
+        return list(reversed(self.entries(self.total - stop, self.total - start)))
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from members.models import Member
+from scheduler.registry import periodic_task
+from .archive import archivable_years, archive_year
+from .importer import fail_stale_imports, run_import_job
+from .models import ImportJob
+from .statement import update_checkpoints
+
+# An upload is handed to the import thread when it is saved; one still queued after this was lost
+STALLED_IMPORT_AFTER = timedelta(minutes=10)
+
+
+@periodic_task(every=timedelta(minutes=5), lease=timedelta(hours=2))
+def run_stalled_imports():
+    """Fail import jobs whose worker died mid-import and run those no process picked up"""
+    failed = fail_stale_imports()
+    stalled = ImportJob.objects.filter(status='queued', created_at__lt=timezone.now() - STALLED_IMPORT_AFTER)
+    job_ids = list(stalled.order_by('created_at').values_list('pk', flat=True))
+    # run_import_job claims each job atomically and skips those the import thread got to first
+    ran = sum(1 for job_id in job_ids if run_import_job(job_id) is not None)
+    return {'ran': ran, 'failed': failed}
+
+
+@periodic_task(every=timedelta(days=1), lease=timedelta(hours=6))
+def archive_closed_years():
+    """Move transaction logs of closed years to the archive table, when ARCHIVE_CLOSED_YEARS is on"""
+    if not settings.ARCHIVE_CLOSED_YEARS:
+        return 0
+    archives = [archive_year(year) for year in archivable_years(timezone.localtime().year - 1)]
+    return sum(archive.row_count for archive in archives)
+
+
+@periodic_task(every=timedelta(days=1), lease=timedelta(hours=6))
+def refresh_balance_checkpoints():
+    """Rebuild statement checkpoints dropped by new entries, so the next statement is served from them"""
+    member_ids = Member.objects.filter(is_active=True).values_list('pk', flat=True)
+    return sum(len(update_checkpoints(member_id)[0]) for member_id in member_ids.iterator())
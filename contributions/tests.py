@@ -0,0 +1,376 @@
+import io
+import tempfile
+from unittest.mock import patch
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from loans.models import Loan, LoanRepayment
+from meetings.models import Meeting
+from members.models import Member
+from nja_platform.spreadsheets import read_rows
+from . import archive, statement
+from .forms import WithdrawalForm
+from .importer import fail_stale_imports, import_rows, run_import_job
+from .models import ArchivedTransactionLog, BalanceCheckpoint, Contribution, ImportJob, TransactionLog, TransactionLogArchive, Withdrawal
+
+
+class ContributionGridTests(TestCase):
+    """A meeting's contributions are saved from one grid submission"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('grid-admin', password='x', is_staff=True)
+        cls.members = Member.objects.bulk_create([Member(name=f'Grid Member {i}') for i in range(30)])
+        cls.meeting = Meeting.objects.create(title='Monthly meeting', date=timezone.now(), location='Hall')
+        cls.url = reverse('contributions:meeting_grid', kwargs={'meeting_id': cls.meeting.pk})
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_batch_is_written_with_two_inserts(self):
+        data = {'description': 'March meeting'}
+        for member in self.members[:20]:
+            data[f'amount_{member.pk}'] = '1500'
+            data[f'category_{member.pk}'] = Contribution.CATEGORY_REGULAR
+        data[f'category_{self.members[0].pk}'] = Contribution.CATEGORY_SOCIAL
+
+        # Session, user, meeting and members, then the two INSERTs, dropping the members' statement
+        # checkpoints and the session save, each in a savepoint
+        with self.assertNumQueries(12):
+            response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 302)
+
+        contributions = Contribution.objects.filter(date=timezone.localtime(self.meeting.date).date())
+        self.assertEqual(contributions.count(), 20)
+        self.assertEqual(contributions.get(member=self.members[0]).category, Contribution.CATEGORY_SOCIAL)
+        self.assertEqual(
+            TransactionLog.objects.filter(contribution__in=contributions, amount=Decimal('1500')).count(), 20,
+        )
+
+    def test_large_group_fits_in_one_post(self):
+        # Two fields per member: 510 members go past Django's default limit of 1000 fields
+        members = self.members + Member.objects.bulk_create(
+            [Member(name=f'Grid Member {i}') for i in range(30, 510)]
+        )
+        data = {'description': 'Annual meeting'}
+        for member in members:
+            data[f'amount_{member.pk}'] = '1000'
+            data[f'category_{member.pk}'] = Contribution.CATEGORY_REGULAR
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Contribution.objects.count(), 510)
+
+    def test_invalid_row_saves_nothing(self):
+        data = {
+            f'amount_{self.members[0].pk}': '1000',
+            f'amount_{self.members[1].pk}': '-5',
+        }
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Grid Member 1')
+        self.assertFalse(Contribution.objects.exists())
+
+    def test_empty_grid_is_rejected(self):
+        response = self.client.post(self.url, {})
+        self.assertContains(response, 'Enter an amount for at least one member.')
+        self.assertFalse(TransactionLog.objects.exists())
+
+
+class ImportTests(TestCase):
+    """Historical records stream in from CSV/XLSX with per-row errors"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('import-admin', password='x', is_staff=True)
+        cls.alice = Member.objects.create(name='Alice Ngo', phone='+237 650 000 001')
+        cls.bob = Member.objects.create(name='Bob Tabi', phone='+237650000002')
+        # Two members with one name can only be matched by phone
+        Member.objects.create(name='Paul Eto', phone='+237650000003')
+        Member.objects.create(name='Paul Eto', phone='+237650000004')
+
+    def _csv(self, text):
+        return read_rows(io.BytesIO(text.encode()), 'history.csv')
+
+    def test_csv_contributions(self):
+        rows = self._csv(
+            'Member,Phone,Date,Amount,Category\n'
+            'alice  ngo,,2019-03-15,2500,social\n'
+            ',237650000002,2019-03-15,1000.50,\n'
+            '\n'
+            'Paul Eto,,2019-03-15,1000,\n'
+            'Nobody,,2019-03-15,1000,\n'
+            'Bob Tabi,,not a date,-3,\n'
+        )
+        result = import_rows('contributions', rows, self.admin)
+
+        self.assertEqual((result.total_rows, result.imported_rows, result.error_count), (5, 2, 3))
+        self.assertEqual([error['row'] for error in result.errors], [5, 6, 7])
+        self.assertIn('More than one member has the name "Paul Eto".', result.errors[0]['errors'])
+        self.assertEqual(len(result.errors[2]['errors']), 2)
+        self.assertEqual(self.alice.contributions.get().category, Contribution.CATEGORY_SOCIAL)
+        self.assertEqual(self.bob.contributions.get().amount, Decimal('1000.50'))
+        self.assertEqual(TransactionLog.objects.filter(contribution__isnull=False).count(), 2)
+        self.assertEqual({log.created_at.date() for log in TransactionLog.objects.all()}, {date(2019, 3, 15)})
+
+    def test_xlsx_loans(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(['Member', 'Requested Date', 'Due Date', 'Amount', 'Interest Rate', 'Status'])
+        sheet.append(['Alice Ngo', datetime(2018, 1, 10), datetime(2018, 7, 10), 50000, 5, None])
+        sheet.append(['Bob Tabi', datetime(2018, 7, 10), datetime(2018, 1, 10), 50000, 5, 'active'])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+
+        result = import_rows('loans', read_rows(buffer, 'history.xlsx'), self.admin)
+
+        self.assertEqual((result.imported_rows, result.error_count), (1, 1))
+        loan = Loan.objects.get()
+        self.assertEqual((loan.member, loan.status, loan.approved_date), (self.alice, 'completed', date(2018, 1, 10)))
+        # A completed loan comes with its repayment, so statements and the pool's cash add up
+        repayment = loan.repayments.get()
+        self.assertEqual(
+            (repayment.amount, repayment.payment_date, repayment.status), (52500, date(2018, 7, 10), 'completed'),
+        )
+        self.assertEqual(loan.get_remaining_balance(), 0)
+        self.assertFalse(loan.installments.exclude(status='paid').exists())
+        self.assertEqual(
+            sorted(TransactionLog.objects.values_list('transaction_type', 'created_at__date')),
+            [('loan_granted', date(2018, 1, 10)), ('loan_repayment', date(2018, 7, 10))],
+        )
+
+    def test_upload_runs_in_background_job(self):
+        self.client.force_login(self.admin)
+        upload = SimpleUploadedFile(
+            'withdrawals.csv', b'phone,date,amount,reason\n+237650000001,2020-05-01,300,School fees\n,,,\n'
+        )
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post(reverse('contributions:import_list'), {'kind': 'withdrawals', 'file': upload})
+            job = ImportJob.objects.get()
+            self.assertRedirects(response, reverse('contributions:import_detail', kwargs={'pk': job.pk}))
+            self.assertEqual(len(callbacks), 1)
+            # The callback hands the job to the import thread; run it here instead
+            run_import_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.total_rows, job.imported_rows), ('completed', 1, 1))
+        withdrawal = Withdrawal.objects.get()
+        self.assertEqual((withdrawal.member, withdrawal.status), (self.alice, 'approved'))
+        self.assertContains(self.client.get(reverse('contributions:import_detail', kwargs={'pk': job.pk})), 'Completed')
+
+    def test_job_is_claimed_once_and_stale_jobs_fail(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            job = ImportJob.objects.create(
+                kind='contributions', created_by=self.admin,
+                file=SimpleUploadedFile('c.csv', b'phone,date,amount\n+237650000002,2020-05-01,300\n'),
+            )
+            self.assertEqual(run_import_job(job.pk).status, 'completed')
+            # A second runner finds the job already claimed
+            self.assertIsNone(run_import_job(job.pk))
+        self.assertEqual(self.bob.contributions.count(), 1)
+
+        stale = ImportJob.objects.create(kind='contributions', file='imports/lost.csv', status='running')
+        ImportJob.objects.filter(pk=stale.pk).update(started_at=timezone.now() - timedelta(hours=3))
+        recent = ImportJob.objects.create(
+            kind='contributions', file='imports/busy.csv', status='running', started_at=timezone.now(),
+        )
+        self.assertEqual(fail_stale_imports(), 1)
+        stale.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual((stale.status, recent.status), ('failed', 'running'))
+        self.assertIsNone(run_import_job(stale.pk))
+
+
+class TransactionLogArchiveTests(TestCase):
+    """Closed years move to the archive table and are still found by date"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('archive-admin', password='x', is_staff=True)
+        cls.member = Member.objects.create(name='Archive Member')
+        for year, amount in ((2020, '100'), (2020, '250.50'), (2021, '75'), (timezone.now().year, '40')):
+            log = TransactionLog.objects.create(
+                transaction_type='contribution', member=cls.member, amount=Decimal(amount),
+                description='x', created_by=cls.admin,
+            )
+            # created_at is auto_now_add, so backdate it with an UPDATE
+            TransactionLog.objects.filter(pk=log.pk).update(created_at=timezone.make_aware(datetime(year, 6, 1)))
+
+    def test_archive_and_route_by_date(self):
+        call_command('archive_transaction_logs', through=2021, stdout=io.StringIO())
+
+        self.assertEqual(TransactionLog.objects.count(), 1)
+        self.assertEqual(ArchivedTransactionLog.objects.count(), 3)
+        self.assertEqual(
+            list(TransactionLogArchive.objects.order_by('year').values_list('year', 'row_count', 'total_amount')),
+            [(2020, 2, Decimal('350.50')), (2021, 1, Decimal('75'))],
+        )
+        self.assertEqual(archive.archive_cutoff(), date(2022, 1, 1))
+
+        # No date filter: hot table only
+        self.assertEqual(archive.transaction_logs().count(), 1)
+        # Reaching into the archive: UNION of both tables
+        logs = archive.transaction_logs(date(2021, 1, 1), member_id=self.member.pk)
+        self.assertEqual(sorted(log.amount for log in logs), [Decimal('40'), Decimal('75')])
+        # Entirely archived: the archive table alone
+        self.assertIs(archive.transaction_logs(date(2020, 1, 1), date(2020, 12, 31)).model, ArchivedTransactionLog)
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('contributions:transaction_logs'), {'date_from': '2020-01-01'})
+        self.assertEqual(len(response.context['page_obj']), 4)
+        self.assertContains(response, 'Archive Member', count=5)  # member filter option + 4 rows
+
+    def test_verification_failure_moves_nothing(self):
+        start, end = archive.year_bounds(2020)
+        copy_sql = archive._copy_sql
+        # Copy only the first quarter (without the June rows): the archive's totals do not match
+        with patch('contributions.archive._copy_sql', side_effect=lambda s, e: copy_sql(s, s + (e - s) / 4)):
+            with self.assertRaises(archive.ArchiveVerificationError):
+                archive.archive_year(2020)
+        self.assertEqual(TransactionLog.objects.filter(created_at__gte=start, created_at__lt=end).count(), 2)
+        self.assertFalse(ArchivedTransactionLog.objects.exists())
+        self.assertFalse(TransactionLogArchive.objects.exists())
+
+
+@patch('contributions.statement.CHECKPOINT_INTERVAL', 3)
+class MemberStatementTests(TestCase):
+    """Statement pages start from stored checkpoints and match a full running sum"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('statement-admin', password='x', is_staff=True)
+        cls.member = Member.objects.create(name='Statement Member')
+        Contribution.objects.bulk_create([
+            Contribution(member=cls.member, amount=Decimal('100.10'), date=date(2020, month, 1)) for month in range(1, 8)
+        ])
+        Withdrawal.objects.create(member=cls.member, amount=Decimal('50'), date=date(2020, 2, 15), reason='x', status='approved')
+        Withdrawal.objects.create(member=cls.member, amount=Decimal('999'), date=date(2020, 2, 16), reason='x')
+        loan = Loan.objects.create(
+            member=cls.member, amount=Decimal('1000'), interest_rate=Decimal('5'), purpose='Stock', status='active',
+            requested_date=date(2020, 3, 1), approved_date=date(2020, 3, 10), due_date=date(2020, 9, 1),
+        )
+        LoanRepayment.objects.create(loan=loan, amount=Decimal('300'), payment_date=date(2020, 4, 1), status='completed')
+
+    def expected(self):
+        """(date, savings balance, loan balance) newest first, summed in Python"""
+        rows = sorted(
+            [(c.date, 1, c.pk, c.amount, 0) for c in Contribution.objects.filter(member=self.member)]
+            + [(w.date, 2, w.pk, -w.amount, 0) for w in Withdrawal.objects.filter(member=self.member, status='approved')]
+            + [(date(2020, 3, 10), 3, 0, 0, Decimal('1050')), (date(2020, 4, 1), 4, 0, 0, Decimal('-300'))]
+        )
+        balances, savings, loan = [], 0, 0
+        for day, _, _, saved, owed in rows:
+            savings, loan = savings + saved, loan + owed
+            balances.append((day, savings, loan))
+        return balances[::-1]
+
+    def lines(self, entries):
+        return [(entry.date, entry.savings_balance, entry.loan_balance) for entry in entries]
+
+    def test_pages_match_running_sum(self):
+        member_statement = statement.MemberStatement(self.member.pk)
+        self.assertEqual(member_statement.count(), 10)
+        self.assertEqual(list(BalanceCheckpoint.objects.values_list('position', flat=True)), [3, 6, 9])
+        self.assertEqual(self.lines(member_statement[0:10]), self.expected())
+        # A page in the middle starts from the checkpoint at 6 entries
+        self.assertEqual(self.lines(member_statement[2:5]), self.expected()[2:5])
+        self.assertEqual(member_statement[0:1][0].label, 'Contribution')
+
+    def test_backdated_entry_drops_later_checkpoints(self):
+        statement.MemberStatement(self.member.pk)
+        Contribution.objects.create(member=self.member, amount=Decimal('5'), date=date(2020, 3, 5))
+        self.assertEqual(list(BalanceCheckpoint.objects.values_list('position', flat=True)), [3])
+
+        member_statement = statement.MemberStatement(self.member.pk)
+        self.assertEqual(self.lines(member_statement[0:11]), self.expected())
+        self.assertEqual(member_statement[0:1][0].savings_balance, Decimal('655.70'))
+
+    def test_moved_entry_updates_both_statements(self):
+        other = Member.objects.create(name='Other Member')
+        Contribution.objects.bulk_create([
+            Contribution(member=other, amount=Decimal('10'), date=date(2020, month, 2)) for month in range(1, 5)
+        ])
+        statement.MemberStatement(self.member.pk)
+        statement.MemberStatement(other.pk)
+
+        moved = Contribution.objects.filter(member=self.member).order_by('date').first()
+        moved.member = other
+        moved.save()
+        self.assertFalse(BalanceCheckpoint.objects.exists())
+
+        self.assertEqual(self.lines(statement.MemberStatement(self.member.pk)[0:9]), self.expected())
+        other_statement = statement.MemberStatement(other.pk)
+        self.assertEqual(other_statement.count(), 5)
+        self.assertEqual(other_statement[0:1][0].savings_balance, Decimal('140.10'))
+
+    def test_account_balance_page(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('contributions:account_balance', kwargs={'member_id': self.member.pk}), {'page': 2},
+        )
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 1)
+        self.assertContains(response, 'Loan granted')
+        self.assertContains(response, '1050.00')
+
+
+class WithdrawalApprovalTests(TestCase):
+    """Approving a withdrawal checks the member's savings with the member row locked"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('withdrawal-admin', password='x', is_staff=True)
+        cls.member = Member.objects.create(name='Saver')
+        Contribution.objects.create(member=cls.member, amount=Decimal('1000'), date=date(2024, 1, 5))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def request(self, amount, reason='Fees'):
+        return Withdrawal.objects.create(
+            member=self.member, amount=Decimal(amount), date=date(2024, 2, 1), reason=reason,
+        )
+
+    def approve(self, withdrawal):
+        return self.client.post(
+            reverse('contributions:withdrawal_approve', kwargs={'pk': withdrawal.pk}), {'status': 'approved'},
+        )
+
+    def test_approvals_cannot_overspend(self):
+        # A pending request reserves its amount; the form and the approval use the same check
+        pending = self.request('300', 'Rent')
+        first = self.request('600')
+        response = self.client.get(reverse('contributions:withdrawal_approve', kwargs={'pk': first.pk}))
+        # The page shows the member's balance as every other page does
+        self.assertEqual(response.context['current_balance'], Decimal('100'))
+        self.assertRedirects(self.approve(first), reverse('contributions:withdrawal_list'))
+
+        # Made before the approval, this request passed the balance check of its time
+        second = self.request('200')
+
+        response = self.approve(second)
+        self.assertContains(response, 'exceeds available balance (100')
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.approved_by), ('pending', None))
+        form = WithdrawalForm({'member': self.member.pk, 'amount': '200', 'date': '2024-02-03', 'reason': 'Fees'})
+        self.assertIn('exceeds available balance (-100', str(form.errors))
+
+        # A rejected request no longer counts against the balance
+        self.client.post(
+            reverse('contributions:withdrawal_approve', kwargs={'pk': pending.pk}), {'status': 'rejected'},
+        )
+        self.assertRedirects(self.approve(second), reverse('contributions:withdrawal_list'))
+        self.assertEqual(
+            Member.objects.with_balances().get(pk=self.member.pk).current_balance, self.member.get_current_balance(),
+        )
+        # Approving an approved withdrawal again does not count it twice
+        self.assertRedirects(self.approve(first), reverse('contributions:withdrawal_list'))
@@ -6,12 +6,15 @@ app_name = 'contributions'
 urlpatterns = [
     path('', views.contribution_list, name='list'),
     path('create/', views.contribution_create, name='create'),
+    path('meeting/<int:meeting_id>/', views.contribution_grid, name='meeting_grid'),
     path('account/<int:member_id>/', views.account_balance, name='account_balance'),
     path('yearly-statement/', views.yearly_statement, name='yearly_statement'),
     path('withdrawals/', views.withdrawal_list, name='withdrawal_list'),
     path('withdrawals/create/', views.withdrawal_create, name='withdrawal_create'),
     path('withdrawals/<int:pk>/approve/', views.withdrawal_approve, name='withdrawal_approve'),
     path('logs/', views.transaction_logs, name='transaction_logs'),
+    path('imports/', views.import_list, name='import_list'),
+    path('imports/<int:pk>/', views.import_detail, name='import_detail'),
 ]
 
 
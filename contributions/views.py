@@ -1,20 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Sum, Q
 from django.db.models.functions import ExtractMonth
 from django.core.paginator import Paginator
+from django.urls import reverse
 from django.utils import timezone
-from .models import Contribution, Withdrawal, TransactionLog
-from .forms import ContributionForm, WithdrawalForm, WithdrawalApprovalForm
+from .models import Contribution, Withdrawal, TransactionLog, ImportJob
+from .forms import ContributionForm, ContributionGridForm, ImportJobForm, WithdrawalForm, WithdrawalApprovalForm
+from .importer import COLUMNS, MEMBER_COLUMNS, enqueue_import
+from . import archive
+from .statement import MemberStatement, invalidate_checkpoints
 from members.models import Member
+from meetings.models import Meeting
+from members.decorators import admin_required
+from nja_platform.replica import use_replica
+from nja_platform.transactions import atomic_with_retries
 from calendar import month_name
 
 
 @login_required
+@use_replica
 def contribution_list(request):
     """List all contributions"""
-    contributions = Contribution.objects.all()
+    contributions = Contribution.objects.select_related('member', 'created_by')
     
     # Filters
     member_filter = request.GET.get('member', '')
@@ -74,12 +85,9 @@ def contribution_list(request):
 
 
 @login_required
+@admin_required('Only administrators can record contributions.', 'contributions:list')
 def contribution_create(request):
     """Create new contribution"""
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can record contributions.')
-        return redirect('contributions:list')
-    
     if request.method == 'POST':
         form = ContributionForm(request.POST)
         if form.is_valid():
@@ -105,9 +113,104 @@ def contribution_create(request):
     return render(request, 'contributions/contribution_form.html', {'form': form})
 
 
+@login_required
+@admin_required('Only administrators can record contributions.', 'meetings:detail', url_kwargs={'pk': 'meeting_id'})
+def contribution_grid(request, meeting_id):
+    """Record a whole meeting's contributions in one submission"""
+    meeting = get_object_or_404(Meeting, pk=meeting_id)
+    contribution_date = timezone.localtime(meeting.date).date()
+    members = Member.objects.filter(is_active=True).order_by('name')
+
+    if request.method == 'POST':
+        form = ContributionGridForm(request.POST, members=members)
+        if form.is_valid():
+            description = form.cleaned_data['description']
+            contributions = [
+                Contribution(
+                    member=member,
+                    amount=amount,
+                    date=contribution_date,
+                    category=category,
+                    description=description,
+                    created_by=request.user,
+                )
+                for member, amount, category in form.entries()
+            ]
+            # Two INSERT statements for the whole batch; the logs need the contributions' ids
+            with transaction.atomic():
+                Contribution.objects.bulk_create(contributions)
+                TransactionLog.objects.bulk_create([
+                    TransactionLog(
+                        transaction_type='contribution',
+                        member=contribution.member,
+                        amount=contribution.amount,
+                        description=f"Contribution: {description or 'No description'}",
+                        created_by=request.user,
+                        contribution=contribution,
+                    )
+                    for contribution in contributions
+                ])
+                invalidate_checkpoints([contribution.member_id for contribution in contributions], contribution_date)
+
+            messages.success(request, f'{len(contributions)} contributions recorded successfully!')
+            day = contribution_date.isoformat()
+            return redirect(f"{reverse('contributions:list')}?date_from={day}&date_to={day}")
+    else:
+        form = ContributionGridForm(members=members)
+
+    # Already recorded on this date, so a second pass does not double-count by accident
+    recorded = dict(
+        Contribution.objects.filter(date=contribution_date)
+        .order_by().values_list('member').annotate(total=Sum('amount'))
+    )
+    rows = [
+        (member, amount, category, recorded.get(member.pk))
+        for member, amount, category in form.rows()
+    ]
+    context = {
+        'form': form,
+        'meeting': meeting,
+        'contribution_date': contribution_date,
+        'rows': rows,
+    }
+    return render(request, 'contributions/contribution_grid.html', context)
+
+
+@login_required
+@admin_required('Only administrators can import records.', 'contributions:list')
+def import_list(request):
+    """Upload a file of historical records and list recent imports"""
+    if request.method == 'POST':
+        form = ImportJobForm(request.POST, request.FILES)
+        if form.is_valid():
+            job = form.save(commit=False)
+            job.created_by = request.user
+            job.save()
+            enqueue_import(job)
+            messages.success(request, 'Import started. This page updates until it finishes.')
+            return redirect('contributions:import_detail', pk=job.pk)
+    else:
+        form = ImportJobForm()
+
+    context = {
+        'form': form,
+        'jobs': ImportJob.objects.select_related('created_by').defer('errors')[:20],
+        'columns': {kind: [*MEMBER_COLUMNS, *columns] for kind, columns in COLUMNS.items()},
+    }
+    return render(request, 'contributions/import_list.html', context)
+
+
+@login_required
+@admin_required('Only administrators can import records.', 'contributions:list')
+def import_detail(request, pk):
+    """Progress and per-row errors of an import"""
+    job = get_object_or_404(ImportJob.objects.select_related('created_by'), pk=pk)
+    return render(request, 'contributions/import_detail.html', {'job': job})
+
+
 @login_required
 def account_balance(request, member_id):
-    """View member account balance and history"""
+    """Member balance and statement with running balances, newest first"""
     member = get_object_or_404(Member, pk=member_id)
     
     contributions = Contribution.objects.filter(member=member)
@@ -117,10 +220,14 @@ def account_balance(request, member_id):
     total_withdrawals = withdrawals.filter(status='approved').aggregate(total=Sum('amount'))['total'] or 0
     balance = total_contributions - total_withdrawals
     
+    # Each page starts from the nearest stored balance checkpoint
+    paginator = Paginator(MemberStatement(member.pk), 30)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
     context = {
         'member': member,
-        'contributions': contributions[:20],
-        'withdrawals': withdrawals[:20],
+        'page_obj': page_obj,
+        'pending_withdrawals': withdrawals.filter(status='pending')[:20],
         'total_contributions': total_contributions,
         'total_withdrawals': total_withdrawals,
         'balance': balance,
@@ -129,9 +236,10 @@ def account_balance(request, member_id):
 
 
 @login_required
+@use_replica
 def withdrawal_list(request):
     """List all withdrawals"""
-    withdrawals = Withdrawal.objects.all()
+    withdrawals = Withdrawal.objects.select_related('member')
     
     # Filter by status
     status_filter = request.GET.get('status', '')
@@ -178,61 +286,93 @@ def withdrawal_create(request):
     return render(request, 'contributions/withdrawal_form.html', {'form': form})
 
 
+@atomic_with_retries
+def _decide_withdrawal(pk, status, user):
+    """Set a withdrawal's status with it and its member's row locked.
+
+    Approving checks the member's savings under the lock, so two approvals of the
+    same member's withdrawals cannot both spend the same balance.
+    """
+    withdrawal = Withdrawal.objects.select_for_update().select_related('member').get(pk=pk)
+    if status == 'approved' and withdrawal.status != 'approved':
+        withdrawal.member.validate_withdrawal(withdrawal.amount, withdrawal)
+    
+    withdrawal.status = status
+    if withdrawal.status in ['approved', 'rejected']:
+        withdrawal.approved_by = user
+        withdrawal.approved_at = timezone.now()
+    withdrawal.save()
+    return withdrawal
+
+
 @login_required
+@admin_required('Only administrators can approve withdrawals.', 'contributions:withdrawal_list')
 def withdrawal_approve(request, pk):
     """Approve or reject withdrawal"""
-    withdrawal = get_object_or_404(Withdrawal, pk=pk)
-    
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can approve withdrawals.')
-        return redirect('contributions:withdrawal_list')
+    withdrawal = get_object_or_404(Withdrawal.objects.select_related('member'), pk=pk)
     
     if request.method == 'POST':
         form = WithdrawalApprovalForm(request.POST, instance=withdrawal)
         if form.is_valid():
-            withdrawal = form.save(commit=False)
-            if withdrawal.status in ['approved', 'rejected']:
-                withdrawal.approved_by = request.user
-                withdrawal.approved_at = timezone.now()
-            withdrawal.save()
-            
-            messages.success(request, f'Withdrawal {withdrawal.status} successfully!')
-            return redirect('contributions:withdrawal_list')
+            try:
+                withdrawal = _decide_withdrawal(pk, form.cleaned_data['status'], request.user)
+            except ValidationError as exc:
+                form.add_error('status', exc)
+            else:
+                messages.success(request, f'Withdrawal {withdrawal.status} successfully!')
+                return redirect('contributions:withdrawal_list')
     else:
         form = WithdrawalApprovalForm(instance=withdrawal)
     
-    return render(request, 'contributions/withdrawal_approve.html', {'form': form, 'withdrawal': withdrawal})
+    context = {
+        'form': form,
+        'withdrawal': withdrawal,
+        'current_balance': withdrawal.member.get_current_balance(),
+    }
+    return render(request, 'contributions/withdrawal_approve.html', context)
 
 
 @login_required
+@use_replica
 def transaction_logs(request):
     """View transaction logs"""
-    logs = TransactionLog.objects.all()
-    
     # Filters
     member_filter = request.GET.get('member', '')
     type_filter = request.GET.get('type', '')
+    date_from, date_to = archive.date_range(request.GET)
     
+    filters = {}
     if member_filter:
-        logs = logs.filter(member_id=member_filter)
+        filters['member_id'] = member_filter
     if type_filter:
-        logs = logs.filter(transaction_type=type_filter)
+        filters['transaction_type'] = type_filter
+    # Closed years are only read when the date range reaches into the archive
+    cutoff = archive.archive_cutoff()
+    logs = archive.transaction_logs(date_from, date_to, cutoff=cutoff, **filters)
+    if not logs.query.combinator:
+        logs = logs.select_related('member', 'created_by')
     
     # Pagination
     paginator = Paginator(logs, 50)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    if logs.query.combinator:
+        page_obj.object_list = archive.with_related(page_obj.object_list, 'member', 'created_by')
     
     context = {
         'page_obj': page_obj,
         'members': Member.objects.filter(is_active=True),
         'member_filter': member_filter,
         'type_filter': type_filter,
+        'date_from': date_from,
+        'date_to': date_to,
+        'archive_cutoff': cutoff,
     }
     return render(request, 'contributions/transaction_logs.html', context)
 
 
 @login_required
+@use_replica
 def yearly_statement(request):
     """Generate yearly account statement including automatic expense totals"""
     current_year = timezone.now().year
@@ -0,0 +1,117 @@
+"""
+Helpers shared by the query-budget tests and the benchmark commands
+"""
+import math
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from announcements.models import Announcement
+from contributions.models import ImportJob, Withdrawal
+from gallery.models import MediaFile
+from loans.models import Loan
+from meetings.models import Meeting
+from members.models import Member
+
+# URL name -> key into sample_url_kwargs() (None for URLs without arguments)
+URL_KWARGS = {
+    'members:detail': 'member',
+    'members:edit': 'member',
+    'contributions:account_balance': 'member_id',
+    'contributions:withdrawal_approve': 'withdrawal',
+    'contributions:meeting_grid': 'meeting_id',
+    'contributions:import_detail': 'import_job',
+    'meetings:detail': 'meeting',
+    'meetings:edit': 'meeting',
+    'meetings:attendance': 'meeting_id',
+    'announcements:detail': 'announcement',
+    'announcements:edit': 'announcement',
+    'loans:detail': 'loan',
+    'loans:approve': 'loan',
+    'loans:repayment_create_loan': 'loan_id',
+    'gallery:edit': 'media',
+    'gallery:delete': 'media',
+    'monitoring:profile_download': 'profile_file',
+}
+
+# Heavy libraries that only the code paths needing them may import
+HEAVY_MODULES = ('openpyxl', 'PIL', 'reportlab')
+
+# Startup code profiled by import_profile(): a serving worker, and `manage.py check`
+IMPORT_TARGETS = {
+    'wsgi': 'import nja_platform.wsgi\nfrom django.urls import get_resolver\nget_resolver().url_patterns\n',
+    'check': "from django.core.management import execute_from_command_line\nexecute_from_command_line(['manage.py', 'check'])\n",
+}
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def named_url_patterns(resolver=None, namespace=None):
+    """Yield the fully qualified names of every named URL pattern (admin site excluded)."""
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name == 'admin':
+                continue
+            child_namespace = pattern.namespace
+            if namespace and child_namespace:
+                child_namespace = f'{namespace}:{child_namespace}'
+            yield from named_url_patterns(pattern, child_namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}:{pattern.name}' if namespace else pattern.name
+
+
+def sample_url_kwargs():
+    """Pick representative objects for URLs that take a primary key."""
+    member = Member.objects.filter(is_active=True, contributions__isnull=False).first()
+    meeting = Meeting.objects.filter(is_completed=True).first()
+    loan = Loan.objects.filter(status='active').first() or Loan.objects.first()
+    withdrawal = Withdrawal.objects.first()
+    announcement = Announcement.objects.first()
+    media = MediaFile.objects.first()
+    import_job = ImportJob.objects.first()
+    samples = {
+        'member': member and {'pk': member.pk},
+        'member_id': member and {'member_id': member.pk},
+        'withdrawal': withdrawal and {'pk': withdrawal.pk},
+        'meeting': meeting and {'pk': meeting.pk},
+        'meeting_id': meeting and {'meeting_id': meeting.pk},
+        'announcement': announcement and {'pk': announcement.pk},
+        'loan': loan and {'pk': loan.pk},
+        'loan_id': loan and {'loan_id': loan.pk},
+        'media': media and {'pk': media.pk},
+        'import_job': import_job and {'pk': import_job.pk},
+        'profile_file': {'filename': 'missing.prof'},
+    }
+    return {key: value for key, value in samples.items() if value}
+
+
+def import_profile(target='wsgi'):
+    """Run a startup target in a fresh interpreter under ``-X importtime``.
+
+    Returns a list of (module, self_us, cumulative_us, depth) in import order.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'nja_platform.settings'))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', IMPORT_TARGETS[target]],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f'{target} startup failed:\n{result.stderr[-2000:]}')
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return modules
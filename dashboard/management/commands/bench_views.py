@@ -0,0 +1,74 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dashboard.benchmarks import URL_KWARGS, named_url_patterns, percentile, sample_url_kwargs
+
+
+class Command(BaseCommand):
+    help = 'Time every named view through the test client and report latency percentiles and query counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='seed0_member0', help='Username to run the views as')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per view')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per view before timing')
+        parser.add_argument('--only', action='append', default=[], help='Only URL names starting with this prefix')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' not found; run seed_benchmark first or pass --user.")
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1.')
+
+        client = Client()
+        client.force_login(user)
+        url_kwargs = sample_url_kwargs()
+        report = {}
+
+        for name in named_url_patterns():
+            if options['only'] and not any(name.startswith(prefix) for prefix in options['only']):
+                continue
+            kwargs_key = URL_KWARGS.get(name)
+            if kwargs_key and kwargs_key not in url_kwargs:
+                self.stderr.write(f'Skipping {name}: no sample object')
+                continue
+            url = reverse(name, kwargs=url_kwargs[kwargs_key] if kwargs_key else None)
+
+            for _ in range(options['warmup']):
+                client.get(url)
+            timings = []
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            report[name] = {
+                'path': url,
+                'status': response.status_code,
+                'queries': len(queries),
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+                'max_ms': round(timings[-1], 2),
+            }
+            self.stderr.write(
+                f"{name:45} {response.status_code} {len(queries):4d}q "
+                f"p50={report[name]['p50_ms']:.1f}ms p95={report[name]['p95_ms']:.1f}ms"
+            )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(report)} views to {options['output']}"))
+        else:
+            self.stdout.write(output)
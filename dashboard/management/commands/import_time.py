@@ -0,0 +1,56 @@
+import json
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from dashboard.benchmarks import HEAVY_MODULES, IMPORT_TARGETS, import_profile
+
+
+class Command(BaseCommand):
+    help = 'Report module import times of a worker (or manage.py check) startup using python -X importtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(IMPORT_TARGETS), default='wsgi',
+                            help='wsgi: load the WSGI app and URLconf as a worker does; check: manage.py check')
+        parser.add_argument('--limit', type=int, default=25, help='Rows per table')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        modules = import_profile(options['target'])
+        packages = defaultdict(int)
+        for module, self_us, _, _ in modules:
+            packages[module.split('.')[0]] += self_us
+        total_us = sum(packages.values())
+        heavy = sorted({module.split('.')[0] for module, _, _, _ in modules} & set(HEAVY_MODULES))
+
+        report = {
+            'target': options['target'],
+            'total_ms': round(total_us / 1000, 1),
+            'modules': len(modules),
+            'heavy_modules': heavy,
+            'packages': {
+                name: round(us / 1000, 1)
+                for name, us in sorted(packages.items(), key=lambda item: -item[1])[:options['limit']]
+            },
+            'slowest': [
+                {'module': module, 'cumulative_ms': round(cumulative / 1000, 1), 'self_ms': round(self_us / 1000, 1)}
+                for module, self_us, cumulative, _ in sorted(modules, key=lambda row: -row[2])[:options['limit']]
+            ],
+        }
+
+        self.stdout.write(
+            f"{report['target']}: {report['modules']} modules imported in {report['total_ms']} ms"
+        )
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"Heavy modules imported at startup: {', '.join(heavy)}"))
+        self.stdout.write(f"\n{'package':40}{'self ms':>10}")
+        for name, ms in report['packages'].items():
+            self.stdout.write(f'{name:40}{ms:>10}')
+        self.stdout.write(f"\n{'module':50}{'cumul ms':>10}{'self ms':>10}")
+        for row in report['slowest']:
+            self.stdout.write(f"{row['module'][:50]:50}{row['cumulative_ms']:>10}{row['self_ms']:>10}")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote report to {options['output']}"))
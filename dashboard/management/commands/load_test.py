@@ -0,0 +1,273 @@
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from contributions.models import Contribution
+from dashboard.benchmarks import percentile
+from dashboard.seeding import SEED_PASSWORD
+from members.models import Member
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+# Meeting-day mix: (endpoint, weight, admin only). Paths are filled in per request.
+SCENARIO = [
+    ('dashboard', 20, False),
+    ('member_dashboard', 10, False),
+    ('contribution_list', 15, False),
+    ('member_list', 10, False),
+    ('meeting_list', 5, False),
+    ('loan_list', 5, False),
+    ('yearly_statement', 5, False),
+    ('transaction_logs', 5, False),
+    ('contribution_create', 20, True),
+    ('export_contributions', 2, True),
+]
+
+
+class VirtualUser:
+    """One logged-in browser session replaying the scenario mix"""
+
+    def __init__(self, base_url, username, is_admin, member_ids, timeout):
+        self.base_url = base_url
+        self.username = username
+        self.is_admin = is_admin
+        self.member_ids = member_ids
+        self.timeout = timeout
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+
+    def _request(self, path, data=None):
+        body = urlencode(data).encode() if data is not None else None
+        request = Request(self.base_url + path, data=body)
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, response.read().decode('utf-8', 'replace'), response.url
+        except HTTPError as exc:
+            return exc.code, '', path
+
+    def _post_form(self, path, data):
+        status, html, _ = self._request(path)
+        match = CSRF_RE.search(html)
+        if status != 200 or not match:
+            return status or 500, '', path
+        return self._request(path, dict(data, csrfmiddlewaretoken=match.group(1)))
+
+    def login(self):
+        status, _, final_url = self._post_form('/login/', {'username': self.username, 'password': SEED_PASSWORD})
+        return status == 200 and '/login/' not in final_url
+
+    def run(self, endpoint):
+        page = random.randint(1, 5)
+        if endpoint == 'dashboard':
+            return self._request('/')
+        if endpoint == 'member_dashboard':
+            return self._request('/member/')
+        if endpoint == 'contribution_list':
+            return self._request(f'/contributions/?page={page}')
+        if endpoint == 'member_list':
+            return self._request(f'/members/?page={page}')
+        if endpoint == 'meeting_list':
+            return self._request('/meetings/')
+        if endpoint == 'loan_list':
+            return self._request('/loans/')
+        if endpoint == 'yearly_statement':
+            return self._request('/contributions/yearly-statement/')
+        if endpoint == 'transaction_logs':
+            return self._request(f'/contributions/logs/?page={page}')
+        if endpoint == 'contribution_create':
+            return self._post_form('/contributions/create/', {
+                'member': random.choice(self.member_ids),
+                'amount': random.choice(['5000', '10000', '15000']),
+                'date': date.today().isoformat(),
+                'category': random.choice([key for key, _ in Contribution.CATEGORY_CHOICES]),
+                'description': 'Load test',
+            })
+        if endpoint == 'export_contributions':
+            return self._request('/reports/contributions/')
+        raise ValueError(endpoint)
+
+
+class Command(BaseCommand):
+    help = 'Boot gunicorn locally and replay a concurrent meeting-day traffic mix against it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Target an already running server instead of booting gunicorn')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+        parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker (gthread when > 1)')
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent virtual users')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run the mix')
+        parser.add_argument('--think-time', type=float, default=0.0, help='Seconds each user pauses between requests')
+        parser.add_argument('--seed', type=int, default=0, help='seed_benchmark data set whose users log in')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        prefix = f"seed{options['seed']}_"
+        members = list(
+            Member.objects.filter(user__username__startswith=prefix, is_active=True, user__is_active=True)
+            .values_list('pk', 'user__username', 'role')
+        )
+        if not members:
+            raise CommandError(f"No seeded users for --seed {options['seed']}; run seed_benchmark first.")
+        member_ids = [pk for pk, _, _ in members]
+        admins = [username for _, username, role in members if role in ('leader', 'treasurer')]
+        if not admins:
+            raise CommandError('The seeded data set has no active leader or treasurer to post contributions.')
+        regular = [username for _, username, role in members if role not in ('leader', 'treasurer')] or admins
+
+        server = None
+        base_url = options['url']
+        if not base_url:
+            base_url = f"http://127.0.0.1:{options['port']}"
+            server = self._start_gunicorn(options)
+        try:
+            report = self._run_load(base_url, admins, regular, member_ids, options)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+        self._print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote report to {options['output']}"))
+
+    def _start_gunicorn(self, options):
+        cmd = [
+            sys.executable, '-m', 'gunicorn', 'nja_platform.wsgi',
+            '--bind', f"127.0.0.1:{options['port']}",
+            '--workers', str(options['workers']),
+            '--threads', str(options['threads']),
+            '--log-level', 'warning',
+        ]
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'nja_platform.settings'))
+        if 'DATABASE_URL' not in env and settings.DATABASES['default']['ENGINE'].endswith('sqlite3'):
+            env['DATABASE_URL'] = f"sqlite:///{settings.DATABASES['default']['NAME']}"
+        self.stdout.write(f"Starting: {' '.join(cmd[2:])}")
+        server = subprocess.Popen(cmd, cwd=settings.BASE_DIR, env=env)
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('gunicorn exited during startup.')
+            try:
+                with socket.create_connection(('127.0.0.1', options['port']), timeout=1):
+                    return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError('gunicorn did not start listening within 30 seconds.')
+
+    def _run_load(self, base_url, admins, regular, member_ids, options):
+        results = defaultdict(lambda: {'latencies': [], 'errors': 0, 'statuses': defaultdict(int)})
+        lock = threading.Lock()
+        login_failures = []
+        deadline = None
+        # Every user logs in before the clock starts so password hashing does not skew the mix
+        logins_done = threading.Barrier(options['concurrency'] + 1)
+        started = threading.Event()
+
+        def user_loop(index):
+            is_admin = index % 4 == 0  # one treasurer for every three members
+            pool = admins if is_admin else regular
+            logged_in = False
+            try:
+                user = VirtualUser(base_url, pool[index % len(pool)], is_admin, member_ids, options['timeout'])
+                logged_in = user.login()
+            except URLError:
+                pass
+            finally:
+                logins_done.wait()
+            if not logged_in:
+                with lock:
+                    login_failures.append(user.username)
+                return
+            started.wait()
+            endpoints = [(name, weight) for name, weight, admin_only in SCENARIO if is_admin or not admin_only]
+            names = [name for name, _ in endpoints]
+            weights = [weight for _, weight in endpoints]
+            while time.monotonic() < deadline:
+                endpoint = random.choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    status = user.run(endpoint)[0]
+                except (URLError, OSError):
+                    status = 0
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    entry = results[endpoint]
+                    entry['latencies'].append(elapsed)
+                    entry['statuses'][status] += 1
+                    if status == 0 or status >= 400:
+                        entry['errors'] += 1
+                if options['think_time']:
+                    time.sleep(options['think_time'])
+
+        threads = [threading.Thread(target=user_loop, args=(i,), daemon=True) for i in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        logins_done.wait()
+        deadline = time.monotonic() + options['duration']
+        wall_start = time.monotonic()
+        started.set()
+        for thread in threads:
+            thread.join()
+        wall_time = time.monotonic() - wall_start
+
+        endpoints = {}
+        total_requests = total_errors = 0
+        for name, entry in sorted(results.items()):
+            latencies = sorted(entry['latencies'])
+            total_requests += len(latencies)
+            total_errors += entry['errors']
+            endpoints[name] = {
+                'requests': len(latencies),
+                'errors': entry['errors'],
+                'error_rate': round(entry['errors'] / len(latencies), 4),
+                'rps': round(len(latencies) / wall_time, 2),
+                'p50_ms': round(percentile(latencies, 50), 1),
+                'p95_ms': round(percentile(latencies, 95), 1),
+                'p99_ms': round(percentile(latencies, 99), 1),
+                'max_ms': round(latencies[-1], 1),
+                'statuses': dict(entry['statuses']),
+            }
+        return {
+            'concurrency': options['concurrency'],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'duration_s': round(wall_time, 2),
+            'requests': total_requests,
+            'errors': total_errors,
+            'rps': round(total_requests / wall_time, 2) if wall_time else 0,
+            'login_failures': len(login_failures),
+            'endpoints': endpoints,
+        }
+
+    def _print_report(self, report):
+        self.stdout.write(
+            f"\n{report['requests']} requests in {report['duration_s']}s "
+            f"({report['rps']} req/s), {report['errors']} errors, "
+            f"{report['login_failures']} failed logins"
+        )
+        self.stdout.write(f"{'endpoint':24}{'reqs':>7}{'err%':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for name, stats in report['endpoints'].items():
+            self.stdout.write(
+                f"{name:24}{stats['requests']:>7}{stats['error_rate'] * 100:>6.1f}%{stats['rps']:>8}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+            )
@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.seeding import SEED_PASSWORD, seed_data
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate coherent synthetic data across every app for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=300, help='Number of members to create')
+        parser.add_argument('--years', type=int, default=1, help='Years of monthly history to generate')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Random seed; also prefixes usernames so several data sets can coexist',
+        )
+
+    def handle(self, *args, **options):
+        if options['members'] < 1 or options['years'] < 1:
+            raise CommandError('--members and --years must be at least 1.')
+        prefix = f"seed{options['seed']}_"
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Data for --seed {options['seed']} already exists; pick another seed.")
+
+        counts = seed_data(
+            members=options['members'], years=options['years'], seed=options['seed'], stdout=self.stdout,
+        )
+        for name, count in counts.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded data set {options['seed']}. Log in as {prefix}member0 (group leader) "
+            f"or {prefix}admin (staff) with password '{SEED_PASSWORD}'."
+        ))
@@ -3,26 +3,27 @@ Report generation utilities for exports
 """
 from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
-from django.contrib import messages
-from django.shortcuts import redirect
 from django.db.models import Sum, Count
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
-from contributions.models import Contribution, Withdrawal, TransactionLog
+from contributions import archive
+from contributions.models import Contribution, Withdrawal
 from loans.models import Loan
 from members.models import Member
+from members.decorators import admin_required
 from meetings.models import Meeting
+from monitoring.metrics import track_export
+from nja_platform.replica import use_replica
 
 
 @login_required
+@admin_required('Only administrators can export reports.', 'dashboard:index')
+@track_export('contributions')
+@use_replica
 def export_contributions_report(request):
     """Export contributions to Excel"""
-    # Check if user is admin
-    if not request.user.is_staff and not (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin()):
-        messages.error(request, 'Only administrators can export reports.')
-        return redirect('dashboard:index')
-    
-    contributions = Contribution.objects.all().order_by('-date')
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment
+
+    contributions = Contribution.objects.select_related('member', 'created_by').order_by('-date')
     
     wb = Workbook()
     ws = wb.active
@@ -61,14 +62,15 @@ def export_contributions_report(request):
 
 
 @login_required
+@admin_required('Only administrators can export reports.', 'dashboard:index')
+@track_export('members')
+@use_replica
 def export_members_report(request):
     """Export members to Excel"""
-    # Check if user is admin
-    if not request.user.is_staff and not (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin()):
-        messages.error(request, 'Only administrators can export reports.')
-        return redirect('dashboard:index')
-    
-    members = Member.objects.all().order_by('name')
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment
+
+    members = Member.objects.with_balances().order_by('name')
     
     wb = Workbook()
     ws = wb.active
@@ -91,8 +93,8 @@ def export_members_report(request):
             member.email,
             member.get_role_display(),
             member.date_joined.strftime('%Y-%m-%d'),
-            member.get_total_contributions(),
-            member.get_current_balance(),
+            member.total_contributions_amount,
+            member.current_balance,
             'Active' if member.is_active else 'Inactive'
         ])
     
@@ -105,14 +107,22 @@ def export_members_report(request):
 
 
 @login_required
+@admin_required('Only administrators can export reports.', 'dashboard:index')
+@track_export('transactions')
+@use_replica
 def export_transaction_logs(request):
     """Export transaction logs to Excel"""
-    # Check if user is admin
-    if not request.user.is_staff and not (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin()):
-        messages.error(request, 'Only administrators can export reports.')
-        return redirect('dashboard:index')
-    
-    logs = TransactionLog.objects.all().order_by('-created_at')
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment
+
+    filters = {}
+    if request.GET.get('member'):
+        filters['member_id'] = request.GET['member']
+    if request.GET.get('type'):
+        filters['transaction_type'] = request.GET['type']
+    logs = archive.with_related(
+        archive.transaction_logs(*archive.date_range(request.GET), **filters), 'member', 'created_by',
+    )
     
     wb = Workbook()
     ws = wb.active
@@ -0,0 +1,252 @@
+"""
+Synthetic data generation for performance tests and benchmarks
+"""
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from announcements.models import Announcement, CommunityUpdate
+from contributions.models import Contribution, Withdrawal, TransactionLog
+from gallery.models import MediaFile
+from loans.models import Loan, LoanInstallment, LoanRepayment
+from loans.schedule import schedule_for
+from meetings.models import Meeting, Attendance
+from members.models import Member, ROLE_CHOICES
+
+BATCH_SIZE = 1000
+SEED_PASSWORD = 'benchmark-pass'
+
+
+def _meeting_dates(years, today):
+    """First Saturday of each month for the last ``years`` years, oldest first."""
+    dates = []
+    for offset in range(years * 12 - 1, -1, -1):
+        month_index = today.year * 12 + today.month - 1 - offset
+        year, month = divmod(month_index, 12)
+        day = date(year, month + 1, 1)
+        day += timedelta(days=(5 - day.weekday()) % 7)
+        dates.append(day)
+    return dates
+
+
+@transaction.atomic
+def seed_data(members=300, years=1, seed=0, stdout=None):
+    """Bulk-create a coherent data set across every app.
+
+    Each active member gets a monthly regular contribution plus occasional
+    social contributions and lateness fees, a share of members request
+    withdrawals and loans (with repayments), and every monthly meeting has
+    attendance for all active members. Returns a dict of created row counts.
+    """
+    rng = random.Random(seed)
+    today = timezone.now().date()
+    meeting_days = _meeting_dates(years, today)
+    counts = {}
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    # Users and members (one shared password hash keeps seeding fast)
+    password = make_password(SEED_PASSWORD)
+    prefix = f'seed{seed}_'
+    admin_user, _ = User.objects.get_or_create(
+        username=f'{prefix}admin',
+        defaults={'is_staff': True, 'password': password, 'email': f'{prefix}admin@nja.local'},
+    )
+    users = User.objects.bulk_create(
+        [
+            User(username=f'{prefix}member{i}', password=password, email=f'{prefix}member{i}@nja.local')
+            for i in range(members)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    roles = [key for key, _ in ROLE_CHOICES]
+    member_rows = Member.objects.bulk_create(
+        [
+            Member(
+                user=user,
+                name=f'Member {seed}-{i}',
+                phone=f'+2376{seed % 10}{i:07d}',
+                email=user.email,
+                role=roles[i] if i < len(roles) else 'member',
+                is_active=rng.random() > 0.05,
+            )
+            for i, user in enumerate(users)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    active_members = [member for member in member_rows if member.is_active]
+    counts['members'] = len(member_rows)
+    log(f'Created {len(member_rows)} members')
+
+    # Contributions with matching transaction logs
+    contributions = []
+    for member in active_members:
+        for day in meeting_days:
+            contributions.append(Contribution(
+                member=member, amount=Decimal(rng.choice([5000, 10000, 15000, 20000])), date=day,
+                category=Contribution.CATEGORY_REGULAR, description='Monthly contribution', created_by=admin_user,
+            ))
+            if rng.random() < 0.3:
+                contributions.append(Contribution(
+                    member=member, amount=Decimal(2000), date=day,
+                    category=Contribution.CATEGORY_SOCIAL, description='Social fund', created_by=admin_user,
+                ))
+            if rng.random() < 0.1:
+                contributions.append(Contribution(
+                    member=member, amount=Decimal(500), date=day,
+                    category=Contribution.CATEGORY_LATENESS, description='Late arrival', created_by=admin_user,
+                ))
+    contributions = Contribution.objects.bulk_create(contributions, batch_size=BATCH_SIZE)
+    TransactionLog.objects.bulk_create(
+        [
+            TransactionLog(
+                transaction_type='contribution', member_id=c.member_id, amount=c.amount,
+                description=f'Contribution: {c.description}', created_by=admin_user, contribution=c,
+            )
+            for c in contributions
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    counts['contributions'] = len(contributions)
+    log(f'Created {len(contributions)} contributions')
+
+    # Withdrawals
+    withdrawals = []
+    for member in rng.sample(active_members, len(active_members) // 5):
+        withdrawals.append(Withdrawal(
+            member=member, amount=Decimal(rng.choice([5000, 10000, 25000])), date=rng.choice(meeting_days),
+            reason='Emergency expense', status=rng.choice(['pending', 'approved', 'approved', 'rejected']),
+            approved_by=admin_user, created_by=admin_user,
+        ))
+    withdrawals = Withdrawal.objects.bulk_create(withdrawals, batch_size=BATCH_SIZE)
+    TransactionLog.objects.bulk_create(
+        [
+            TransactionLog(
+                transaction_type='withdrawal', member_id=w.member_id, amount=w.amount,
+                description=f'Withdrawal request: {w.reason}', created_by=admin_user, withdrawal=w,
+            )
+            for w in withdrawals
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    counts['withdrawals'] = len(withdrawals)
+
+    # Loans with repayments
+    loans = []
+    for member in rng.sample(active_members, len(active_members) // 3):
+        requested = rng.choice(meeting_days)
+        status = rng.choice(['pending', 'active', 'active', 'completed', 'rejected'])
+        loans.append(Loan(
+            member=member, amount=Decimal(rng.choice([50000, 100000, 200000])),
+            interest_rate=Decimal('10.00'), purpose='Business stock', requested_date=requested,
+            approved_date=requested if status in ('active', 'completed') else None,
+            due_date=requested + timedelta(days=rng.choice([90, 180, 365])), status=status,
+            approved_by=admin_user if status != 'pending' else None, created_by=admin_user,
+        ))
+    loans = Loan.objects.bulk_create(loans, batch_size=BATCH_SIZE)
+    repayments = []
+    for loan in loans:
+        if loan.status not in ('active', 'completed'):
+            continue
+        installments = 4
+        total = loan.amount + loan.amount * loan.interest_rate / 100
+        paid_count = installments if loan.status == 'completed' else rng.randint(0, installments - 1)
+        for n in range(paid_count):
+            repayments.append(LoanRepayment(
+                loan=loan, amount=(total / installments).quantize(Decimal('0.01')),
+                payment_date=loan.requested_date + timedelta(days=30 * (n + 1)), status='completed',
+                notes=f'Installment {n + 1}', recorded_by=admin_user,
+            ))
+    repayments = LoanRepayment.objects.bulk_create(repayments, batch_size=BATCH_SIZE)
+    loan_repayments = {}
+    for repayment in repayments:
+        loan_repayments.setdefault(repayment.loan_id, []).append(repayment)
+    installments = LoanInstallment.objects.bulk_create(
+        [
+            installment
+            for loan in loans if loan.status in ('active', 'completed')
+            for installment in schedule_for(loan, loan_repayments.get(loan.pk, ()))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    TransactionLog.objects.bulk_create(
+        [TransactionLog(
+            transaction_type='loan_granted', member_id=loan.member_id, amount=loan.amount,
+            description=f'Loan request: {loan.purpose}', created_by=admin_user,
+        ) for loan in loans] + [TransactionLog(
+            transaction_type='loan_repayment', member_id=r.loan.member_id, amount=r.amount,
+            description=f'Loan repayment: {r.notes}', created_by=admin_user,
+        ) for r in repayments],
+        batch_size=BATCH_SIZE,
+    )
+    counts['loans'] = len(loans)
+    counts['repayments'] = len(repayments)
+    counts['installments'] = len(installments)
+    log(f'Created {len(loans)} loans with {len(repayments)} repayments')
+
+    # Meetings with attendance, plus a few upcoming meetings
+    tz = timezone.get_current_timezone()
+    meetings = [
+        Meeting(
+            title=f'Monthly meeting {day:%B %Y}', date=datetime.combine(day, time(15, 0), tzinfo=tz),
+            location='Community hall', agenda='Contributions, loans, any other business',
+            minutes='Meeting held as planned.' if day <= today else '', created_by=admin_user,
+            is_completed=day < today,
+        )
+        for day in meeting_days
+    ]
+    meetings += [
+        Meeting(
+            title=f'Upcoming meeting {n}', date=timezone.now() + timedelta(days=7 * n),
+            location='Community hall', agenda='Planning', created_by=admin_user,
+        )
+        for n in range(1, 4)
+    ]
+    meetings = Meeting.objects.bulk_create(meetings, batch_size=BATCH_SIZE)
+    attendance = [
+        Attendance(meeting=meeting, member=member, present=rng.random() < 0.85, recorded_by=admin_user)
+        for meeting in meetings if meeting.is_completed
+        for member in active_members
+    ]
+    Attendance.objects.bulk_create(attendance, batch_size=BATCH_SIZE)
+    counts['meetings'] = len(meetings)
+    counts['attendance'] = len(attendance)
+    log(f'Created {len(meetings)} meetings with {len(attendance)} attendance records')
+
+    # Announcements, community updates and media
+    now = timezone.now()
+    announcements = Announcement.objects.bulk_create([
+        Announcement(
+            title=f'Announcement {n}', content='Please read the latest group news.',
+            priority=rng.choice(['low', 'normal', 'high', 'urgent']), is_pinned=n % 10 == 0,
+            created_by=admin_user, expires_at=now - timedelta(days=1) if n % 7 == 0 else None,
+        )
+        for n in range(max(10, years * 24))
+    ], batch_size=BATCH_SIZE)
+    updates = CommunityUpdate.objects.bulk_create([
+        CommunityUpdate(
+            update_type=rng.choice(['savings_status', 'meeting_summary', 'general', 'reminder']),
+            title=f'Update {n}', content='Summary of recent group activity.', created_by=admin_user,
+            meeting=rng.choice(meetings),
+        )
+        for n in range(max(10, years * 12))
+    ], batch_size=BATCH_SIZE)
+    media = MediaFile.objects.bulk_create([
+        MediaFile(
+            title=f'Media {n}', media_type='image' if n % 4 else 'video',
+            file=f'gallery/seed/media_{n}.{"jpg" if n % 4 else "mp4"}', uploaded_by=admin_user, order=n,
+        )
+        for n in range(max(10, years * 20))
+    ], batch_size=BATCH_SIZE)
+    counts['announcements'] = len(announcements)
+    counts['community_updates'] = len(updates)
+    counts['media_files'] = len(media)
+
+    return counts
@@ -0,0 +1,283 @@
+"""
+Query-budget regression tests for every named URL in the project.
+
+Every page is rendered on a small seeded data set, then again after seeding ten
+times as many members (thousands of contributions, loans with repayments,
+meetings with attendance). It must run the same number of SQL queries both times,
+so a template or view change that reintroduces a query per row fails here, and
+stay within a fixed budget.
+"""
+import re
+from datetime import date
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.db.models import Sum
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from announcements.models import Announcement
+from contributions.models import Contribution, ImportJob, Withdrawal
+from gallery.models import MediaFile
+from loans.models import Loan, LoanInstallment
+from meetings.models import Meeting
+from members.models import Member
+from members.middleware import get_member_profile, user_is_group_admin
+from . import views
+from .benchmarks import HEAVY_MODULES, URL_KWARGS, import_profile, named_url_patterns, sample_url_kwargs
+from .seeding import seed_data
+
+# URL name -> maximum queries. Admin-site URLs are excluded.
+QUERY_BUDGETS = {
+    'dashboard:index': 19,
+    'dashboard:member': 13,
+    'dashboard:admin_management': 8,
+    'dashboard:export_contributions': 7,
+    'dashboard:export_members': 6,
+    'dashboard:export_transactions': 7,
+    'members:list': 7,
+    'members:detail': 6,
+    'members:create': 5,
+    'members:import': 5,
+    'members:edit': 6,
+    'members:register': 5,
+    'members:group_email': 6,
+    'contributions:list': 11,
+    'contributions:create': 6,
+    'contributions:meeting_grid': 8,
+    'contributions:account_balance': 13,
+    'contributions:yearly_statement': 12,
+    'contributions:withdrawal_list': 7,
+    'contributions:withdrawal_create': 6,
+    'contributions:withdrawal_approve': 14,
+    'contributions:transaction_logs': 9,
+    'contributions:import_list': 7,
+    'contributions:import_detail': 6,
+    'meetings:list': 8,
+    'meetings:detail': 11,
+    'meetings:create': 5,
+    'meetings:edit': 6,
+    'meetings:attendance': 8,
+    'announcements:list': 7,
+    'announcements:detail': 6,
+    'announcements:create': 5,
+    'announcements:edit': 6,
+    'announcements:feed': 7,
+    'announcements:update_create': 6,
+    'loans:list': 8,
+    'loans:detail': 10,
+    'loans:create': 6,
+    'loans:approve': 12,
+    'loans:repayment_create': 6,
+    'loans:repayment_create_loan': 11,
+    'loans:installments_due': 7,
+    'loans:liquidity': 12,
+    'gallery:gallery': 10,
+    'gallery:upload': 5,
+    'gallery:upload_media': 5,
+    'gallery:edit': 6,
+    'gallery:delete': 6,
+    'upload_media': 5,
+    'login': 5,
+    'logout': 5,
+    'metrics': 5,
+    'healthz': 5,
+    'readyz': 8,
+    'monitoring:query_stats': 5,
+    'monitoring:query_stats_json': 5,
+    'monitoring:query_stats_reset': 5,
+    'monitoring:slow_queries': 5,
+    'monitoring:slow_queries_reset': 5,
+    'monitoring:profile_list': 5,
+    'monitoring:profile_download': 5,
+}
+
+
+class QueryBudgetTests(TestCase):
+    """Every named URL runs as many queries on a large data set as on a small one, within its budget"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_data(members=30, years=1)
+        cls.user = User.objects.get(username='seed0_member0')  # group leader
+        cls.user.is_staff = True
+        cls.user.save(update_fields=['is_staff'])
+        ImportJob.objects.create(kind='contributions', file='imports/history.csv', created_by=cls.user)
+        cls.url_kwargs = sample_url_kwargs()
+
+    def render_all(self):
+        """{URL name: (status code, captured queries)} from a fresh session"""
+        client = self.client_class()
+        client.force_login(self.user)
+        results = {}
+        for name in QUERY_BUDGETS:
+            kwargs_key = URL_KWARGS.get(name)
+            url = reverse(name, kwargs=self.url_kwargs[kwargs_key] if kwargs_key else None)
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            results[name] = (response.status_code, queries.captured_queries)
+        return results
+
+    def test_every_named_url_has_a_budget(self):
+        missing = sorted(set(named_url_patterns()) - set(QUERY_BUDGETS))
+        self.assertEqual(missing, [], 'Add a query budget for these URLs')
+
+    def test_query_budgets(self):
+        small = self.render_all()
+        seed_data(members=300, years=1, seed=1)
+        large = self.render_all()
+        for name, budget in QUERY_BUDGETS.items():
+            status_code, queries = large[name]
+            with self.subTest(url=name):
+                self.assertLess(status_code, 500)
+                self.assertEqual(
+                    len(queries), len(small[name][1]),
+                    f'{name} ran {len(small[name][1])} queries on 30 members but {len(queries)} on 330:\n'
+                    + '\n'.join(query['sql'] for query in queries),
+                )
+                self.assertLessEqual(
+                    len(queries), budget,
+                    f'{name} ran {len(queries)} queries (budget {budget}):\n'
+                    + '\n'.join(query['sql'] for query in queries),
+                )
+
+
+class IndexUsageTests(TestCase):
+    """Hot filters are answered from the composite and partial indexes on seeded data"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_data(members=100, years=1)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, *index_names):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Seeded tables are small enough for a sequential scan to win on cost alone
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        self.assertTrue(
+            any(name in plan for name in index_names), f'none of {index_names} used:\n{plan}',
+        )
+
+    def test_member_statement(self):
+        member = Member.objects.first()
+        year = timezone.now().year
+        self.assertUsesIndex(
+            Contribution.objects.filter(member=member, date__year=year).order_by('-date'),
+            'contrib_member_date_idx',
+        )
+
+    def test_yearly_category_totals(self):
+        year = timezone.now().year
+        queryset = (
+            Contribution.objects.filter(date__range=(date(year, 1, 1), date(year, 12, 31)))
+            .values('category').annotate(total=Sum('amount')).order_by()
+        )
+        self.assertUsesIndex(queryset, 'contrib_date_cat_amount_idx')
+
+    def test_pending_queues(self):
+        # A bound 'pending' parameter cannot match a partial index on SQLite, the composite one serves it there
+        self.assertUsesIndex(
+            Withdrawal.objects.filter(status='pending'), 'withdrawal_pending_idx', 'withdrawal_status_date_idx',
+        )
+        self.assertUsesIndex(
+            Loan.objects.filter(status='pending').order_by('-requested_date'),
+            'loan_pending_idx', 'loan_status_requested_idx',
+        )
+
+    def test_withdrawal_list_ordering(self):
+        # ('-date', '-created_at') is read from the index instead of sorting the filtered rows
+        queryset = Withdrawal.objects.filter(status='approved')
+        self.assertUsesIndex(queryset, 'withdrawal_status_date_idx')
+        self.assertNotIn('TEMP B-TREE' if connection.vendor == 'sqlite' else 'Sort', queryset.explain())
+
+    def test_overdue_installments(self):
+        self.assertUsesIndex(LoanInstallment.objects.overdue(), 'installment_status_due_idx')
+
+    def test_upcoming_meetings(self):
+        self.assertUsesIndex(
+            Meeting.objects.filter(date__gte=timezone.now(), is_completed=False).order_by('date'),
+            'meeting_open_date_idx',
+        )
+
+    def test_active_announcements_and_media(self):
+        self.assertUsesIndex(Announcement.objects.filter(is_active=True), 'announcement_active_idx')
+        self.assertUsesIndex(
+            MediaFile.objects.filter(is_active=True, media_type='image').order_by('order'),
+            'media_active_type_order_idx',
+        )
+
+    def test_new_members_this_month(self):
+        month_start, next_month_start = views._month_bounds(timezone.now())
+        self.assertUsesIndex(
+            Member.objects.filter(date_joined__gte=month_start, date_joined__lt=next_month_start),
+            'member_date_joined_idx',
+        )
+
+
+CSRF_TOKEN_RE = re.compile(rb'name="csrfmiddlewaretoken" value="[^"]+"')
+
+
+class AsyncDashboardTests(TransactionTestCase):
+    """Async dashboards render the same pages as the sync views.
+
+    A TransactionTestCase, because the concurrent queries run on other threads'
+    connections and must see committed data.
+    """
+
+    def setUp(self):
+        seed_data(members=20, years=1)
+
+    async def _auser(self, user):
+        return user
+
+    def _request(self, username, path):
+        request = RequestFactory().get(path)
+        request.user = User.objects.select_related('member_profile').get(username=username)
+        request.auser = lambda: self._auser(request.user)
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        request.member = get_member_profile(request.user)
+        request.is_group_admin = user_is_group_admin(request.user, request.member)
+        return request
+
+    def test_async_views_match_sync_views(self):
+        pairs = [
+            (views.dashboard_index, views.dashboard_index_async, 'seed0_member0', '/'),
+            (views.admin_management, views.admin_management_async, 'seed0_member0', '/admin/'),
+            (views.member_dashboard, views.member_dashboard_async, 'seed0_member3', '/member/'),
+        ]
+        for sync_view, async_view, username, path in pairs:
+            with self.subTest(view=sync_view.__name__):
+                expected = sync_view(self._request(username, path))
+                response = async_to_sync(async_view)(self._request(username, path))
+                self.assertEqual(response.status_code, 200)
+                # The logout form's CSRF token is masked differently on every render
+                self.assertEqual(CSRF_TOKEN_RE.sub(b'', response.content), CSRF_TOKEN_RE.sub(b'', expected.content))
+
+    def test_async_admin_page_requires_admin(self):
+        request = self._request('seed0_member3', '/admin/')
+        response = async_to_sync(views.admin_management_async)(request)
+        self.assertEqual(response.status_code, 302)
+
+
+class LazyImportTests(SimpleTestCase):
+    """Heavy libraries stay out of startup; exports import them on demand"""
+
+    def _imported_heavy_modules(self, target):
+        packages = {module.split('.')[0] for module, _, _, _ in import_profile(target)}
+        return sorted(packages & set(HEAVY_MODULES))
+
+    def test_worker_startup(self):
+        self.assertEqual(self._imported_heavy_modules('wsgi'), [])
+
+    def test_manage_py_check(self):
+        # Django's ImageField system check itself imports Pillow to verify it is installed
+        self.assertEqual(self._imported_heavy_modules('check'), ['PIL'])
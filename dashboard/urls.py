@@ -1,13 +1,21 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 from . import reports
 
 app_name = 'dashboard'
 
+if settings.ASYNC_DASHBOARD:
+    index_view, member_view, admin_view = (
+        views.dashboard_index_async, views.member_dashboard_async, views.admin_management_async,
+    )
+else:
+    index_view, member_view, admin_view = views.dashboard_index, views.member_dashboard, views.admin_management
+
 urlpatterns = [
-    path('', views.dashboard_index, name='index'),
-    path('member/', views.member_dashboard, name='member'),
-    path('admin/', views.admin_management, name='admin_management'),
+    path('', index_view, name='index'),
+    path('member/', member_view, name='member'),
+    path('admin/', admin_view, name='admin_management'),
     path('reports/contributions/', reports.export_contributions_report, name='export_contributions'),
     path('reports/members/', reports.export_members_report, name='export_members'),
     path('reports/transactions/', reports.export_transaction_logs, name='export_transactions'),
@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -5,162 +6,171 @@ from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta
 from members.models import Member
+from members.decorators import admin_required
 from contributions.models import Contribution, Withdrawal, TransactionLog
 from meetings.models import Meeting, Attendance
 from loans.models import Loan
 from announcements.models import Announcement, CommunityUpdate
 from gallery.models import MediaFile
 
+from .concurrency import gather_queries
+
+
+def _month_bounds(now):
+    """Start of the current month and of the next one, in the current time zone"""
+    month_start = timezone.localtime(now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    next_month_start = (month_start + timedelta(days=32)).replace(day=1)
+    return month_start, next_month_start
+
+
+def _index_queries():
+    """Independent queries behind the main dashboard, keyed by context name"""
+    now = timezone.now()
+    month_start, next_month_start = _month_bounds(now)
+    active_loans = Loan.objects.filter(status__in=['approved', 'active'])
+    active_media = MediaFile.objects.filter(is_active=True)
+    return {
+        # Total savings/contributions
+        'total_contributions': lambda: Contribution.objects.aggregate(total=Sum('amount'))['total'] or 0,
+        'total_withdrawals': lambda: (
+            Withdrawal.objects.filter(status='approved').aggregate(total=Sum('amount'))['total'] or 0
+        ),
+        # Active loans
+        'total_loaned': lambda: active_loans.aggregate(total=Sum('amount'))['total'] or 0,
+        'active_loans_count': active_loans.count,
+        # Member stats
+        'total_members': Member.objects.filter(is_active=True).count,
+        # A range on date_joined can use its index; __month/__year extraction cannot
+        'new_members_this_month': Member.objects.filter(
+            date_joined__gte=month_start,
+            date_joined__lt=next_month_start,
+        ).count,
+        # Upcoming meetings
+        'upcoming_meetings': lambda: list(
+            Meeting.objects.filter(date__gte=now, is_completed=False).order_by('date')[:5]
+        ),
+        # Recent contributions
+        'recent_contributions': lambda: list(
+            Contribution.objects.select_related('member').order_by('-date', '-created_at')[:10]
+        ),
+        # Pending approvals
+        'pending_withdrawals': Withdrawal.objects.filter(status='pending').count,
+        'pending_loans': Loan.objects.filter(status='pending').count,
+        # Recent announcements
+        'recent_announcements': lambda: list(Announcement.objects.filter(is_active=True).order_by('-created_at')[:5]),
+        # Media gallery stats
+        'total_media': active_media.count,
+        'image_count': active_media.filter(media_type='image').count,
+        'video_count': active_media.filter(media_type='video').count,
+    }
+
+
+def _index_context(request, results):
+    context = {
+        'is_admin': request.is_group_admin,
+        'total_savings': results['total_contributions'] - results['total_withdrawals'],
+        'recent_transactions': TransactionLog.objects.order_by('-created_at')[:10],
+    }
+    context.update(results)
+    return context
+
 
 @login_required
 def dashboard_index(request):
     """Main dashboard view for admins"""
-    # Check if user is admin
-    is_admin = False
-    if request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin()):
-        is_admin = True
-    
-    # Total savings/contributions
-    total_contributions = Contribution.objects.aggregate(total=Sum('amount'))['total'] or 0
-    total_withdrawals = Withdrawal.objects.filter(status='approved').aggregate(total=Sum('amount'))['total'] or 0
-    total_savings = total_contributions - total_withdrawals
-    
-    # Active loans
-    active_loans = Loan.objects.filter(status__in=['approved', 'active'])
-    total_loaned = active_loans.aggregate(total=Sum('amount'))['total'] or 0
-    
-    # Member stats
-    total_members = Member.objects.filter(is_active=True).count()
-    new_members_this_month = Member.objects.filter(
-        date_joined__month=timezone.now().month,
-        date_joined__year=timezone.now().year
-    ).count()
-    
-    # Upcoming meetings
-    upcoming_meetings = Meeting.objects.filter(
-        date__gte=timezone.now(),
-        is_completed=False
-    ).order_by('date')[:5]
-    
-    # Recent contributions
-    recent_contributions = Contribution.objects.order_by('-date', '-created_at')[:10]
-    
-    # Pending approvals
-    pending_withdrawals = Withdrawal.objects.filter(status='pending').count()
-    pending_loans = Loan.objects.filter(status='pending').count()
-    
-    # Recent transactions
-    recent_transactions = TransactionLog.objects.order_by('-created_at')[:10]
-    
-    # Recent announcements
-    recent_announcements = Announcement.objects.filter(is_active=True).order_by('-created_at')[:5]
-    
-    # Media gallery stats
-    total_media = MediaFile.objects.filter(is_active=True).count()
-    image_count = MediaFile.objects.filter(is_active=True, media_type='image').count()
-    video_count = MediaFile.objects.filter(is_active=True, media_type='video').count()
-    
-    context = {
-        'is_admin': is_admin,
-        'total_savings': total_savings,
-        'total_contributions': total_contributions,
-        'total_withdrawals': total_withdrawals,
-        'total_loaned': total_loaned,
-        'total_members': total_members,
-        'new_members_this_month': new_members_this_month,
-        'upcoming_meetings': upcoming_meetings,
-        'recent_contributions': recent_contributions,
-        'pending_withdrawals': pending_withdrawals,
-        'pending_loans': pending_loans,
-        'recent_transactions': recent_transactions,
-        'recent_announcements': recent_announcements,
-        'active_loans_count': active_loans.count(),
-        'total_media': total_media,
-        'image_count': image_count,
-        'video_count': video_count,
+    results = {name: query() for name, query in _index_queries().items()}
+    return render(request, 'dashboard/index.html', _index_context(request, results))
+
+
+@login_required
+async def dashboard_index_async(request):
+    """Main dashboard view with its queries run concurrently"""
+    results = await gather_queries(_index_queries())
+    return await sync_to_async(render)(request, 'dashboard/index.html', _index_context(request, results))
+
+
+def _admin_queries():
+    """Independent queries behind the admin management page, keyed by context name"""
+    active_media = MediaFile.objects.filter(is_active=True)
+    return {
+        'total_members': Member.objects.filter(is_active=True).count,
+        'total_contributions': lambda: Contribution.objects.aggregate(total=Sum('amount'))['total'] or 0,
+        'total_withdrawals': lambda: (
+            Withdrawal.objects.filter(status='approved').aggregate(total=Sum('amount'))['total'] or 0
+        ),
+        'active_loans': Loan.objects.filter(status__in=['approved', 'active']).count,
+        'pending_withdrawals': Withdrawal.objects.filter(status='pending').count,
+        'pending_loans': Loan.objects.filter(status='pending').count,
+        'upcoming_meetings': Meeting.objects.filter(date__gte=timezone.now(), is_completed=False).count,
+        'total_media': active_media.count,
+        'image_count': active_media.filter(media_type='image').count,
+        'video_count': active_media.filter(media_type='video').count,
     }
-    return render(request, 'dashboard/index.html', context)
+
+
+def _admin_context(results):
+    return dict(results, total_savings=results['total_contributions'] - results['total_withdrawals'])
 
 
 @login_required
+@admin_required('Only administrators can access this page.', 'dashboard:index')
 def admin_management(request):
     """Comprehensive admin management page"""
-    # Check if user is admin
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can access this page.')
-        return redirect('dashboard:index')
-    
-    # Get statistics
-    total_members = Member.objects.filter(is_active=True).count()
-    total_contributions = Contribution.objects.aggregate(total=Sum('amount'))['total'] or 0
-    total_withdrawals = Withdrawal.objects.filter(status='approved').aggregate(total=Sum('amount'))['total'] or 0
-    total_savings = total_contributions - total_withdrawals
-    active_loans = Loan.objects.filter(status__in=['approved', 'active']).count()
-    pending_withdrawals = Withdrawal.objects.filter(status='pending').count()
-    pending_loans = Loan.objects.filter(status='pending').count()
-    upcoming_meetings = Meeting.objects.filter(date__gte=timezone.now(), is_completed=False).count()
-    total_media = MediaFile.objects.filter(is_active=True).count()
-    image_count = MediaFile.objects.filter(is_active=True, media_type='image').count()
-    video_count = MediaFile.objects.filter(is_active=True, media_type='video').count()
-    
-    context = {
-        'total_members': total_members,
-        'total_savings': total_savings,
-        'total_contributions': total_contributions,
-        'total_withdrawals': total_withdrawals,
-        'active_loans': active_loans,
-        'pending_withdrawals': pending_withdrawals,
-        'pending_loans': pending_loans,
-        'upcoming_meetings': upcoming_meetings,
-        'total_media': total_media,
-        'image_count': image_count,
-        'video_count': video_count,
+    results = {name: query() for name, query in _admin_queries().items()}
+    return render(request, 'dashboard/admin_management.html', _admin_context(results))
+
+
+@login_required
+@admin_required('Only administrators can access this page.', 'dashboard:index')
+async def admin_management_async(request):
+    """Admin management page with its queries run concurrently"""
+    results = await gather_queries(_admin_queries())
+    return await sync_to_async(render)(request, 'dashboard/admin_management.html', _admin_context(results))
+
+
+def _member_queries(member):
+    """Independent queries behind a member's dashboard, keyed by context name"""
+    member_loans = Loan.objects.filter(member=member)
+    return {
+        # Member's contributions
+        'total_contributions': member.get_total_contributions,
+        'balance': member.get_current_balance,
+        # Member's loans
+        'member_loans': lambda: list(member_loans[:5]),
+        'active_loans_count': member_loans.filter(status__in=['approved', 'active']).count,
+        # Upcoming meetings
+        'upcoming_meetings': lambda: list(
+            Meeting.objects.filter(date__gte=timezone.now(), is_completed=False).order_by('date')[:5]
+        ),
+        # Recent announcements
+        'recent_announcements': lambda: list(
+            Announcement.objects.filter(is_active=True, is_pinned=False).order_by('-created_at')[:5]
+        ),
+        'pinned_announcements': lambda: list(
+            Announcement.objects.filter(is_active=True, is_pinned=True).order_by('-created_at')
+        ),
     }
-    return render(request, 'dashboard/admin_management.html', context)
 
 
 @login_required
 def member_dashboard(request):
     """Dashboard view for regular members"""
-    if not hasattr(request.user, 'member_profile'):
+    member = request.member
+    if member is None:
         messages.error(request, 'Please complete your member profile.')
         return redirect('members:list')
-    
-    member = request.user.member_profile
-    
-    # Member's contributions
-    total_contributions = member.get_total_contributions()
-    balance = member.get_current_balance()
-    
-    # Member's loans
-    member_loans = Loan.objects.filter(member=member)
-    active_loans = member_loans.filter(status__in=['approved', 'active'])
-    
-    # Upcoming meetings
-    upcoming_meetings = Meeting.objects.filter(
-        date__gte=timezone.now(),
-        is_completed=False
-    ).order_by('date')[:5]
-    
-    # Recent announcements
-    recent_announcements = Announcement.objects.filter(
-        is_active=True,
-        is_pinned=False
-    ).order_by('-created_at')[:5]
-    
-    pinned_announcements = Announcement.objects.filter(
-        is_active=True,
-        is_pinned=True
-    ).order_by('-created_at')
-    
-    context = {
-        'member': member,
-        'total_contributions': total_contributions,
-        'balance': balance,
-        'member_loans': member_loans[:5],
-        'active_loans': active_loans,
-        'upcoming_meetings': upcoming_meetings,
-        'recent_announcements': recent_announcements,
-        'pinned_announcements': pinned_announcements,
-    }
-    return render(request, 'dashboard/member_dashboard.html', context)
+
+    results = {name: query() for name, query in _member_queries(member).items()}
+    return render(request, 'dashboard/member_dashboard.html', dict(results, member=member))
+
+
+@login_required
+async def member_dashboard_async(request):
+    """Dashboard view for regular members with its queries run concurrently"""
+    member = request.member
+    if member is None:
+        messages.error(request, 'Please complete your member profile.')
+        return redirect('members:list')
+
+    results = await gather_queries(_member_queries(member))
+    return await sync_to_async(render)(request, 'dashboard/member_dashboard.html', dict(results, member=member))
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mediafile',
+            index=models.Index(fields=['is_active', 'media_type', 'order'], name='media_active_type_order_idx'),
+        ),
+    ]
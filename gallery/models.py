@@ -28,6 +28,7 @@ class MediaFile(models.Model):
         indexes = [
             models.Index(fields=['-uploaded_at', 'media_type']),
             models.Index(fields=['is_active', 'order']),
+            models.Index(fields=['is_active', 'media_type', 'order'], name='media_active_type_order_idx'),
         ]
 
     def __str__(self):
@@ -5,8 +5,11 @@ from django.core.paginator import Paginator
 from django.db.models import Q
 from .models import MediaFile
 from .forms import MediaFileForm
+from members.decorators import admin_required
+from nja_platform.replica import use_replica
 
 
+@use_replica
 def gallery_view(request):
     """Public gallery view - accessible to all users"""
     media_files = MediaFile.objects.filter(is_active=True)
@@ -46,12 +49,9 @@ def gallery_view(request):
 
 
 @login_required
+@admin_required('Only administrators can upload media files.', 'gallery:gallery')
 def media_upload(request):
     """Upload media files - admin only"""
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can upload media files.')
-        return redirect('gallery:gallery')
-    
     if request.method == 'POST':
         form = MediaFileForm(request.POST, request.FILES)
         if form.is_valid():
@@ -67,14 +67,11 @@ def media_upload(request):
 
 
 @login_required
+@admin_required('Only administrators can edit media files.', 'gallery:gallery')
 def media_edit(request, pk):
     """Edit media file - admin only"""
     media_file = get_object_or_404(MediaFile, pk=pk)
     
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can edit media files.')
-        return redirect('gallery:gallery')
-    
     if request.method == 'POST':
         form = MediaFileForm(request.POST, request.FILES, instance=media_file)
         if form.is_valid():
@@ -88,14 +85,11 @@ def media_edit(request, pk):
 
 
 @login_required
+@admin_required('Only administrators can delete media files.', 'gallery:gallery')
 def media_delete(request, pk):
     """Delete media file - admin only"""
     media_file = get_object_or_404(MediaFile, pk=pk)
     
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can delete media files.')
-        return redirect('gallery:gallery')
-    
     if request.method == 'POST':
         media_file.delete()
         messages.success(request, 'Media file deleted successfully!')
@@ -0,0 +1,73 @@
+"""
+gunicorn settings, picked up automatically when gunicorn starts from the project root.
+
+The master preloads the app, applies migrations only when some are pending and
+warms URL resolvers and compiled templates before forking, so workers boot fast
+and share that memory copy-on-write. Set NJA_PRELOAD, NJA_MIGRATE_ON_START or
+NJA_WARM_UP to False to turn a step off. Code changes need a full restart (not
+HUP) while the app is preloaded.
+"""
+import glob
+import os
+import tempfile
+
+
+def _env_flag(name, default='True'):
+    return os.environ.get(name, default).lower() in ('true', '1', 'yes')
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'nja_platform.settings')
+
+preload_app = _env_flag('NJA_PRELOAD')
+
+# Prometheus multiprocess mode: every worker writes its samples to files in this
+# directory and /metrics merges them. The variable has to be set before the app
+# is imported, and stale files from a previous run are removed so they are not merged in.
+if _env_flag('NJA_METRICS', 'False'):
+    metrics_dir = os.environ.setdefault(
+        'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'nja-prometheus'),
+    )
+    os.makedirs(metrics_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(stale)
+
+    # Imported here rather than in the hook, which runs inside a signal handler
+    from prometheus_client import multiprocess
+
+    def child_exit(server, worker):
+        """Drop the live gauges of a worker that exited"""
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def on_starting(server):
+    """Migrate if needed and warm shared state in the master, before workers fork"""
+    import django
+    django.setup()
+    from nja_platform import startup
+
+    if _env_flag('NJA_MIGRATE_ON_START'):
+        try:
+            applied = startup.migrate_if_needed()
+        except Exception:
+            server.log.exception('WARNING: Migrations failed at startup')
+        else:
+            if applied:
+                server.log.info('Applied %d pending migrations', len(applied))
+            else:
+                server.log.info('Migrations already applied, skipped migrate')
+    if _env_flag('NJA_WARM_UP'):
+        try:
+            server.log.info('Warm-up: %d templates compiled', startup.warm_up())
+        except Exception:
+            server.log.exception('WARNING: Warm-up failed')
+    startup.close_database_connections()
+
+
+def post_worker_init(worker):
+    """Connect to the database before the first request arrives"""
+    from nja_platform.startup import check_database_connections
+
+    try:
+        check_database_connections()
+    except Exception:
+        worker.log.exception('Could not connect to the database')
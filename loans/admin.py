@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import Loan, LoanRepayment
+from .models import Loan, LoanInstallment, LoanRepayment
+
+
+class LoanInstallmentInline(admin.TabularInline):
+    model = LoanInstallment
+    extra = 0
+    readonly_fields = ['number', 'due_date', 'principal', 'interest', 'amount_paid', 'status', 'paid_date']
+    can_delete = False
 
 
 class LoanRepaymentInline(admin.TabularInline):
@@ -15,7 +22,7 @@ class LoanAdmin(admin.ModelAdmin):
     search_fields = ['member__name', 'purpose', 'notes']
     readonly_fields = ['created_at', 'updated_at', 'created_by', 'approved_by', 'approved_date']
     date_hierarchy = 'requested_date'
-    inlines = [LoanRepaymentInline]
+    inlines = [LoanInstallmentInline, LoanRepaymentInline]
 
 
 @admin.register(LoanRepayment)
@@ -43,6 +43,13 @@ class LoanApprovalForm(forms.ModelForm):
             'notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
 
+    def clean_status(self):
+        status = self.cleaned_data.get('status')
+        # The instance still holds the stored status here; approving again would rebuild a paid-into schedule
+        if status == 'approved' and self.instance.status != 'pending':
+            raise forms.ValidationError('Only pending loans can be approved.')
+        return status
+
 
 class LoanRepaymentForm(forms.ModelForm):
     """Form for recording loan repayments"""
@@ -60,9 +67,9 @@ class LoanRepaymentForm(forms.ModelForm):
         loan = kwargs.pop('loan', None)
         super().__init__(*args, **kwargs)
         if loan:
-            self.fields['loan'].queryset = Loan.objects.filter(pk=loan.pk)
+            self.fields['loan'].queryset = Loan.objects.filter(pk=loan.pk).select_related('member')
         else:
-            self.fields['loan'].queryset = Loan.objects.filter(status__in=['approved', 'active'])
+            self.fields['loan'].queryset = Loan.objects.filter(status__in=['approved', 'active']).select_related('member')
 
     def clean_amount(self):
         amount = self.cleaned_data.get('amount')
@@ -0,0 +1,152 @@
+"""
+Pool liquidity and loan eligibility, from a few grouped queries.
+
+The pool's cash is what members saved (contributions less approved withdrawals)
+less the principal paid out as loans, plus the repayments received. Expected
+inflows come from the unpaid installments of live loans, grouped by due date.
+A member may borrow up to LOAN_ELIGIBILITY_MULTIPLIER times their savings, less
+what they still owe on live and defaulted loans; members with late installments or a defaulted loan may not
+borrow when LOAN_ELIGIBILITY_BLOCK_ARREARS is on.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.utils import timezone
+
+from contributions.models import Contribution, Withdrawal
+from members.models import Member
+from .models import LIVE_STATUSES, LoanInstallment, LoanRepayment, Loan
+from .schedule import CENT, SCHEDULED_STATUSES
+
+ZERO = Decimal('0.00')
+
+INSTALLMENT_BALANCE = ExpressionWrapper(
+    F('principal') + F('interest') - F('amount_paid'), output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+
+
+def _money(value):
+    # SQLite sums decimal expressions as floats
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def _sum_by(queryset, field):
+    """{field value: Sum('amount')} in one grouped query"""
+    return {
+        key: _money(total) for key, total in queryset.order_by().values_list(field).annotate(total=Sum('amount'))
+    }
+
+
+class PoolPosition:
+    """Cash in the pool now, and what pending requests would take out of it"""
+
+    def __init__(self):
+        withdrawals = _sum_by(Withdrawal.objects.filter(status__in=['approved', 'pending']), 'status')
+        loans = _sum_by(Loan.objects.filter(status__in=[*SCHEDULED_STATUSES, 'pending']), 'status')
+        self.contributions = _money(Contribution.objects.aggregate(total=Sum('amount'))['total'])
+        self.withdrawals = withdrawals.get('approved') or ZERO
+        self.loans_disbursed = sum((loans.get(status) or ZERO for status in SCHEDULED_STATUSES), ZERO)
+        repayments = LoanRepayment.objects.filter(status='completed').aggregate(total=Sum('amount'))
+        self.repayments = _money(repayments['total'])
+        self.pending_withdrawals = withdrawals.get('pending') or ZERO
+        self.pending_loans = loans.get('pending') or ZERO
+
+    @property
+    def savings(self):
+        return self.contributions - self.withdrawals
+
+    @property
+    def cash(self):
+        return self.savings - self.loans_disbursed + self.repayments
+
+    @property
+    def cash_after_pending(self):
+        return self.cash - self.pending_withdrawals - self.pending_loans
+
+
+class CashProjection:
+    """Expected repayments per week from the installments still owed, and the cash they bring the pool to"""
+
+    def __init__(self, opening_cash, weeks=None, today=None):
+        self.today = today or timezone.localdate()
+        week_start = self.today - timedelta(days=self.today.weekday())
+        weeks = weeks or settings.LIQUIDITY_PROJECTION_WEEKS
+        due_by_date = (
+            LoanInstallment.objects.unpaid().filter(loan__status__in=LIVE_STATUSES)
+            .order_by().values_list('due_date').annotate(due=Sum(INSTALLMENT_BALANCE))
+        )
+
+        self.arrears = ZERO
+        self.later = ZERO
+        expected = [ZERO] * weeks
+        for due_date, due in due_by_date:
+            due = _money(due)
+            if due_date < self.today:
+                self.arrears += due
+                continue
+            week = (due_date - week_start).days // 7
+            if week < weeks:
+                expected[week] += due
+            else:
+                self.later += due
+
+        self.weeks = []
+        cash = opening_cash
+        for week, inflow in enumerate(expected):
+            cash += inflow
+            start = week_start + timedelta(weeks=week)
+            self.weeks.append({'start': start, 'end': start + timedelta(days=6), 'expected': inflow, 'cash': cash})
+
+    @property
+    def outstanding(self):
+        return self.arrears + sum((week['expected'] for week in self.weeks), ZERO) + self.later
+
+
+class MemberEligibility:
+    """Savings, debt, repayment record and borrowing limit of one member"""
+
+    def __init__(self, member, stats):
+        self.member = member
+        self.savings = member.current_balance
+        self.outstanding = _money(stats.get('outstanding'))
+        self.paid_on_time = stats.get('paid_on_time', 0)
+        self.paid_late = stats.get('paid_late', 0)
+        self.overdue = stats.get('overdue', 0)
+        self.defaulted_loans = stats.get('defaulted_loans', 0)
+
+        self.reason = ''
+        if settings.LOAN_ELIGIBILITY_BLOCK_ARREARS and self.defaulted_loans:
+            self.reason = 'Has a defaulted loan'
+        elif settings.LOAN_ELIGIBILITY_BLOCK_ARREARS and self.overdue:
+            self.reason = 'Has late installments'
+        limit = self.savings * Decimal(str(settings.LOAN_ELIGIBILITY_MULTIPLIER)) - self.outstanding
+        self.max_eligible = max(limit.quantize(CENT), ZERO) if not self.reason else ZERO
+        if not self.reason and not self.max_eligible:
+            self.reason = 'Savings do not cover more borrowing'
+
+    def allows(self, amount):
+        return amount <= self.max_eligible
+
+
+def member_eligibility(members=None, today=None):
+    """MemberEligibility of each member (active ones by default), ordered by name, in two queries"""
+    today = today or timezone.localdate()
+    members = Member.objects.filter(is_active=True) if members is None else members
+    members = list(members.with_balances().order_by('name'))
+    live = Q(loan__status__in=LIVE_STATUSES)
+    # A defaulted loan is still owed, even when it does not block borrowing
+    owed = Q(loan__status__in=(*LIVE_STATUSES, 'defaulted'))
+    stats = {
+        row.pop('loan__member'): row
+        for row in LoanInstallment.objects.filter(loan__member__in=[member.pk for member in members])
+        .order_by().values('loan__member').annotate(
+            outstanding=Sum(INSTALLMENT_BALANCE, filter=owed),
+            paid_on_time=Count('pk', filter=Q(status='paid', paid_date__lte=F('due_date'))),
+            paid_late=Count('pk', filter=Q(status='paid', paid_date__gt=F('due_date'))),
+            overdue=Count('pk', filter=live & Q(status__in=LoanInstallment.UNPAID_STATUSES, due_date__lt=today)),
+            defaulted_loans=Count('loan', distinct=True, filter=Q(loan__status='defaulted')),
+        )
+    }
+    return [MemberEligibility(member, stats.get(member.pk, {})) for member in members]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0001_initial'),
+        ('members', '0002_member_member_date_joined_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['status', '-requested_date'], name='loan_status_requested_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-requested_date'], name='loan_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0002_loan_loan_status_requested_idx_loan_loan_pending_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanInstallment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField()),
+                ('due_date', models.DateField()),
+                ('principal', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('interest', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('amount_paid', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('status', models.CharField(choices=[('due', 'Due'), ('partial', 'Partially Paid'), ('paid', 'Paid')], default='due', max_length=20)),
+                ('paid_date', models.DateField(blank=True, null=True)),
+                ('loan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='loans.loan')),
+            ],
+            options={
+                'ordering': ['loan', 'number'],
+                'indexes': [models.Index(fields=['status', 'due_date'], name='installment_status_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('loan', 'number'), name='installment_loan_number_uniq')],
+            },
+        ),
+    ]
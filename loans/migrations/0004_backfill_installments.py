@@ -0,0 +1,100 @@
+import calendar
+from datetime import date
+from decimal import ROUND_DOWN, Decimal
+
+from django.db import migrations
+
+# Frozen copies of loans.schedule as it was when this migration was written, so later
+# changes to the live module cannot change what the backfill does
+CENT = Decimal('0.01')
+SCHEDULED_STATUSES = ('approved', 'active', 'completed', 'defaulted')
+
+
+def add_months(day, months):
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def split(total, parts):
+    share = (total / parts).quantize(CENT, rounding=ROUND_DOWN)
+    return [share] * (parts - 1) + [total - share * (parts - 1)]
+
+
+def installment_plan(amount, interest_rate, start, due_date):
+    """[(number, due date, principal, interest)] of monthly installments from ``start`` to ``due_date``"""
+    due_dates = []
+    months = 1
+    while add_months(start, months) < due_date:
+        due_dates.append(add_months(start, months))
+        months += 1
+    due_dates.append(due_date)
+    interest = (Decimal(amount) * Decimal(interest_rate) / 100).quantize(CENT)
+    return [
+        (number, day, principal, interest_share)
+        for number, (day, principal, interest_share) in enumerate(
+            zip(due_dates, split(Decimal(amount), len(due_dates)), split(interest, len(due_dates))), start=1,
+        )
+    ]
+
+
+def allocate(installments, amount, payment_date):
+    """Pay ``amount`` into the installments oldest first"""
+    for installment in installments:
+        if amount <= 0:
+            break
+        outstanding = installment.principal + installment.interest - installment.amount_paid
+        if installment.status == 'paid' or outstanding <= 0:
+            continue
+        paid = min(amount, outstanding)
+        installment.amount_paid += paid
+        amount -= paid
+        if paid == outstanding:
+            installment.status = 'paid'
+            installment.paid_date = payment_date
+        else:
+            installment.status = 'partial'
+
+
+def backfill_installments(apps, schema_editor):
+    """Give loans paid out before schedules existed their installments, with repayments allocated"""
+    Loan = apps.get_model('loans', 'Loan')
+    LoanInstallment = apps.get_model('loans', 'LoanInstallment')
+    LoanRepayment = apps.get_model('loans', 'LoanRepayment')
+
+    repayments = {}
+    for repayment in LoanRepayment.objects.filter(status='completed').order_by('payment_date', 'pk').iterator():
+        repayments.setdefault(repayment.loan_id, []).append(repayment)
+
+    batch = []
+    for loan in Loan.objects.filter(status__in=SCHEDULED_STATUSES, installments__isnull=True).iterator():
+        installments = [
+            LoanInstallment(loan=loan, number=number, due_date=day, principal=principal, interest=interest,
+                            amount_paid=0, status='due')
+            for number, day, principal, interest in installment_plan(
+                loan.amount, loan.interest_rate, loan.approved_date or loan.requested_date, loan.due_date,
+            )
+        ]
+        for repayment in repayments.get(loan.pk, ()):
+            allocate(installments, repayment.amount, repayment.payment_date)
+        if loan.status == 'completed':
+            for installment in installments:
+                if installment.status != 'paid':
+                    installment.amount_paid = installment.principal + installment.interest
+                    installment.status = 'paid'
+        batch.extend(installments)
+        if len(batch) >= 1000:
+            LoanInstallment.objects.bulk_create(batch)
+            batch = []
+    LoanInstallment.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0003_loaninstallment'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_installments, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,20 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
 from members.models import Member
 
+# Loans whose installments are still being collected
+LIVE_STATUSES = ('approved', 'active')
+
+
+class LoanQuerySet(models.QuerySet):
+    def with_overdue(self, as_of=None):
+        """Annotate ``has_overdue_installment`` in the same query, for ``is_overdue()`` on lists"""
+        return self.annotate(
+            has_overdue_installment=Exists(LoanInstallment.objects.overdue(as_of).filter(loan=OuterRef('pk'))),
+        )
+
 
 class Loan(models.Model):
     """Loan model for members borrowing from pooled savings"""
@@ -28,11 +41,17 @@ class Loan(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     notes = models.TextField(blank=True)
 
+    objects = LoanQuerySet.as_manager()
+
     class Meta:
         ordering = ['-requested_date', '-created_at']
         indexes = [
             models.Index(fields=['-requested_date']),
             models.Index(fields=['member', 'status']),
+            models.Index(fields=['status', '-requested_date'], name='loan_status_requested_idx'),
+            models.Index(
+                fields=['-requested_date'], name='loan_pending_idx', condition=models.Q(status='pending'),
+            ),
         ]
 
     def __str__(self):
@@ -55,11 +74,12 @@ class Loan(models.Model):
         return self.get_total_amount() - self.get_paid_amount()
 
     def is_overdue(self):
-        """Check if loan is overdue"""
-        from django.utils import timezone
-        if self.status == 'active' and self.due_date < timezone.now().date():
-            return True
-        return False
+        """Check if an installment of the loan is past due and unpaid"""
+        if self.status not in LIVE_STATUSES:
+            return False
+        if hasattr(self, 'has_overdue_installment'):
+            return self.has_overdue_installment
+        return self.installments.overdue().exists()
 
 
 class LoanRepayment(models.Model):
@@ -89,3 +109,60 @@ class LoanRepayment(models.Model):
     def __str__(self):
         return f"Repayment for {self.loan} - {self.amount} ({self.status})"
 
+
+class LoanInstallmentQuerySet(models.QuerySet):
+    def unpaid(self):
+        return self.filter(status__in=LoanInstallment.UNPAID_STATUSES)
+
+    def due_before(self, day):
+        """Unpaid installments of live loans due before ``day``, late ones included"""
+        return self.unpaid().filter(due_date__lt=day, loan__status__in=LIVE_STATUSES)
+
+    def overdue(self, as_of=None):
+        """Unpaid installments of live loans that fell due before ``as_of`` (today)"""
+        return self.due_before(as_of or timezone.localdate())
+
+
+class LoanInstallment(models.Model):
+    """One scheduled installment of a loan; see loans/schedule.py"""
+    STATUS_CHOICES = [
+        ('due', 'Due'),
+        ('partial', 'Partially Paid'),
+        ('paid', 'Paid'),
+    ]
+    UNPAID_STATUSES = ('due', 'partial')
+
+    loan = models.ForeignKey(Loan, on_delete=models.CASCADE, related_name='installments')
+    number = models.PositiveSmallIntegerField()
+    due_date = models.DateField()
+    principal = models.DecimalField(max_digits=10, decimal_places=2)
+    interest = models.DecimalField(max_digits=10, decimal_places=2)
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='due')
+    paid_date = models.DateField(null=True, blank=True)
+
+    objects = LoanInstallmentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['loan', 'number']
+        constraints = [
+            models.UniqueConstraint(fields=['loan', 'number'], name='installment_loan_number_uniq'),
+        ]
+        indexes = [
+            # Overdue and due-this-week lists: unpaid statuses, then a due date range
+            models.Index(fields=['status', 'due_date'], name='installment_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.loan} - installment {self.number} due {self.due_date} ({self.status})"
+
+    @property
+    def amount_due(self):
+        return self.principal + self.interest
+
+    @property
+    def balance(self):
+        return self.amount_due - self.amount_paid
+
+    def is_overdue(self, as_of=None):
+        return self.status in self.UNPAID_STATUSES and self.due_date < (as_of or timezone.localdate())
@@ -0,0 +1,110 @@
+"""
+Installment schedules of loans.
+
+A loan is repaid in monthly installments from its approval (or request) date up to
+its due date, the last installment falling on the due date itself. Principal and
+the flat interest of ``Loan.get_total_amount()`` are spread evenly, with the rounding
+cents on the last installment. Repayments pay installments oldest first.
+"""
+import calendar
+from datetime import date
+from decimal import ROUND_DOWN, Decimal
+
+from django.db import transaction
+
+from .models import LoanInstallment
+
+CENT = Decimal('0.01')
+# Loans that have been paid out and so have a schedule
+SCHEDULED_STATUSES = ('approved', 'active', 'completed', 'defaulted')
+
+
+def add_months(day, months):
+    """The same day ``months`` later, or the last day of that month if it is shorter"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _split(total, parts):
+    share = (total / parts).quantize(CENT, rounding=ROUND_DOWN)
+    return [share] * (parts - 1) + [total - share * (parts - 1)]
+
+
+def installment_plan(amount, interest_rate, start, due_date):
+    """[(number, due date, principal, interest)] of monthly installments from ``start`` to ``due_date``"""
+    due_dates = []
+    months = 1
+    while add_months(start, months) < due_date:
+        due_dates.append(add_months(start, months))
+        months += 1
+    due_dates.append(due_date)
+    interest = (Decimal(amount) * Decimal(interest_rate) / 100).quantize(CENT)
+    return [
+        (number, day, principal, interest_share)
+        for number, (day, principal, interest_share) in enumerate(
+            zip(due_dates, _split(Decimal(amount), len(due_dates)), _split(interest, len(due_dates))), start=1,
+        )
+    ]
+
+
+def allocate(installments, amount, payment_date):
+    """Pay ``amount`` into the installments oldest first. Returns (changed installments, unallocated rest).
+
+    Works on any objects with the installment fields, so migrations can use it too.
+    """
+    changed = []
+    for installment in installments:
+        if amount <= 0:
+            break
+        outstanding = installment.principal + installment.interest - installment.amount_paid
+        if installment.status == 'paid' or outstanding <= 0:
+            continue
+        paid = min(amount, outstanding)
+        installment.amount_paid += paid
+        amount -= paid
+        if paid == outstanding:
+            installment.status = 'paid'
+            installment.paid_date = payment_date
+        else:
+            installment.status = 'partial'
+        changed.append(installment)
+    return changed, amount
+
+
+def schedule_for(loan, repayments=()):
+    """Unsaved installments of a loan with its completed ``repayments`` already allocated.
+
+    A completed loan's installments are all paid, even when its repayments were not recorded.
+    """
+    installments = [
+        LoanInstallment(loan=loan, number=number, due_date=day, principal=principal, interest=interest)
+        for number, day, principal, interest in installment_plan(
+            loan.amount, loan.interest_rate, loan.approved_date or loan.requested_date, loan.due_date,
+        )
+    ]
+    for repayment in repayments:
+        allocate(installments, repayment.amount, repayment.payment_date)
+    if loan.status == 'completed':
+        for installment in installments:
+            if installment.status != 'paid':
+                installment.amount_paid = installment.principal + installment.interest
+                installment.status = 'paid'
+    return installments
+
+
+def create_schedule(loan):
+    """Replace the loan's installments with a fresh schedule, keeping its completed repayments"""
+    repayments = loan.repayments.filter(status='completed').order_by('payment_date', 'pk')
+    with transaction.atomic():
+        loan.installments.all().delete()
+        return LoanInstallment.objects.bulk_create(schedule_for(loan, repayments))
+
+
+def allocate_repayment(repayment):
+    """Pay a completed repayment into its loan's unpaid installments. Returns the unallocated rest."""
+    with transaction.atomic():
+        installments = list(repayment.loan.installments.unpaid().order_by('number'))
+        changed, rest = allocate(installments, repayment.amount, repayment.payment_date)
+        LoanInstallment.objects.bulk_update(changed, ['amount_paid', 'status', 'paid_date'])
+    return rest
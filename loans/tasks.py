@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from scheduler.registry import periodic_task
+from .models import LIVE_STATUSES, Loan, LoanInstallment
+
+
+@periodic_task(every=timedelta(hours=1))
+def mark_defaulted_loans():
+    """Live loans with an installment unpaid LOAN_DEFAULT_GRACE_DAYS past its due date become defaulted"""
+    cutoff = timezone.localdate() - timedelta(days=settings.LOAN_DEFAULT_GRACE_DAYS)
+    late = LoanInstallment.objects.unpaid().filter(loan=OuterRef('pk'), due_date__lt=cutoff)
+    return Loan.objects.filter(Exists(late), status__in=LIVE_STATUSES).update(
+        status='defaulted', updated_at=timezone.now(),
+    )
@@ -0,0 +1,201 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from contributions.models import Contribution, TransactionLog, Withdrawal
+from members.models import Member
+from .forms import LoanRepaymentForm
+from .liquidity import CashProjection, PoolPosition, member_eligibility
+from .models import Loan, LoanInstallment
+from .schedule import add_months, create_schedule, installment_plan
+
+
+class LoanScheduleTests(TestCase):
+    """Approved loans get installments, repayments pay them oldest first, and lateness is one query"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('loan-admin', password='x', is_staff=True)
+        cls.member = Member.objects.create(name='Borrower')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_installment_plan(self):
+        self.assertEqual(add_months(date(2024, 1, 31), 1), date(2024, 2, 29))
+        plan = installment_plan(Decimal('1000'), Decimal('5'), date(2024, 1, 31), date(2024, 4, 15))
+        self.assertEqual([day for _, day, _, _ in plan], [date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 15)])
+        self.assertEqual([principal for _, _, principal, _ in plan], [Decimal('333.33')] * 2 + [Decimal('333.34')])
+        self.assertEqual(sum(principal + interest for _, _, principal, interest in plan), Decimal('1050.00'))
+
+    def test_approval_creates_schedule(self):
+        today = timezone.localdate()
+        loan = Loan.objects.create(
+            member=self.member, amount=Decimal('900'), interest_rate=Decimal('10'), purpose='Stock',
+            requested_date=today, due_date=add_months(today, 3),
+        )
+        self.client.post(reverse('loans:approve', kwargs={'pk': loan.pk}), {'status': 'approved', 'notes': ''})
+        installments = list(loan.installments.all())
+        self.assertEqual([i.due_date for i in installments], [add_months(today, n) for n in (1, 2, 3)])
+        self.assertEqual(sum(i.amount_due for i in installments), Decimal('990.00'))
+
+    def test_approval_happens_once_and_with_its_schedule(self):
+        today = timezone.localdate()
+        loan = Loan.objects.create(
+            member=self.member, amount=Decimal('900'), interest_rate=Decimal('10'), purpose='Stock',
+            requested_date=today, due_date=add_months(today, 3),
+        )
+        url = reverse('loans:approve', kwargs={'pk': loan.pk})
+        with patch('loans.views.create_schedule', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            self.client.post(url, {'status': 'approved', 'notes': ''})
+        loan.refresh_from_db()
+        self.assertEqual((loan.status, loan.approved_by), ('pending', None))
+
+        self.client.post(url, {'status': 'approved', 'notes': ''})
+        first = loan.installments.order_by('number').first()
+        LoanInstallment.objects.filter(pk=first.pk).update(amount_paid=first.amount_due, status='paid')
+
+        response = self.client.post(url, {'status': 'approved', 'notes': ''})
+        self.assertContains(response, 'Only pending loans can be approved.')
+        self.assertEqual(loan.installments.get(number=1).status, 'paid')
+
+    def test_repayments_and_overdue(self):
+        today = timezone.localdate()
+        loan = Loan.objects.create(
+            member=self.member, amount=Decimal('900'), interest_rate=Decimal('10'), purpose='Stock', status='active',
+            requested_date=add_months(today, -3), approved_date=add_months(today, -3), due_date=today + timedelta(days=3),
+        )
+        create_schedule(loan)
+
+        self.client.post(
+            reverse('loans:repayment_create_loan', kwargs={'loan_id': loan.pk}),
+            {'loan': loan.pk, 'amount': '400', 'payment_date': today.isoformat(), 'notes': ''},
+        )
+        self.assertEqual(
+            list(loan.installments.values_list('status', 'amount_paid')),
+            [
+                ('paid', Decimal('247.50')), ('partial', Decimal('152.50')),
+                ('due', Decimal('0.00')), ('due', Decimal('0.00')),
+            ],
+        )
+
+        with self.assertNumQueries(1):
+            late = list(LoanInstallment.objects.overdue().select_related('loan__member'))
+        self.assertEqual([(i.number, i.loan.member.name) for i in late], [(2, 'Borrower')])
+        self.assertTrue(Loan.objects.with_overdue().get(pk=loan.pk).is_overdue())
+
+        response = self.client.get(reverse('loans:installments_due'))
+        self.assertContains(response, 'Late')
+        due = [i.number for i in response.context['page_obj']]
+        # The third falls due today; the last one in three days, which may be next week
+        self.assertEqual(due, [2, 3, 4] if today.weekday() < 4 else [2, 3])
+
+
+class LiquidityTests(TestCase):
+    """Eligibility and the pool's cash come from grouped queries over savings and installments"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('liquidity-admin', password='x', is_staff=True)
+        today = timezone.localdate()
+        cls.saver = Member.objects.create(name='Saver')
+        cls.late = Member.objects.create(name='Late Payer')
+        Contribution.objects.create(member=cls.saver, amount=Decimal('1000'), date=today)
+        Contribution.objects.create(member=cls.late, amount=Decimal('500'), date=today)
+        Withdrawal.objects.create(member=cls.saver, amount=Decimal('200'), date=today, reason='Fees', status='approved')
+        Withdrawal.objects.create(member=cls.saver, amount=Decimal('50'), date=today, reason='Fees')
+        for member, start, due in (
+            (cls.saver, today, add_months(today, 3)),
+            (cls.late, add_months(today, -3), today + timedelta(days=3)),
+        ):
+            create_schedule(Loan.objects.create(
+                member=member, amount=Decimal('900'), interest_rate=Decimal('10'), purpose='Stock', status='active',
+                requested_date=start, approved_date=start, due_date=due,
+            ))
+
+    def test_member_eligibility(self):
+        with self.assertNumQueries(2):
+            saver, late = sorted(member_eligibility(), key=lambda eligibility: eligibility.member.name != 'Saver')
+        # The member balance counts pending withdrawals too, as Member.get_current_balance() does
+        self.assertEqual((saver.savings, saver.outstanding, saver.overdue), (Decimal('750'), Decimal('990.00'), 0))
+        # Three times the savings, less what is still owed
+        self.assertEqual(saver.max_eligible, Decimal('1260.00'))
+        self.assertTrue(saver.allows(Decimal('1260')))
+        self.assertEqual((late.overdue, late.max_eligible, late.reason), (2, Decimal('0.00'), 'Has late installments'))
+
+        with self.settings(LOAN_ELIGIBILITY_MULTIPLIER=1, LOAN_ELIGIBILITY_BLOCK_ARREARS=False):
+            limits = {e.member.name: (e.max_eligible, e.reason) for e in member_eligibility()}
+        self.assertEqual(limits['Late Payer'], (Decimal('0.00'), 'Savings do not cover more borrowing'))
+        self.assertEqual(limits['Saver'], (Decimal('0.00'), 'Savings do not cover more borrowing'))
+
+    def test_defaulted_loan_counts_as_debt(self):
+        Loan.objects.filter(member=self.late).update(status='defaulted')
+        with self.settings(LOAN_ELIGIBILITY_BLOCK_ARREARS=False):
+            late = next(e for e in member_eligibility() if e.member == self.late)
+        self.assertEqual((late.defaulted_loans, late.outstanding, late.reason), (1, Decimal('990.00'), ''))
+        self.assertEqual(late.max_eligible, Decimal('510.00'))
+
+    def test_pool_and_projection(self):
+        pool = PoolPosition()
+        self.assertEqual(
+            (pool.savings, pool.loans_disbursed, pool.cash), (Decimal('1300'), Decimal('1800'), Decimal('-500')),
+        )
+        self.assertEqual(pool.cash_after_pending, Decimal('-550'))
+
+        with self.assertNumQueries(1):
+            projection = CashProjection(pool.cash, weeks=20)
+        # Two of the late payer's installments are past due; everything else falls due within 20 weeks
+        self.assertEqual(projection.arrears, Decimal('495.00'))
+        self.assertEqual((projection.later, projection.outstanding), (Decimal('0.00'), Decimal('1980.00')))
+        self.assertEqual(projection.weeks[-1]['cash'], pool.cash + Decimal('1485.00'))
+
+    def test_report_and_approval_page(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('loans:liquidity'))
+        self.assertContains(response, 'Has late installments')
+        self.assertEqual(response.context['eligible_count'], 1)
+
+        pending = Loan.objects.create(
+            member=self.saver, amount=Decimal('2000'), interest_rate=Decimal('10'), purpose='Shop',
+            requested_date=timezone.localdate(), due_date=add_months(timezone.localdate(), 6),
+        )
+        response = self.client.get(reverse('loans:approve', kwargs={'pk': pending.pk}))
+        self.assertFalse(response.context['within_eligibility'])
+        self.assertContains(response, '1260.00')
+
+
+class RepaymentTests(TestCase):
+    """Repayments are checked against the loan balance with the loan row locked"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('repayment-admin', password='x', is_staff=True)
+        cls.member = Member.objects.create(name='Borrower')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_repayment_checks_balance_under_lock(self):
+        today = timezone.localdate()
+        loan = Loan.objects.create(
+            member=self.member, amount=Decimal('100'), interest_rate=Decimal('10'), purpose='Seeds', status='active',
+            requested_date=today, approved_date=today, due_date=add_months(today, 1),
+        )
+        create_schedule(loan)
+        url = reverse('loans:repayment_create_loan', kwargs={'loan_id': loan.pk})
+        data = {'loan': loan.pk, 'amount': '110', 'payment_date': today.isoformat(), 'notes': ''}
+
+        # The form checked the balance before another treasurer's repayment was recorded
+        with patch.object(LoanRepaymentForm, 'clean_amount', lambda form: form.cleaned_data['amount']):
+            self.assertRedirects(self.client.post(url, data), reverse('loans:detail', kwargs={'pk': loan.pk}))
+            response = self.client.post(url, dict(data, amount='5'))
+        self.assertContains(response, 'exceeds remaining balance (0')
+        loan.refresh_from_db()
+        self.assertEqual(loan.status, 'completed')
+        self.assertEqual(list(loan.repayments.values_list('amount', flat=True)), [Decimal('110.00')])
+        self.assertEqual(TransactionLog.objects.filter(transaction_type='loan_repayment').count(), 1)
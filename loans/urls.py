@@ -8,6 +8,8 @@ urlpatterns = [
     path('<int:pk>/', views.loan_detail, name='detail'),
     path('create/', views.loan_create, name='create'),
     path('<int:pk>/approve/', views.loan_approve, name='approve'),
+    path('installments/due/', views.installments_due, name='installments_due'),
+    path('liquidity/', views.liquidity_report, name='liquidity'),
     path('repayment/create/', views.repayment_create, name='repayment_create'),
     path('repayment/create/<int:loan_id>/', views.repayment_create, name='repayment_create_loan'),
 ]
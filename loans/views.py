@@ -1,19 +1,29 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Q, Sum
 from django.utils import timezone
-from .models import Loan, LoanRepayment
+from datetime import timedelta
+from .models import Loan, LoanInstallment, LoanRepayment
 from .forms import LoanForm, LoanApprovalForm, LoanRepaymentForm
+from .liquidity import CashProjection, PoolPosition, member_eligibility
+from .schedule import allocate_repayment, create_schedule
 from members.models import Member
+from members.decorators import admin_required
 from contributions.models import TransactionLog
+from nja_platform.replica import use_replica
+from nja_platform.transactions import atomic_with_retries
 
 
 @login_required
+@use_replica
 def loan_list(request):
     """List all loans"""
-    loans = Loan.objects.all()
+    loans = Loan.objects.with_overdue().select_related('member')
     
     # Filters
     status_filter = request.GET.get('status', '')
@@ -41,12 +51,13 @@ def loan_list(request):
 @login_required
 def loan_detail(request, pk):
     """View loan details"""
-    loan = get_object_or_404(Loan, pk=pk)
-    repayments = LoanRepayment.objects.filter(loan=loan).order_by('-payment_date')
+    loan = get_object_or_404(Loan.objects.with_overdue().select_related('member', 'approved_by'), pk=pk)
+    repayments = LoanRepayment.objects.filter(loan=loan).select_related('recorded_by').order_by('-payment_date')
     
     context = {
         'loan': loan,
         'repayments': repayments,
+        'installments': loan.installments.order_by('number'),
         'total_paid': loan.get_paid_amount(),
         'remaining_balance': loan.get_remaining_balance(),
         'is_overdue': loan.is_overdue(),
@@ -82,32 +93,81 @@ def loan_create(request):
 
 
 @login_required
+@admin_required('Only administrators can approve loans.', 'loans:detail', url_kwargs={'pk': 'pk'})
 def loan_approve(request, pk):
     """Approve or reject loan"""
-    loan = get_object_or_404(Loan, pk=pk)
-    
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can approve loans.')
-        return redirect('loans:detail', pk=pk)
+    loan = get_object_or_404(Loan.objects.select_related('member'), pk=pk)
     
     if request.method == 'POST':
         form = LoanApprovalForm(request.POST, instance=loan)
         if form.is_valid():
             loan = form.save(commit=False)
-            if loan.status == 'approved':
+            approving = loan.status == 'approved'
+            if approving:
                 loan.approved_by = request.user
                 loan.approved_date = timezone.now().date()
                 loan.status = 'active'
             elif loan.status == 'rejected':
                 loan.approved_by = request.user
-            loan.save()
+            # The loan and its schedule are saved together. A second post of the same approval waits
+            # on the row lock and then finds the loan no longer pending.
+            with transaction.atomic():
+                if approving and not Loan.objects.select_for_update().filter(pk=pk, status='pending').exists():
+                    form.add_error('status', 'Only pending loans can be approved.')
+                else:
+                    loan.save()
+                    if approving:
+                        create_schedule(loan)
             
-            messages.success(request, f'Loan {loan.status} successfully!')
-            return redirect('loans:detail', pk=pk)
+            if not form.errors:
+                messages.success(request, f'Loan {loan.status} successfully!')
+                return redirect('loans:detail', pk=pk)
     else:
         form = LoanApprovalForm(instance=loan)
     
-    return render(request, 'loans/loan_approve.html', {'form': form, 'loan': loan})
+    eligibility = member_eligibility(Member.objects.filter(pk=loan.member_id))[0]
+    context = {
+        'form': form,
+        'loan': loan,
+        'eligibility': eligibility,
+        'within_eligibility': eligibility.allows(loan.amount),
+        'pool': PoolPosition(),
+    }
+    return render(request, 'loans/loan_approve.html', context)
+
+
+@atomic_with_retries
+def _record_repayment(data, user):
+    """Save a completed repayment with its loan row locked, checking the balance under the lock"""
+    loan = Loan.objects.select_for_update().select_related('member').get(pk=data['loan'].pk)
+    remaining = loan.get_remaining_balance()
+    if data['amount'] > remaining:
+        raise ValidationError(f"Repayment amount ({data['amount']}) exceeds remaining balance ({remaining})")
+    
+    repayment = LoanRepayment.objects.create(
+        loan=loan,
+        amount=data['amount'],
+        payment_date=data['payment_date'],
+        notes=data['notes'],
+        recorded_by=user,
+        status='completed',
+    )
+    allocate_repayment(repayment)
+    
+    # Update loan status if fully paid
+    if remaining - repayment.amount <= 0:
+        loan.status = 'completed'
+        loan.save()
+    
+    # Create transaction log
+    TransactionLog.objects.create(
+        transaction_type='loan_repayment',
+        member=loan.member,
+        amount=repayment.amount,
+        description=f"Loan repayment: {repayment.notes or 'No notes'}",
+        created_by=user
+    )
+    return repayment
 
 
 @login_required
@@ -115,32 +175,19 @@ def repayment_create(request, loan_id=None):
     """Create loan repayment"""
     loan = None
     if loan_id:
-        loan = get_object_or_404(Loan, pk=loan_id)
+        loan = get_object_or_404(Loan.objects.select_related('member'), pk=loan_id)
     
     if request.method == 'POST':
         form = LoanRepaymentForm(request.POST, loan=loan)
         if form.is_valid():
-            repayment = form.save(commit=False)
-            repayment.recorded_by = request.user
-            repayment.status = 'completed'
-            repayment.save()
-            
-            # Update loan status if fully paid
-            if repayment.loan.get_remaining_balance() <= 0:
-                repayment.loan.status = 'completed'
-                repayment.loan.save()
-            
-            # Create transaction log
-            TransactionLog.objects.create(
-                transaction_type='loan_repayment',
-                member=repayment.loan.member,
-                amount=repayment.amount,
-                description=f"Loan repayment: {repayment.notes or 'No notes'}",
-                created_by=request.user
-            )
-            
-            messages.success(request, 'Repayment recorded successfully!')
-            return redirect('loans:detail', pk=repayment.loan.pk)
+            try:
+                repayment = _record_repayment(form.cleaned_data, request.user)
+            except ValidationError as exc:
+                # Another repayment was recorded since the form checked the balance
+                form.add_error('amount', exc)
+            else:
+                messages.success(request, 'Repayment recorded successfully!')
+                return redirect('loans:detail', pk=repayment.loan.pk)
     else:
         form = LoanRepaymentForm(loan=loan)
     
@@ -151,3 +198,45 @@ def repayment_create(request, loan_id=None):
     return render(request, 'loans/repayment_form.html', context)
 
 
+@login_required
+@use_replica
+def installments_due(request):
+    """Unpaid installments that are late or fall due this week, in one query"""
+    today = timezone.localdate()
+    week_end = today + timedelta(days=7 - today.weekday())
+    installments = (
+        LoanInstallment.objects.due_before(week_end)
+        .select_related('loan__member')
+        .order_by('due_date', 'loan__member__name')
+    )
+    
+    paginator = Paginator(installments, 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    context = {
+        'page_obj': page_obj,
+        'today': today,
+        'week_end': week_end - timedelta(days=1),
+    }
+    return render(request, 'loans/installments_due.html', context)
+
+
+@login_required
+@admin_required('Only administrators can view the liquidity report.', 'loans:list')
+@use_replica
+def liquidity_report(request):
+    """Pool cash, its projection from installment due dates, and each active member's loan eligibility"""
+    pool = PoolPosition()
+    members = member_eligibility()
+    
+    paginator = Paginator(members, 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    context = {
+        'pool': pool,
+        'projection': CashProjection(pool.cash),
+        'page_obj': page_obj,
+        'eligible_count': sum(1 for eligibility in members if eligibility.max_eligible),
+        'multiplier': settings.LOAN_ELIGIBILITY_MULTIPLIER,
+    }
+    return render(request, 'loans/liquidity_report.html', context)
@@ -19,6 +19,8 @@ class Meeting(models.Model):
         ordering = ['-date']
         indexes = [
             models.Index(fields=['-date']),
+            # Upcoming meetings
+            models.Index(fields=['date'], name='meeting_open_date_idx', condition=models.Q(is_completed=False)),
         ]
 
     def __str__(self):
@@ -2,17 +2,22 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.utils import timezone
 from .models import Meeting, Attendance
 from .forms import MeetingForm, AttendanceForm, BulkAttendanceForm
 from members.models import Member
+from members.decorators import admin_required
+from nja_platform.replica import use_replica
 
 
 @login_required
+@use_replica
 def meeting_list(request):
     """List all meetings"""
-    meetings = Meeting.objects.all()
+    meetings = Meeting.objects.annotate(
+        present_count=Count('attendance', filter=Q(attendance__present=True))
+    ).order_by('-date')
     
     # Filters
     status_filter = request.GET.get('status', '')
@@ -41,6 +46,7 @@ def meeting_list(request):
         'page_obj': page_obj,
         'status_filter': status_filter,
         'search_query': search_query,
+        'total_members': Member.objects.filter(is_active=True).count(),
     }
     return render(request, 'meetings/meeting_list.html', context)
 
@@ -49,7 +55,7 @@ def meeting_list(request):
 def meeting_detail(request, pk):
     """View meeting details"""
     meeting = get_object_or_404(Meeting, pk=pk)
-    attendance = Attendance.objects.filter(meeting=meeting)
+    attendance = Attendance.objects.filter(meeting=meeting).select_related('member')
     
     context = {
         'meeting': meeting,
@@ -62,12 +68,9 @@ def meeting_detail(request, pk):
 
 
 @login_required
+@admin_required('Only administrators can create meetings.', 'meetings:list')
 def meeting_create(request):
     """Create new meeting"""
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can create meetings.')
-        return redirect('meetings:list')
-    
     if request.method == 'POST':
         form = MeetingForm(request.POST)
         if form.is_valid():
@@ -83,14 +86,11 @@ def meeting_create(request):
 
 
 @login_required
+@admin_required('Only administrators can edit meetings.', 'meetings:detail', url_kwargs={'pk': 'pk'})
 def meeting_edit(request, pk):
     """Edit meeting"""
     meeting = get_object_or_404(Meeting, pk=pk)
     
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can edit meetings.')
-        return redirect('meetings:detail', pk=pk)
-    
     if request.method == 'POST':
         form = MeetingForm(request.POST, instance=meeting)
         if form.is_valid():
@@ -104,14 +104,11 @@ def meeting_edit(request, pk):
 
 
 @login_required
+@admin_required('Only administrators can record attendance.', 'meetings:detail', url_kwargs={'pk': 'meeting_id'})
 def attendance_record(request, meeting_id):
     """Record attendance for a meeting"""
     meeting = get_object_or_404(Meeting, pk=meeting_id)
     
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can record attendance.')
-        return redirect('meetings:detail', pk=meeting_id)
-    
     # Get all active members
     all_members = Member.objects.filter(is_active=True)
     
@@ -143,9 +140,8 @@ def attendance_record(request, meeting_id):
             return redirect('meetings:detail', pk=meeting_id)
     else:
         # Pre-populate with existing attendance
-        existing_attendance = Attendance.objects.filter(meeting=meeting, present=True)
         initial = {
-            'present_members': [a.member for a in existing_attendance]
+            'present_members': list(Member.objects.filter(attendances__meeting=meeting, attendances__present=True))
         }
         form = BulkAttendanceForm(initial=initial)
     
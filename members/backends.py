@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class MemberProfileBackend(ModelBackend):
+    """Model backend that loads the member profile together with the user.
+
+    The session user lookup joins ``member_profile`` so that role checks in
+    views and templates never need a second query.
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('member_profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
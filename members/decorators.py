@@ -0,0 +1,42 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib import messages
+from django.shortcuts import redirect
+
+from .middleware import get_member_profile, user_is_group_admin
+
+
+def admin_required(message, redirect_to='dashboard:index', url_kwargs=None):
+    """Restrict a view to group administrators (staff, leaders and treasurers).
+
+    Non-admins get ``message`` flashed and are redirected to the ``redirect_to``
+    URL name. ``url_kwargs`` maps URL kwargs of the redirect target to kwargs of
+    the decorated view, e.g. ``{'pk': 'meeting_id'}``.
+    Use below ``login_required``.
+    """
+    def decorator(view_func):
+        def _denied(request, kwargs):
+            is_admin = getattr(request, 'is_group_admin', None)
+            if is_admin is None:
+                request.member = get_member_profile(request.user)
+                is_admin = request.is_group_admin = user_is_group_admin(request.user, request.member)
+            if not is_admin:
+                messages.error(request, message)
+                target_kwargs = {
+                    target: kwargs[source] for target, source in (url_kwargs or {}).items()
+                }
+                return redirect(redirect_to, **target_kwargs)
+            return None
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                # MemberProfileMiddleware has already resolved the role flags
+                return _denied(request, kwargs) or await view_func(request, *args, **kwargs)
+        else:
+            @wraps(view_func)
+            def _wrapped_view(request, *args, **kwargs):
+                return _denied(request, kwargs) or view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
@@ -5,6 +5,8 @@ from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 
+from monitoring.metrics import track_email
+
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +40,8 @@ def send_member_approval_email(member) -> bool:
         email.attach_alternative(html_body, "text/html")
 
     try:
-        email.send(fail_silently=False)
+        with track_email("approval"):
+            email.send(fail_silently=False)
         return True
     except Exception as exc:  # pragma: no cover - logging for operational visibility
         logger.exception("Failed to send approval email to %s: %s", to_email, exc)
@@ -69,7 +72,8 @@ def send_group_notification_email(subject: str, message: str, members: Iterable)
     )
 
     try:
-        email.send(fail_silently=False)
+        with track_email("group", len(unique_emails)):
+            email.send(fail_silently=False)
         return len(unique_emails)
     except Exception as exc:  # pragma: no cover
         logger.exception("Failed to send group notification email: %s", exc)
@@ -1,4 +1,5 @@
 from django import forms
+from django.contrib.auth import password_validation
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from .models import Member
@@ -76,3 +77,39 @@ class GroupEmailForm(forms.Form):
 
 
 
+
+
+class MemberImportForm(forms.Form):
+    """Form for importing members from a CSV or Excel file"""
+    ALLOWED_EXTENSIONS = ('.csv', '.xlsx', '.xlsm')
+
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx,.xlsm'}),
+        label='CSV or Excel file',
+    )
+    create_accounts = forms.BooleanField(
+        required=False,
+        initial=False,
+        label='Create login accounts',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        help_text='Each imported member gets a user account (username from the file, or derived from email/name).',
+    )
+    default_password = forms.CharField(
+        required=False,
+        strip=False,
+        widget=forms.PasswordInput(attrs={'class': 'form-control', 'autocomplete': 'new-password'}),
+        label='Initial password',
+        help_text='For accounts whose row has no password. Leave blank to let an administrator set them later.',
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data.get('file')
+        if file and not file.name.lower().endswith(self.ALLOWED_EXTENSIONS):
+            raise forms.ValidationError('Upload a .csv or .xlsx file.')
+        return file
+
+    def clean_default_password(self):
+        password = self.cleaned_data.get('default_password')
+        if password:
+            password_validation.validate_password(password)
+        return password
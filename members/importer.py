@@ -0,0 +1,227 @@
+"""
+Bulk member import from a CSV or XLSX file, run as a background ImportJob.
+
+Existing phone numbers, emails and usernames are loaded once into hash maps, so
+finding duplicates costs no query per row. Members and their login accounts are
+inserted with ``bulk_create`` in batches of BATCH_SIZE, each batch in its own
+transaction, after its passwords are hashed on a thread pool: PBKDF2 dominates the
+cost of creating a user, and hashlib releases the GIL while hashing.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django import forms
+from django.conf import settings
+from django.contrib.auth import password_validation
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import slugify
+
+from .models import ROLE_CHOICES, Member
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+PHONE_SEPARATORS = re.compile(r'[\s\-./()]')
+
+COLUMNS = {
+    'name': forms.CharField(max_length=200),
+    'phone': forms.CharField(max_length=30, required=False),
+    'email': forms.EmailField(required=False),
+    'role': forms.ChoiceField(choices=ROLE_CHOICES, required=False),
+    'address': forms.CharField(required=False),
+    'notes': forms.CharField(required=False),
+    'username': forms.CharField(max_length=150, required=False, validators=[UnicodeUsernameValidator()]),
+    'password': forms.CharField(required=False, strip=False),
+}
+
+# 'Treasurer' or 'treasurer' -> 'treasurer'
+ROLE_LOOKUP = {
+    **{label.casefold(): key for key, label in ROLE_CHOICES},
+    **{key: key for key, _ in ROLE_CHOICES},
+}
+
+
+def _cell_text(value):
+    # Spreadsheets store phone numbers typed without a + as numbers, e.g. 237650000001.0
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def normalize_phone(value):
+    """Strip separators and turn a 00 prefix into +. Raises ValidationError if ``Member.phone_regex`` rejects it."""
+    phone = PHONE_SEPARATORS.sub('', _cell_text(value))
+    if phone.startswith('00'):
+        phone = f'+{phone[2:]}'
+    Member.phone_regex(phone)
+    return phone
+
+
+def phone_key(value):
+    """Digits only (without a 00 prefix), so one number written two ways compares equal"""
+    digits = re.sub(r'\D', '', _cell_text(value))
+    return digits[2:] if digits.startswith('00') else digits
+
+
+class MemberImportResult:
+    """Running totals and skipped (duplicate or invalid) rows of one member import"""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.imported_rows = 0
+        self.accounts_created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row_number, messages):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': list(messages)})
+
+
+class _ExistingMembers:
+    """Phone numbers, emails and usernames already taken, loaded with one query each"""
+
+    def __init__(self):
+        self.phones = {}
+        self.emails = {}
+        for name, phone, email in Member.objects.values_list('name', 'phone', 'email').iterator():
+            if phone:
+                self.phones[phone_key(phone)] = name
+            if email:
+                self.emails[email.casefold()] = name
+        self.usernames = {username.casefold() for username in User.objects.values_list('username', flat=True).iterator()}
+
+    def duplicate_of(self, phone, email):
+        if phone and phone_key(phone) in self.phones:
+            return f'phone {phone} belongs to {self.phones[phone_key(phone)]}'
+        if email and email.casefold() in self.emails:
+            return f'email {email} belongs to {self.emails[email.casefold()]}'
+        return None
+
+    def add(self, name, phone, email):
+        if phone:
+            self.phones[phone_key(phone)] = name
+        if email:
+            self.emails[email.casefold()] = name
+
+    def unique_username(self, values):
+        """A username derived from the email or name, with a number appended if it is taken"""
+        base = values['email'].split('@')[0] if values['email'] else values['name']
+        base = slugify(base).replace('-', '.')[:140] or 'member'
+        username, n = base, 1
+        while username.casefold() in self.usernames:
+            n += 1
+            username = f'{base}{n}'
+        return username
+
+
+def _clean_row(row):
+    errors = []
+    values = {}
+    for column, field in COLUMNS.items():
+        value = row.get(column)
+        if value is not None and not isinstance(value, str):
+            value = _cell_text(value)
+        if column == 'role' and value:
+            value = ROLE_LOOKUP.get(value.strip().casefold(), value)
+        try:
+            values[column] = field.clean(value)
+        except ValidationError as exc:
+            errors.extend(f'{column}: {message}' for message in exc.messages)
+    if values.get('phone'):
+        try:
+            values['phone'] = normalize_phone(values['phone'])
+        except ValidationError as exc:
+            errors.extend(f'phone: {message}' for message in exc.messages)
+    if errors:
+        raise ValidationError(errors)
+    return values
+
+
+def hash_passwords(passwords):
+    """make_password() for each password on PASSWORD_HASH_THREADS threads; None gives an unusable password"""
+    with ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_THREADS, thread_name_prefix='nja-hash') as executor:
+        return list(executor.map(make_password, passwords))
+
+
+def _save_batch(members, accounts, default_password_hash):
+    """Hash the batch's row passwords, then insert its accounts and members in one transaction"""
+    with_password = [(user, raw) for user, raw in accounts if raw]
+    for (user, _), password_hash in zip(with_password, hash_passwords([raw for _, raw in with_password])):
+        user.password = password_hash
+    for user, raw in accounts:
+        if not raw:
+            user.password = default_password_hash or make_password(None)
+
+    with transaction.atomic():
+        # Members pick up their user's primary key once the users are inserted
+        User.objects.bulk_create([user for user, _ in accounts])
+        Member.objects.bulk_create(members)
+
+
+def import_members(rows, create_accounts=False, default_password_hash='', on_progress=None):
+    """Create members (and, if asked, login accounts) from (row number, {column: value}) rows.
+
+    Rows whose phone or email matches an existing member, or an earlier row, are
+    skipped as duplicates. Accounts get the row's password, else the already hashed
+    ``default_password_hash``, else an unusable password that an administrator can
+    reset later. ``on_progress(result)`` is called after every batch.
+    """
+    existing = _ExistingMembers()
+    result = MemberImportResult()
+    members = []
+    accounts = []  # (user, raw password from the row or None)
+
+    def flush():
+        if members:
+            _save_batch(members, accounts, default_password_hash)
+            result.imported_rows += len(members)
+            result.accounts_created += len(accounts)
+            members.clear()
+            accounts.clear()
+        if on_progress:
+            on_progress(result)
+
+    for row_number, row in rows:
+        result.total_rows += 1
+        try:
+            values = _clean_row(row)
+        except ValidationError as exc:
+            result.add_error(row_number, exc.messages)
+            continue
+        duplicate = existing.duplicate_of(values['phone'], values['email'])
+        if duplicate:
+            result.add_error(row_number, [f"{values['name']} is a duplicate: {duplicate}."])
+            continue
+
+        member = Member(
+            name=values['name'], phone=values['phone'], email=values['email'],
+            role=values['role'] or 'member', address=values['address'], notes=values['notes'],
+        )
+        if create_accounts:
+            if values['username'] and values['username'].casefold() in existing.usernames:
+                result.add_error(row_number, [f"username: {values['username']} is taken."])
+                continue
+            user = User(
+                username=values['username'] or existing.unique_username(values),
+                email=values['email'], first_name=values['name'][:150],
+            )
+            member.user = user
+            if values['password']:
+                try:
+                    password_validation.validate_password(values['password'], user)
+                except ValidationError as exc:
+                    result.add_error(row_number, [f'password: {m}' for m in exc.messages])
+                    continue
+            existing.usernames.add(user.username.casefold())
+            accounts.append((user, values['password'] or None))
+        existing.add(values['name'], values['phone'], values['email'])
+        members.append(member)
+        if len(members) >= BATCH_SIZE:
+            flush()
+    flush()
+    return result
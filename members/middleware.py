@@ -0,0 +1,37 @@
+from .models import Member
+
+
+def get_member_profile(user):
+    """Return the Member linked to ``user`` or None, using the cached relation when loaded."""
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.member_profile
+    except Member.DoesNotExist:
+        return None
+
+
+def user_is_group_admin(user, member=None):
+    """Staff users and leaders/treasurers count as group administrators."""
+    if not user.is_authenticated:
+        return False
+    if member is None:
+        member = get_member_profile(user)
+    return user.is_staff or (member is not None and member.is_admin())
+
+
+class MemberProfileMiddleware:
+    """Resolve the current member once per request and cache role flags on it.
+
+    Sets ``request.member`` (Member or None) and ``request.is_group_admin``.
+    Must be placed after ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        member = get_member_profile(request.user)
+        request.member = member
+        request.is_group_admin = user_is_group_admin(request.user, member)
+        return self.get_response(request)
@@ -1,6 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+# Withdrawals that reserve part of the balance a new withdrawal is checked against;
+# a rejected one never left the pool
+RESERVED_WITHDRAWAL_STATUSES = ('pending', 'approved')
 
 # Role choices
 ROLE_CHOICES = [
@@ -11,6 +18,33 @@ ROLE_CHOICES = [
 ]
 
 
+class MemberQuerySet(models.QuerySet):
+    def with_balances(self):
+        """Annotate ``total_contributions_amount`` and ``current_balance`` in the same query.
+
+        Matches ``get_total_contributions()`` / ``get_current_balance()`` without a
+        query per member.
+        """
+        from contributions.models import Contribution, Withdrawal
+
+        def member_sum(model):
+            total = model.objects.filter(member=OuterRef('pk')).order_by().values('member').annotate(
+                total=Sum('amount')
+            ).values('total')
+            return Coalesce(
+                Subquery(total, output_field=DecimalField(max_digits=12, decimal_places=2)),
+                Value(0),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )
+
+        return self.annotate(
+            total_contributions_amount=member_sum(Contribution),
+            total_withdrawals_amount=member_sum(Withdrawal),
+        ).annotate(
+            current_balance=models.F('total_contributions_amount') - models.F('total_withdrawals_amount'),
+        )
+
+
 class Member(models.Model):
     """Member model for NJA PLATFORM"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='member_profile', null=True, blank=True)
@@ -28,8 +62,14 @@ class Member(models.Model):
     address = models.TextField(blank=True)
     notes = models.TextField(blank=True)
 
+    objects = MemberQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date_joined']
+        indexes = [
+            # New members per month is a range scan on this column
+            models.Index(fields=['date_joined'], name='member_date_joined_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.role})"
@@ -52,6 +92,23 @@ class Member(models.Model):
         )['total'] or 0
         return contributions - withdrawals
 
+    def validate_withdrawal(self, amount, withdrawal=None):
+        """Raise ValidationError if the balance cannot cover ``amount``.
+
+        The one balance check for withdrawal requests and approvals: contributions less
+        approved withdrawals and the amounts pending requests reserve. ``withdrawal`` is
+        the saved withdrawal being checked, which must not count against itself.
+        """
+        from contributions.models import Withdrawal
+        withdrawals = Withdrawal.objects.filter(member=self, status__in=RESERVED_WITHDRAWAL_STATUSES)
+        if withdrawal is not None:
+            withdrawals = withdrawals.exclude(pk=withdrawal.pk)
+        reserved = withdrawals.aggregate(total=Sum('amount'))['total'] or 0
+        available = self.get_total_contributions() - reserved
+        if amount > available:
+            raise ValidationError(f'Withdrawal amount ({amount}) exceeds available balance ({available})')
+        return available
+
     def is_admin(self):
         """Check if member is admin (leader or treasurer)"""
         return self.role in ['leader', 'treasurer']
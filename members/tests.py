@@ -0,0 +1,120 @@
+import io
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from contributions.importer import run_import_job
+from contributions.models import ImportJob
+from nja_platform.spreadsheets import read_rows
+from .importer import import_members, normalize_phone
+from .models import Member
+
+
+class MemberImportTests(TestCase):
+    """Members import in bulk, skipping rows that duplicate existing members"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('import-admin', password='x', is_staff=True)
+        Member.objects.create(name='Existing', phone='+237650000001', email='existing@example.com')
+        User.objects.create_user('alice')
+
+    def _rows(self, text):
+        return read_rows(io.BytesIO(text.encode()), 'members.csv')
+
+    def test_normalize_phone(self):
+        self.assertEqual(normalize_phone('+237 650-00.00 02'), '+237650000002')
+        self.assertEqual(normalize_phone('00237650000002'), '+237650000002')
+        self.assertEqual(normalize_phone(237650000002.0), '237650000002')
+        with self.assertRaises(ValidationError):
+            normalize_phone('650-CALL-NOW')
+
+    def test_deduplicates_with_one_prefetch(self):
+        rows = self._rows(
+            'Name,Phone,Email,Role\n'
+            'Same Phone,00237 650 000 001,,\n'
+            'Same Email,,EXISTING@example.com,\n'
+            'New One,+237 650 000 010,new@example.com,Treasurer\n'
+            'Repeated,237650000010,,\n'
+            ',+237650000011,,\n'
+            'Bad Phone,12,,\n'
+        )
+        # Existing phones/emails, existing usernames, then the INSERT (in a savepoint)
+        with self.assertNumQueries(5):
+            result = import_members(rows)
+
+        self.assertEqual((result.total_rows, result.imported_rows, result.error_count), (6, 1, 5))
+        self.assertEqual([error['row'] for error in result.errors], [2, 3, 5, 6, 7])
+        self.assertEqual(
+            result.errors[0]['errors'], ['Same Phone is a duplicate: phone +237650000001 belongs to Existing.'],
+        )
+        member = Member.objects.get(name='New One')
+        self.assertEqual((member.phone, member.role, member.user), ('+237650000010', 'treasurer', None))
+
+    def test_accounts_created_in_bulk(self):
+        rows = self._rows(
+            'name,email,username,password\n'
+            'Alice A,alice@example.com,,\n'
+            'Bob B,,bob,Correct-Horse-42\n'
+            'Carol C,,carol,123\n'
+        )
+        with patch('members.importer.make_password', wraps=lambda raw: f'hashed:{raw}') as make_password:
+            result = import_members(rows, create_accounts=True, default_password_hash='hashed:Group-Start-2024')
+
+        self.assertEqual(result.accounts_created, 2)
+        # Only Bob's own password is hashed; Alice gets the default password's hash
+        self.assertEqual(make_password.call_count, 1)
+        self.assertEqual(result.errors[0]['row'], 4)
+        alice = Member.objects.select_related('user').get(name='Alice A')
+        # 'alice' is taken, so a number is appended
+        self.assertEqual((alice.user.username, alice.user.password), ('alice2', 'hashed:Group-Start-2024'))
+        self.assertEqual(User.objects.get(username='bob').member_profile.name, 'Bob B')
+
+    def test_batches_report_progress(self):
+        progress = []
+        with patch('members.importer.BATCH_SIZE', 2):
+            import_members(
+                self._rows('name\nA\nB\nC\n'), on_progress=lambda result: progress.append(result.imported_rows),
+            )
+        self.assertEqual(progress, [2, 3])
+        self.assertEqual(Member.objects.filter(name__in=['A', 'B', 'C']).count(), 3)
+
+    def test_upload_runs_in_background_job(self):
+        self.client.force_login(self.admin)
+        upload = SimpleUploadedFile('members.csv', b'name,phone,username,password\nDana D,+237650000020,dana,\n')
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post(reverse('members:import'), {
+                    'file': upload, 'create_accounts': 'on', 'default_password': 'Group-Start-2024',
+                })
+            job = ImportJob.objects.get()
+            self.assertRedirects(response, reverse('contributions:import_detail', kwargs={'pk': job.pk}))
+            self.assertEqual(len(callbacks), 1)
+            self.assertNotIn('Group-Start-2024', str(job.options))
+            # The callback hands the job to the import thread; run it here instead
+            run_import_job(job.pk)
+            self.assertFalse(job.file.storage.exists(job.file.name))
+
+        job.refresh_from_db()
+        self.assertEqual((job.kind, job.status, job.imported_rows), ('members', 'completed', 1))
+        self.assertTrue(User.objects.get(username='dana').check_password('Group-Start-2024'))
+        self.assertEqual(Member.objects.get(name='Dana D').user.username, 'dana')
+
+
+class AuthenticationBackendTests(TestCase):
+    """Logins use the member profile backend; sessions from the plain model backend stay valid"""
+
+    def test_backends(self):
+        user = User.objects.create_user('treasurer', password='secret')
+        self.assertTrue(self.client.login(username='treasurer', password='secret'))
+        self.assertEqual(self.client.session['_auth_user_backend'], 'members.backends.MemberProfileBackend')
+
+        self.client.logout()
+        self.client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('dashboard:member'))
+        self.assertEqual(response.wsgi_request.user, user)
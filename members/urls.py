@@ -7,6 +7,7 @@ urlpatterns = [
     path('', views.member_list, name='list'),
     path('<int:pk>/', views.member_detail, name='detail'),
     path('create/', views.member_create, name='create'),
+    path('import/', views.member_import, name='import'),
     path('<int:pk>/edit/', views.member_edit, name='edit'),
     path('register/', views.register, name='register'),
     path('notify/', views.group_email, name='group_email'),
@@ -1,17 +1,24 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.hashers import make_password
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
 from .models import Member
-from .forms import MemberForm, UserRegistrationForm, GroupEmailForm
+from .forms import MemberForm, MemberImportForm, UserRegistrationForm, GroupEmailForm
 from .emails import send_group_notification_email
+from .decorators import admin_required
+from .importer import COLUMNS
+from contributions.importer import enqueue_import
+from contributions.models import ImportJob
+from nja_platform.replica import use_replica
 
 
 @login_required
+@use_replica
 def member_list(request):
     """List all members"""
-    members = Member.objects.all()
+    members = Member.objects.with_balances()
     
     # Search functionality
     search_query = request.GET.get('search', '')
@@ -43,7 +50,7 @@ def member_list(request):
 @login_required
 def member_detail(request, pk):
     """View member details"""
-    member = get_object_or_404(Member, pk=pk)
+    member = get_object_or_404(Member.objects.with_balances(), pk=pk)
     context = {
         'member': member,
     }
@@ -51,12 +58,9 @@ def member_detail(request, pk):
 
 
 @login_required
+@admin_required('Only administrators can create members.', 'members:list')
 def member_create(request):
     """Create new member"""
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can create members.')
-        return redirect('members:list')
-    
     if request.method == 'POST':
         form = MemberForm(request.POST, request.FILES)
         if form.is_valid():
@@ -70,14 +74,36 @@ def member_create(request):
 
 
 @login_required
+@admin_required('Only administrators can import members.', 'members:list')
+def member_import(request):
+    """Create members (and optionally their accounts) from a spreadsheet, on the background import thread"""
+    if request.method == 'POST':
+        form = MemberImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            password = form.cleaned_data['default_password']
+            job = ImportJob.objects.create(
+                kind='members', file=form.cleaned_data['file'], created_by=request.user,
+                options={
+                    'create_accounts': form.cleaned_data['create_accounts'],
+                    # Hashed once here so the job never stores the password itself
+                    'default_password_hash': make_password(password) if password else '',
+                },
+            )
+            enqueue_import(job)
+            messages.success(request, 'Import started. This page updates until it finishes.')
+            return redirect('contributions:import_detail', pk=job.pk)
+    else:
+        form = MemberImportForm()
+
+    return render(request, 'members/member_import.html', {'form': form, 'columns': COLUMNS})
+
+
+@login_required
+@admin_required('Only administrators can edit members.', 'members:detail', url_kwargs={'pk': 'pk'})
 def member_edit(request, pk):
     """Edit member"""
     member = get_object_or_404(Member, pk=pk)
     
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can edit members.')
-        return redirect('members:detail', pk=pk)
-    
     if request.method == 'POST':
         form = MemberForm(request.POST, request.FILES, instance=member)
         if form.is_valid():
@@ -129,12 +155,9 @@ def register(request):
 
 
 @login_required
+@admin_required('Only administrators can send group notifications.', 'dashboard:index')
 def group_email(request):
     """Allow administrators to send a group email notification to members."""
-    if not (request.user.is_staff or (hasattr(request.user, 'member_profile') and request.user.member_profile.is_admin())):
-        messages.error(request, 'Only administrators can send group notifications.')
-        return redirect('dashboard:index')
-
     if request.method == 'POST':
         form = GroupEmailForm(request.POST)
         if form.is_valid():
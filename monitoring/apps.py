@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from django.conf import settings
+        from .collectors import install_cache_timer, install_template_timer
+
+        if settings.QUERY_STATS_ENABLED or settings.SERVER_TIMING_ENABLED:
+            install_template_timer()
+        if settings.QUERY_STATS_ENABLED or settings.SERVER_TIMING_ENABLED or settings.METRICS_ENABLED:
+            install_cache_timer()
@@ -0,0 +1,194 @@
+"""
+Per-request cost collectors (SQL queries, DB time, template render and cache time)
+"""
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+_current_stats = ContextVar('nja_request_stats', default=None)
+
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalize SQL so that queries differing only in literals compare equal."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class RequestStats:
+    """Costs accumulated while handling a single request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.fingerprints = Counter()
+        self._template_depth = 0
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicate_fingerprints(self):
+        """Fingerprints executed more than once, the usual sign of an N+1 pattern."""
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+
+def get_current_stats():
+    """Return the RequestStats being collected for the current request, if any."""
+    return _current_stats.get()
+
+
+def _query_timer(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(sql, time.perf_counter() - start)
+
+
+@contextmanager
+def collect_request_stats():
+    """Collect query, template and cache costs for the enclosed block.
+
+    Nested collectors (several middlewares enabled at once) share the outer stats.
+    """
+    if _current_stats.get() is not None:
+        yield _current_stats.get()
+        return
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_query_timer))
+            yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def collect_thread_queries():
+    """Add queries run on this thread's connections to the stats of the calling request.
+
+    For ORM work fanned out to worker threads, which have their own connections.
+    """
+    if _current_stats.get() is None:
+        yield
+        return
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(_query_timer))
+        yield
+
+
+def install_template_timer():
+    """Wrap Template.render so outermost render time is added to the current stats."""
+    from django.template.base import Template
+
+    if getattr(Template.render, '_nja_timed', False):
+        return
+    original_render = Template.render
+
+    def render(self, context):
+        stats = _current_stats.get()
+        if stats is None:
+            return original_render(self, context)
+        stats._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            stats._template_depth -= 1
+            if stats._template_depth == 0:
+                stats.template_time += time.perf_counter() - start
+
+    render._nja_timed = True
+    Template.render = render
+
+
+_CACHE_MISS = object()
+
+
+def _timed_cache_method(method):
+    def wrapper(self, *args, **kwargs):
+        stats = _current_stats.get()
+        if stats is None:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            stats.cache_time += time.perf_counter() - start
+    return wrapper
+
+
+def _timed_cache_get(get):
+    def wrapper(self, key, default=None, version=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return get(self, key, default, version)
+        start = time.perf_counter()
+        value = get(self, key, _CACHE_MISS, version)
+        stats.cache_time += time.perf_counter() - start
+        if value is _CACHE_MISS:
+            stats.cache_misses += 1
+            return default
+        stats.cache_hits += 1
+        return value
+    return wrapper
+
+
+def _timed_cache_get_many(get_many):
+    def wrapper(self, keys, version=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        start = time.perf_counter()
+        values = get_many(self, keys, version)
+        stats.cache_time += time.perf_counter() - start
+        stats.cache_hits += len(values)
+        stats.cache_misses += len(keys) - len(values)
+        return values
+    return wrapper
+
+
+def install_cache_timer():
+    """Wrap the configured cache backends so hits, misses and time are added to the current stats."""
+    from django.core.cache import caches
+
+    for alias in settings.CACHES:
+        backend_class = type(caches[alias])
+        if getattr(backend_class, '_nja_timed', False):
+            continue
+        # Only methods the backend implements itself: BaseCache fallbacks such as
+        # get_many() loop over get(), which is already counted.
+        own = vars(backend_class)
+        if 'get' in own:
+            backend_class.get = _timed_cache_get(own['get'])
+        if 'get_many' in own:
+            backend_class.get_many = _timed_cache_get_many(own['get_many'])
+        for name in ('set', 'set_many', 'add', 'delete', 'delete_many', 'touch'):
+            if name in own:
+                setattr(backend_class, name, _timed_cache_method(own[name]))
+        backend_class._nja_timed = True
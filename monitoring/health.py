@@ -0,0 +1,86 @@
+"""
+Readiness checks for /readyz, cached per worker for HEALTH_CHECK_CACHE_SECONDS
+"""
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from nja_platform.startup import pending_migrations
+
+
+def check_database():
+    for connection in connections.all():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+
+def check_cache():
+    key = f'nja-readyz-{uuid.uuid4().hex}'
+    cache.set(key, 1, 10)
+    value = cache.get(key)
+    cache.delete(key)
+    if value != 1:
+        raise RuntimeError('cache round-trip returned a different value')
+
+
+def check_media():
+    media_root = settings.MEDIA_ROOT
+    media_root.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=media_root, prefix='.readyz-'):
+        pass
+
+
+def check_migrations():
+    pending = pending_migrations()
+    if pending:
+        raise RuntimeError(f'{len(pending)} unapplied migrations, e.g. {pending[0][0]}.{pending[0][1]}')
+
+
+CHECKS = {
+    'database': check_database,
+    'cache': check_cache,
+    'media': check_media,
+    'migrations': check_migrations,
+}
+
+
+class ReadinessCache:
+    """Run all checks at most once every HEALTH_CHECK_CACHE_SECONDS per worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._result = None
+        self._expires = 0.0
+
+    def _run(self):
+        results = {}
+        for name, check in CHECKS.items():
+            start = time.perf_counter()
+            try:
+                check()
+            except Exception as exc:
+                results[name] = {'ok': False, 'error': f'{type(exc).__name__}: {exc}'}
+            else:
+                results[name] = {'ok': True}
+            results[name]['ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return {'ready': all(result['ok'] for result in results.values()), 'checks': results}
+
+    def get(self):
+        with self._lock:
+            if self._result is None or time.monotonic() >= self._expires:
+                self._result = self._run()
+                self._expires = time.monotonic() + settings.HEALTH_CHECK_CACHE_SECONDS
+            return self._result
+
+    def reset(self):
+        with self._lock:
+            self._result = None
+
+
+readiness = ReadinessCache()
@@ -0,0 +1,126 @@
+"""
+Prometheus metrics for requests, database, cache, email and exports.
+
+Under gunicorn every worker writes its samples to ``PROMETHEUS_MULTIPROC_DIR``
+(set up by gunicorn.conf.py) and /metrics aggregates the files of all workers.
+Without that variable, e.g. under runserver, the in-process registry is used.
+"""
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import connections
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_LATENCY = Histogram(
+    'nja_request_duration_seconds', 'Request latency by view', ['view', 'method'], buckets=LATENCY_BUCKETS,
+)
+RESPONSES = Counter('nja_responses_total', 'Responses by view and status code', ['view', 'status'])
+DB_QUERIES = Counter('nja_db_queries_total', 'SQL queries executed by view', ['view'])
+DB_TIME = Counter('nja_db_query_seconds_total', 'Time spent in SQL queries by view', ['view'])
+CACHE_REQUESTS = Counter('nja_cache_requests_total', 'Cache lookups by result (hit or miss)', ['result'])
+CACHE_TIME = Counter('nja_cache_seconds_total', 'Time spent in cache calls')
+EMAIL_OUTBOX = Gauge(
+    'nja_email_outbox_depth', 'Email messages currently being sent', ['kind'], multiprocess_mode='livesum',
+)
+EMAILS = Counter('nja_emails_total', 'Email messages handed to the backend by result', ['kind', 'result'])
+EXPORT_DURATION = Histogram(
+    'nja_export_duration_seconds', 'Report export generation time', ['report'], buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'nja_db_pool_connections', 'Pooled database connections by state (open, idle, max)', ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAITING = Gauge(
+    'nja_db_pool_requests_waiting', 'Requests waiting for a pooled connection', ['alias'], multiprocess_mode='livesum',
+)
+DB_POOL_REQUESTS = Counter('nja_db_pool_requests_total', 'Connections requested from the pool', ['alias'])
+DB_POOL_QUEUED = Counter('nja_db_pool_queued_total', 'Pool requests that had to wait for a connection', ['alias'])
+DB_POOL_WAIT = Counter('nja_db_pool_wait_seconds_total', 'Time spent waiting for a pooled connection', ['alias'])
+DB_POOL_ERRORS = Counter('nja_db_pool_errors_total', 'Pool requests that failed (e.g. timed out)', ['alias'])
+DB_POOL_OPENED = Counter('nja_db_pool_connections_opened_total', 'Connections opened by the pool', ['alias'])
+DB_POOL_LOST = Counter('nja_db_pool_connections_lost_total', 'Broken connections detected by the pool', ['alias'])
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+def record_request(view_name, method, status, duration, stats):
+    """Add one finished request and its collected costs to the metrics."""
+    view_name = view_name or UNRESOLVED_VIEW
+    REQUEST_LATENCY.labels(view_name, method).observe(duration)
+    RESPONSES.labels(view_name, str(status)).inc()
+    if stats.queries:
+        DB_QUERIES.labels(view_name).inc(stats.queries)
+        DB_TIME.labels(view_name).inc(stats.db_time)
+    if stats.cache_hits:
+        CACHE_REQUESTS.labels('hit').inc(stats.cache_hits)
+    if stats.cache_misses:
+        CACHE_REQUESTS.labels('miss').inc(stats.cache_misses)
+    if stats.cache_time:
+        CACHE_TIME.inc(stats.cache_time)
+
+
+def record_db_pools():
+    """Copy the usage stats of this process's database connection pools into the metrics."""
+    for connection in connections.all(initialized_only=True):
+        pool = getattr(connection, 'pool', None)
+        if pool is None:
+            continue
+        alias = connection.alias
+        stats = pool.pop_stats()
+        DB_POOL_CONNECTIONS.labels(alias, 'open').set(stats.get('pool_size', 0))
+        DB_POOL_CONNECTIONS.labels(alias, 'idle').set(stats.get('pool_available', 0))
+        DB_POOL_CONNECTIONS.labels(alias, 'max').set(stats.get('pool_max', 0))
+        DB_POOL_WAITING.labels(alias).set(stats.get('requests_waiting', 0))
+        DB_POOL_REQUESTS.labels(alias).inc(stats.get('requests_num', 0))
+        DB_POOL_QUEUED.labels(alias).inc(stats.get('requests_queued', 0))
+        DB_POOL_WAIT.labels(alias).inc(stats.get('requests_wait_ms', 0) / 1000)
+        DB_POOL_ERRORS.labels(alias).inc(stats.get('requests_errors', 0))
+        DB_POOL_OPENED.labels(alias).inc(stats.get('connections_num', 0))
+        DB_POOL_LOST.labels(alias).inc(stats.get('connections_lost', 0))
+
+
+@contextmanager
+def track_email(kind, recipients=1):
+    """Count messages as in the outbox while the enclosed block sends them."""
+    gauge = EMAIL_OUTBOX.labels(kind)
+    gauge.inc(recipients)
+    try:
+        yield
+    except Exception:
+        EMAILS.labels(kind, 'failed').inc(recipients)
+        raise
+    else:
+        EMAILS.labels(kind, 'sent').inc(recipients)
+    finally:
+        gauge.dec(recipients)
+
+
+def track_export(report):
+    """Decorate an export view so its generation time is observed."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return view_func(request, *args, **kwargs)
+            finally:
+                EXPORT_DURATION.labels(report).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def render_metrics():
+    """Return the text exposition of all metrics and its content type."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
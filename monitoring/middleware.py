@@ -0,0 +1,169 @@
+import cProfile
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+
+from .collectors import collect_request_stats
+from .metrics import record_db_pools, record_request
+from .profiling import save_profile
+from .registry import view_stats
+from .slow_queries import SlowQueryWrapper
+
+
+class QueryStatsMiddleware:
+    """Record query count, DB time and template time per resolved view name.
+
+    Opt-in through ``QUERY_STATS_ENABLED`` (``NJA_QUERY_STATS`` env var).
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_STATS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect_request_stats() as stats:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is not None:
+            view_stats.record(resolver_match.view_name, stats, duration)
+        return response
+
+
+class MetricsMiddleware:
+    """Feed request latency, status, DB and cache costs into the Prometheus metrics.
+
+    Opt-in through ``METRICS_ENABLED`` (``NJA_METRICS`` env var).
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect_request_stats() as stats:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        record_request(
+            resolver_match.view_name if resolver_match else None,
+            request.method, response.status_code, duration, stats,
+        )
+        record_db_pools()
+        return response
+
+
+class ServerTimingMiddleware:
+    """Add a ``Server-Timing`` header with DB, template and cache time for staff users.
+
+    The breakdown shows up in the browser dev tools network panel. Controlled by
+    ``SERVER_TIMING_ENABLED``; must be placed after ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.user.is_staff:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with collect_request_stats() as stats:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        segments = [
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'cache;dur={stats.cache_time * 1000:.1f};desc="{stats.cache_hits} hits, {stats.cache_misses} misses"',
+            f'total;dur={duration * 1000:.1f}',
+        ]
+        if resolver_match is not None:
+            segments.append(f'view;desc="{resolver_match.view_name}"')
+        response['Server-Timing'] = ', '.join(segments)
+        return response
+
+
+class ProfilerMiddleware:
+    """Run a single request under cProfile when a superuser asks for it.
+
+    Trigger with ``?__profile=cprofile`` (the page is replaced by the sorted
+    stats report) or the ``X-NJA-Profile: cprofile`` header (the normal response
+    is returned with ``X-NJA-Profile-File`` naming the stored profile). Profiles
+    are written to ``PROFILER_DIR`` as .prof (pstats), .collapsed (flamegraph)
+    and .txt files. Opt-in through ``PROFILER_ENABLED``.
+    Must be placed after ``AuthenticationMiddleware``.
+    """
+
+    QUERY_PARAM = '__profile'
+    HEADER = 'HTTP_X_NJA_PROFILE'
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        mode = request.GET.get(self.QUERY_PARAM) or request.META.get(self.HEADER)
+        if mode != 'cprofile' or not request.user.is_superuser:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        # cProfile cannot profile overlapping requests in one process reliably
+        with self._lock:
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        sort = request.GET.get('__profile_sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'calls', 'ncalls', 'time'):
+            sort = 'cumulative'
+        base, report = save_profile(
+            profiler, resolver_match.view_name if resolver_match else None, sort, settings.PROFILER_REPORT_LINES,
+        )
+
+        if self.QUERY_PARAM in request.GET:
+            response = HttpResponse(
+                f'Profile saved as {base}.prof / {base}.collapsed\n\n{report}',
+                content_type='text/plain; charset=utf-8',
+            )
+        response['X-NJA-Profile-File'] = base
+        return response
+
+
+class SlowQueryMiddleware:
+    """Log queries slower than ``SLOW_QUERY_THRESHOLD_MS`` with their originating view.
+
+    The first time a query shape is seen its EXPLAIN plan is captured as well.
+    Disabled when the threshold is 0 (``NJA_SLOW_QUERY_MS`` env var).
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wrapper = SlowQueryWrapper(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            return self.get_response(request)
@@ -0,0 +1,104 @@
+"""
+On-demand cProfile support: report formatting and flamegraph export
+"""
+import io
+import pstats
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_FILE_RE = re.compile(r'^[\w.-]+\.(prof|collapsed|txt)$')
+
+
+def _frame_label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name  # built-in
+    return f'{Path(filename).name}:{lineno}({name})'
+
+
+def collapsed_stacks(stats, max_depth=80, min_fraction=0.001):
+    """Convert pstats data to Brendan Gregg's collapsed-stack format.
+
+    cProfile only records caller/callee pairs, so each call path is
+    approximated by splitting a function's time across its callees in
+    proportion to the time recorded on each edge. Paths carrying less than
+    ``min_fraction`` of the total time are dropped to keep the walk bounded.
+    """
+    raw = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            if caller != func:
+                callees.setdefault(caller, []).append((func, edge[3]))
+    total_time = sum(entry[2] for entry in raw.values())
+    roots = [func for func, entry in raw.items() if not set(entry[4]) - {func}]
+    if raw and sum(raw[func][3] for func in roots) < total_time / 2:
+        # Mutually recursive entry points (e.g. nested middleware) have no caller-free root
+        roots.append(max(raw, key=lambda func: raw[func][3]))
+    min_weight = total_time * min_fraction
+    lines = {}
+
+    def walk(func, path, on_path, weight):
+        tt, ct = raw[func][2], raw[func][3]
+        if ct <= 0 or weight < min_weight:
+            return
+        path = path + [_frame_label(func)]
+        on_path = on_path | {func}
+        self_weight = min(weight, tt * weight / ct)
+        children = [(callee, edge_ct) for callee, edge_ct in callees.get(func, ()) if callee not in on_path]
+        children_ct = sum(edge_ct for _, edge_ct in children)
+        remaining = weight - self_weight
+        if len(path) >= max_depth or children_ct <= 0:
+            self_weight, children = weight, []
+        else:
+            # Recursive functions can record more time on their edges than in total
+            scale = min(weight / ct, remaining / children_ct)
+            self_weight = weight - scale * children_ct
+        if int(self_weight * 1_000_000):
+            key = ';'.join(path)
+            lines[key] = lines.get(key, 0) + int(self_weight * 1_000_000)
+        for callee, edge_ct in children:
+            walk(callee, path, on_path, edge_ct * scale)
+
+    for root in roots:
+        walk(root, [], frozenset(), raw[root][3])
+    return '\n'.join(f'{stack} {value}' for stack, value in sorted(lines.items())) + '\n'
+
+
+def text_report(stats, sort, limit):
+    """Return the top ``limit`` entries of ``stats`` sorted by ``sort`` as text."""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def save_profile(profiler, view_name, sort, limit):
+    """Write .prof, .collapsed and .txt files for a finished profile; return (base name, report)."""
+    stats = pstats.Stats(profiler)
+    report = text_report(stats, sort, limit)
+    directory = Path(settings.PROFILER_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    safe_view = re.sub(r'[^\w.-]', '_', view_name or 'unresolved')
+    base = f"{timezone.now():%Y%m%d-%H%M%S-%f}-{safe_view}"
+    stats.dump_stats(directory / f'{base}.prof')
+    (directory / f'{base}.collapsed').write_text(collapsed_stacks(stats))
+    (directory / f'{base}.txt').write_text(report)
+    return base, report
+
+
+def list_profiles():
+    """Stored profiles, newest first, grouped by base name."""
+    directory = Path(settings.PROFILER_DIR)
+    if not directory.is_dir():
+        return []
+    profiles = {}
+    for path in directory.iterdir():
+        if PROFILE_FILE_RE.match(path.name):
+            base, ext = path.name.rsplit('.', 1)
+            entry = profiles.setdefault(base, {'name': base, 'files': [], 'modified': path.stat().st_mtime})
+            entry['files'].append(ext)
+    return sorted(profiles.values(), key=lambda entry: entry['name'], reverse=True)
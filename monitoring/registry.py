@@ -0,0 +1,75 @@
+"""
+In-memory per-view aggregates of request costs (one registry per worker process)
+"""
+import threading
+
+from django.conf import settings
+
+
+class ViewStatsRegistry:
+    """Thread-safe aggregates of RequestStats keyed by resolved view name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, stats, duration):
+        max_fingerprints = settings.QUERY_STATS_MAX_FINGERPRINTS
+        with self._lock:
+            entry = self._views.get(view_name)
+            if entry is None:
+                entry = self._views[view_name] = {
+                    'requests': 0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'db_time': 0.0,
+                    'template_time': 0.0,
+                    'total_time': 0.0,
+                    'duplicates': {},
+                }
+            entry['requests'] += 1
+            entry['queries'] += stats.queries
+            entry['max_queries'] = max(entry['max_queries'], stats.queries)
+            entry['db_time'] += stats.db_time
+            entry['template_time'] += stats.template_time
+            entry['total_time'] += duration
+            duplicates = entry['duplicates']
+            for sql, count in stats.duplicate_fingerprints().items():
+                if sql not in duplicates and len(duplicates) >= max_fingerprints:
+                    continue
+                seen = duplicates.setdefault(sql, {'requests': 0, 'max_per_request': 0})
+                seen['requests'] += 1
+                seen['max_per_request'] = max(seen['max_per_request'], count)
+
+    def snapshot(self):
+        """Return a JSON-serialisable copy of the aggregates with per-request averages."""
+        with self._lock:
+            views = {name: dict(entry, duplicates=dict(entry['duplicates'])) for name, entry in self._views.items()}
+        report = []
+        for name, entry in views.items():
+            requests = entry['requests']
+            report.append({
+                'view': name,
+                'requests': requests,
+                'avg_queries': round(entry['queries'] / requests, 2),
+                'max_queries': entry['max_queries'],
+                'avg_db_ms': round(entry['db_time'] * 1000 / requests, 2),
+                'avg_template_ms': round(entry['template_time'] * 1000 / requests, 2),
+                'avg_total_ms': round(entry['total_time'] * 1000 / requests, 2),
+                'total_db_ms': round(entry['db_time'] * 1000, 2),
+                'duplicate_queries': [
+                    {'sql': sql, 'requests': seen['requests'], 'max_per_request': seen['max_per_request']}
+                    for sql, seen in sorted(
+                        entry['duplicates'].items(), key=lambda item: item[1]['max_per_request'], reverse=True
+                    )
+                ],
+            })
+        report.sort(key=lambda item: item['total_db_ms'], reverse=True)
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+view_stats = ViewStatsRegistry()
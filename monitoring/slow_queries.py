@@ -0,0 +1,137 @@
+"""
+Slow-query capture: logging, per-fingerprint aggregates and EXPLAIN plans
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .collectors import fingerprint
+
+logger = logging.getLogger('nja.slow_queries')
+
+
+class SlowQueryLog:
+    """Recent slow queries and per-fingerprint aggregates for this worker"""
+
+    def __init__(self, recent=200):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=recent)
+        self._fingerprints = {}
+
+    def needs_plan(self, key):
+        with self._lock:
+            entry = self._fingerprints.get(key)
+            return entry is None or entry['plan'] is None
+
+    def record(self, key, sql, params, duration_ms, view_name, plan=None):
+        with self._lock:
+            self._recent.append({
+                'at': timezone.now().isoformat(),
+                'view': view_name,
+                'duration_ms': round(duration_ms, 2),
+                'sql': sql,
+                'params': repr(params)[:500],
+            })
+            entry = self._fingerprints.setdefault(key, {
+                'fingerprint': key,
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'views': set(),
+                'plan': None,
+            })
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            if view_name:
+                entry['views'].add(view_name)
+            if plan is not None and entry['plan'] is None:
+                entry['plan'] = plan
+
+    def snapshot(self):
+        with self._lock:
+            fingerprints = [
+                {
+                    'fingerprint': entry['fingerprint'],
+                    'count': entry['count'],
+                    'avg_ms': round(entry['total_ms'] / entry['count'], 2),
+                    'max_ms': round(entry['max_ms'], 2),
+                    'total_ms': round(entry['total_ms'], 2),
+                    'views': sorted(entry['views']),
+                    'plan': entry['plan'],
+                }
+                for entry in self._fingerprints.values()
+            ]
+            recent = list(reversed(self._recent))
+        fingerprints.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return {'fingerprints': fingerprints, 'recent': recent}
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._fingerprints.clear()
+
+
+slow_query_log = SlowQueryLog()
+_explaining = threading.local()
+
+
+def explain(connection, sql, params):
+    """Return the planner output for a SELECT, or None if it cannot be explained."""
+    if not sql.lstrip().upper().startswith('SELECT') or connection.needs_rollback:
+        return None
+    # Inside a transaction a failed EXPLAIN would abort it (on PostgreSQL); a savepoint contains the failure
+    savepoint = transaction.atomic(using=connection.alias) if connection.in_atomic_block else nullcontext()
+    _explaining.active = True
+    try:
+        with savepoint, connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            rows = cursor.fetchall()
+    except Exception:
+        # Plans are best-effort diagnostics
+        logger.warning('Could not EXPLAIN slow query', exc_info=True)
+        return None
+    finally:
+        _explaining.active = False
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+class SlowQueryWrapper:
+    """``connection.execute_wrapper`` callable logging queries above the threshold"""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+
+    def view_name(self):
+        resolver_match = getattr(self.request, 'resolver_match', None)
+        return resolver_match.view_name if resolver_match else None
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_explaining, 'active', False):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= self.threshold_ms:
+            self.report(context['connection'], sql, params, many, duration_ms)
+        return result
+
+    def report(self, connection, sql, params, many, duration_ms):
+        key = fingerprint(sql)
+        view_name = self.view_name()
+        plan = None
+        if settings.SLOW_QUERY_EXPLAIN and not many and slow_query_log.needs_plan(key):
+            plan = explain(connection, sql, params)
+        slow_query_log.record(key, sql, params, duration_ms, view_name, plan)
+        logger.warning(
+            'Slow query %.1fms view=%s sql=%s params=%s%s',
+            duration_ms, view_name or '-', sql, repr(params)[:500],
+            f'\nplan:\n{plan}' if plan else '',
+        )
@@ -0,0 +1,149 @@
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .collectors import collect_request_stats, install_cache_timer, install_template_timer
+from .health import CHECKS, readiness
+from .metrics import record_db_pools, render_metrics
+from .slow_queries import explain
+
+
+class CacheTimerTests(TestCase):
+    """Cache hits and misses are attributed to the request being collected"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        install_cache_timer()
+
+    def test_hits_and_misses(self):
+        cache.set('monitoring-test', 'value')
+        with collect_request_stats() as stats:
+            self.assertEqual(cache.get('monitoring-test'), 'value')
+            self.assertIsNone(cache.get('monitoring-test-missing'))
+            self.assertEqual(cache.get_many(['monitoring-test', 'monitoring-test-missing']), {'monitoring-test': 'value'})
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (2, 2))
+
+    def test_nested_collectors_share_stats(self):
+        with collect_request_stats() as outer:
+            with collect_request_stats() as inner:
+                cache.get('monitoring-test-missing')
+        self.assertIs(outer, inner)
+        self.assertEqual(outer.cache_misses, 1)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN='')
+class MetricsEndpointTests(TestCase):
+    """/metrics exposes per-view request and database metrics"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('metrics-staff', password='x', is_staff=True)
+        cls.member = User.objects.create_user('metrics-member', password='x')
+
+    def test_requires_staff_or_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        with self.settings(METRICS_TOKEN='secret'):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+    def test_db_pool_metrics(self):
+        pool = Mock(**{'pop_stats.return_value': {
+            'pool_size': 3, 'pool_available': 1, 'pool_max': 10, 'requests_num': 7, 'requests_wait_ms': 250,
+        }})
+        connection = Mock(alias='pooled', pool=pool)
+        with patch('monitoring.metrics.connections.all', return_value=[connection]):
+            record_db_pools()
+        body = render_metrics()[0].decode()
+        self.assertIn('nja_db_pool_connections{alias="pooled",state="open"} 3.0', body)
+        self.assertIn('nja_db_pool_requests_total{alias="pooled"} 7.0', body)
+        self.assertIn('nja_db_pool_wait_seconds_total{alias="pooled"} 0.25', body)
+
+    def test_request_metrics(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('members:list'))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('nja_request_duration_seconds_bucket{le="0.01",method="GET",view="members:list"}', body)
+        self.assertIn('nja_responses_total{status="200",view="members:list"}', body)
+        self.assertIn('nja_db_queries_total{view="members:list"}', body)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+
+@override_settings(SERVER_TIMING_ENABLED=True)
+class ServerTimingTests(TestCase):
+    """Staff responses carry a Server-Timing breakdown"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        install_template_timer()
+        install_cache_timer()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('timing-staff', password='x', is_staff=True)
+        cls.member = User.objects.create_user('timing-member', password='x')
+
+    def test_staff_header(self):
+        self.client.force_login(self.staff)
+        header = self.client.get(reverse('members:list'))['Server-Timing']
+        self.assertRegex(header, r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, cache;dur=')
+        self.assertIn('view;desc="members:list"', header)
+
+    def test_no_header_for_members(self):
+        self.client.force_login(self.member)
+        self.assertNotIn('Server-Timing', self.client.get(reverse('dashboard:index')))
+
+    @override_settings(SERVER_TIMING_ENABLED=False)
+    def test_disabled(self):
+        self.client.force_login(self.staff)
+        self.assertNotIn('Server-Timing', self.client.get(reverse('members:list')))
+
+
+class HealthTests(TestCase):
+    """Probes are cheap and report failing dependencies"""
+
+    def setUp(self):
+        readiness.reset()
+
+    def test_healthz_does_not_touch_the_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_readyz(self):
+        response = self.client.get(reverse('readyz'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['checks']), {'database', 'cache', 'media', 'migrations'})
+        # Cached: the next probe runs no queries
+        with self.assertNumQueries(0):
+            self.client.get(reverse('readyz'))
+
+    def test_readyz_reports_failures(self):
+        with patch.dict(CHECKS, media=Mock(side_effect=PermissionError('read-only'))):
+            response = self.client.get(reverse('readyz'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['media']['error'], 'PermissionError: read-only')
+
+
+class ExplainTests(TestCase):
+    """A failing EXPLAIN is rolled back to a savepoint and leaves the request's transaction usable"""
+
+    def test_failed_explain_inside_transaction(self):
+        with transaction.atomic():
+            self.assertIsNotNone(explain(connection, 'SELECT id FROM auth_user WHERE id = %s', [1]))
+            with self.assertLogs('nja.slow_queries', 'WARNING'):
+                self.assertIsNone(explain(connection, 'SELECT id FROM no_such_table', []))
+            self.assertFalse(connection.needs_rollback)
+            self.assertEqual(User.objects.count(), 0)
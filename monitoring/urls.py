@@ -0,0 +1,14 @@
+from django.urls import path
+from . import views
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('queries/', views.query_stats, name='query_stats'),
+    path('queries.json', views.query_stats_json, name='query_stats_json'),
+    path('queries/reset/', views.query_stats_reset, name='query_stats_reset'),
+    path('slow-queries/', views.slow_queries, name='slow_queries'),
+    path('slow-queries/reset/', views.slow_queries_reset, name='slow_queries_reset'),
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<str:filename>', views.profile_download, name='profile_download'),
+]
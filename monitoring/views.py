@@ -0,0 +1,111 @@
+import hmac
+from pathlib import Path
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import user_passes_test
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.shortcuts import render, redirect
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
+
+from .health import readiness
+from .metrics import render_metrics
+from .profiling import PROFILE_FILE_RE, list_profiles
+from .registry import view_stats
+from .slow_queries import slow_query_log
+
+superuser_required = user_passes_test(lambda user: user.is_superuser)
+
+
+@staff_member_required
+def query_stats(request):
+    """Per-view query and timing aggregates for this worker"""
+    context = {
+        'enabled': settings.QUERY_STATS_ENABLED,
+        'views': view_stats.snapshot(),
+    }
+    return render(request, 'monitoring/query_stats.html', context)
+
+
+@staff_member_required
+def query_stats_json(request):
+    """Per-view aggregates as JSON"""
+    return JsonResponse({
+        'enabled': settings.QUERY_STATS_ENABLED,
+        'views': view_stats.snapshot(),
+    })
+
+
+@staff_member_required
+@require_POST
+def query_stats_reset(request):
+    """Clear the aggregates collected by this worker"""
+    view_stats.reset()
+    return redirect('monitoring:query_stats')
+
+
+@never_cache
+def healthz(request):
+    """Liveness probe: the process serves requests (no database access)"""
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+def readyz(request):
+    """Readiness probe: database, cache, media storage and migrations (cached briefly)"""
+    result = readiness.get()
+    return JsonResponse(result, status=200 if result['ready'] else 503)
+
+
+def metrics(request):
+    """Prometheus scrape endpoint (bearer METRICS_TOKEN, or a staff session)"""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_TOKEN:
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(authorization, f'Bearer {settings.METRICS_TOKEN}'):
+            return HttpResponseForbidden()
+    elif not request.user.is_staff:
+        return HttpResponseForbidden()
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
+@staff_member_required
+def slow_queries(request):
+    """Slow queries with their originating views and captured plans"""
+    context = {
+        'threshold_ms': settings.SLOW_QUERY_THRESHOLD_MS,
+        **slow_query_log.snapshot(),
+    }
+    return render(request, 'monitoring/slow_queries.html', context)
+
+
+@staff_member_required
+@require_POST
+def slow_queries_reset(request):
+    """Clear the slow queries collected by this worker"""
+    slow_query_log.reset()
+    return redirect('monitoring:slow_queries')
+
+
+@superuser_required
+def profile_list(request):
+    """Profiles captured with ?__profile=cprofile"""
+    context = {
+        'enabled': settings.PROFILER_ENABLED,
+        'profiles': list_profiles(),
+    }
+    return render(request, 'monitoring/profile_list.html', context)
+
+
+@superuser_required
+def profile_download(request, filename):
+    """Download a stored .prof, .collapsed or .txt profile file"""
+    if not PROFILE_FILE_RE.match(filename):
+        raise Http404
+    path = Path(settings.PROFILER_DIR) / filename
+    if not path.is_file():
+        raise Http404
+    return FileResponse(path.open('rb'), as_attachment=True, filename=filename)
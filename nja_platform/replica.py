@@ -0,0 +1,83 @@
+"""
+Read-replica routing for read-heavy views (reports, statements, lists).
+
+Only views decorated with ``use_replica`` read from the ``replica`` database, and
+only for GET/HEAD requests. Writes, transactions and every other view use the
+primary. After a write request the client gets a short-lived cookie that keeps
+its reads on the primary for REPLICA_STICKY_SECONDS, so a page shown right
+after a POST never misses the row that was just saved (replication lag).
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+STICKY_COOKIE = 'nja_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_from_replica = ContextVar('nja_read_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class ReplicaRouter:
+    """Send reads to the replica inside ``use_replica`` views, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def use_replica(view_func):
+    """Let a read-only view read from the replica unless the client is sticky to the primary."""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if (
+            not replica_configured()
+            or request.method not in ('GET', 'HEAD')
+            or STICKY_COOKIE in request.COOKIES
+        ):
+            return view_func(request, *args, **kwargs)
+        token = _read_from_replica.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _read_from_replica.reset(token)
+    return _wrapped_view
+
+
+class ReplicaStickinessMiddleware:
+    """Keep a client's reads on the primary for a while after it sends a write request.
+
+    Enabled when a replica is configured (``NJA_REPLICA_DATABASE_URL``).
+    """
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax', secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
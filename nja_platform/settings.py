@@ -41,19 +41,35 @@ INSTALLED_APPS = [
     'loans',
     'dashboard',
     'gallery',
+    'monitoring',
+    'scheduler',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For static files in production
+    'monitoring.middleware.MetricsMiddleware',  # Opt-in, see METRICS_ENABLED
+    'monitoring.middleware.QueryStatsMiddleware',  # Opt-in, see QUERY_STATS_ENABLED
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'nja_platform.replica.ReplicaStickinessMiddleware',  # Only with a read replica, see REPLICA_DATABASE_URL
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'members.middleware.MemberProfileMiddleware',  # Resolves request.member and role flags once per request
+    'monitoring.middleware.ServerTimingMiddleware',  # Staff only, see SERVER_TIMING_ENABLED
+    'monitoring.middleware.ProfilerMiddleware',  # Opt-in, see PROFILER_ENABLED
+    'monitoring.middleware.SlowQueryMiddleware',  # Opt-in, see SLOW_QUERY_THRESHOLD_MS
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Load the member profile together with the session user (one query per request).
+# ModelBackend stays listed so sessions created before the switch remain valid.
+AUTHENTICATION_BACKENDS = [
+    'members.backends.MemberProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 ROOT_URLCONF = 'nja_platform.urls'
 
 TEMPLATES = [
@@ -82,10 +98,40 @@ WSGI_APPLICATION = 'nja_platform.wsgi.application'
 DATABASES = {
     'default': dj_database_url.config(
         default=f'sqlite:///{BASE_DIR / "db.sqlite3"}',
-        conn_max_age=600
+        conn_max_age=600,
+        conn_health_checks=os.environ.get('NJA_DB_HEALTH_CHECKS', 'True').lower() in ('true', '1', 'yes'),
     )
 }
 
+# Connection pooling for PostgreSQL (psycopg 3 pool, one per worker process) instead
+# of one persistent connection per thread. Size NJA_DB_POOL_MAX x workers to fit the
+# server's connection limit; with NJA_ASYNC_DASHBOARD keep it above NJA_DASHBOARD_QUERY_THREADS.
+DB_POOL_ENABLED = os.environ.get('NJA_DB_POOL', 'False').lower() in ('true', '1', 'yes')
+if DB_POOL_ENABLED and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # Connections are returned to the pool instead
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.environ.get('NJA_DB_POOL_MIN', '2')),
+        'max_size': int(os.environ.get('NJA_DB_POOL_MAX', '10')),
+        'timeout': float(os.environ.get('NJA_DB_POOL_TIMEOUT', '10')),
+        'max_idle': float(os.environ.get('NJA_DB_POOL_MAX_IDLE', '300')),
+        'name': 'nja',
+    }
+
+# Optional read replica for reports, statements and list views (nja_platform/replica.py).
+# A client's reads stay on the primary for NJA_REPLICA_STICKY_SECONDS after it posts.
+REPLICA_DATABASE_URL = os.environ.get('NJA_REPLICA_DATABASE_URL', '')
+REPLICA_STICKY_SECONDS = int(os.environ.get('NJA_REPLICA_STICKY_SECONDS', '10'))
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        REPLICA_DATABASE_URL,
+        conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+        conn_health_checks=DATABASES['default']['CONN_HEALTH_CHECKS'],
+    )
+    if 'pool' in DATABASES['default'].get('OPTIONS', {}):
+        DATABASES['replica'].setdefault('OPTIONS', {})['pool'] = dict(DATABASES['default']['OPTIONS']['pool'], name='nja-replica')
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['nja_platform.replica.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -133,6 +179,10 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# The meeting contribution grid posts an amount and a category per active member, so
+# Django's default of 1000 fields would reject groups of about 500 members or more
+DATA_UPLOAD_MAX_NUMBER_FIELDS = int(os.environ.get('NJA_DATA_UPLOAD_MAX_NUMBER_FIELDS', '10000'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -163,4 +213,79 @@ DEFAULT_FROM_EMAIL = os.environ.get('NJA_DEFAULT_FROM_EMAIL', 'no-reply@nja.loca
 
 SITE_URL = os.environ.get('NJA_SITE_URL', 'http://127.0.0.1:8000')
 
-
+# Performance monitoring
+# Per-view query/timing aggregates, kept in memory per worker (see /monitoring/queries/)
+QUERY_STATS_ENABLED = os.environ.get('NJA_QUERY_STATS', 'False').lower() in ('true', '1', 'yes')
+QUERY_STATS_MAX_FINGERPRINTS = int(os.environ.get('NJA_QUERY_STATS_MAX_FINGERPRINTS', '20'))
+
+# On-demand cProfile for superusers (?__profile=cprofile or X-NJA-Profile header)
+PROFILER_ENABLED = os.environ.get('NJA_PROFILER', 'False').lower() in ('true', '1', 'yes')
+PROFILER_DIR = os.environ.get('NJA_PROFILER_DIR', str(BASE_DIR / 'profiles'))
+PROFILER_REPORT_LINES = int(os.environ.get('NJA_PROFILER_REPORT_LINES', '60'))
+
+# Async dashboard views that run their independent queries concurrently, each on
+# its own thread and database connection (see "ASGI deployment" in README.md)
+ASYNC_DASHBOARD = os.environ.get('NJA_ASYNC_DASHBOARD', 'False').lower() in ('true', '1', 'yes')
+DASHBOARD_QUERY_THREADS = int(os.environ.get('NJA_DASHBOARD_QUERY_THREADS', '8'))
+
+# Threads hashing passwords of accounts created by the bulk member import
+PASSWORD_HASH_THREADS = int(os.environ.get('NJA_PASSWORD_HASH_THREADS', str(os.cpu_count() or 1)))
+
+# Minutes an import job may stay running before it is taken for one whose worker died and marked failed
+IMPORT_RUNNING_TIMEOUT_MINUTES = int(os.environ.get('NJA_IMPORT_RUNNING_TIMEOUT_MINUTES', '120'))
+
+# Let the scheduler move transaction logs of closed years to the archive table every day
+ARCHIVE_CLOSED_YEARS = os.environ.get('NJA_ARCHIVE_CLOSED_YEARS', 'False').lower() in ('true', '1', 'yes')
+
+# Days an installment may stay unpaid past its due date before the scheduler marks the loan defaulted
+LOAN_DEFAULT_GRACE_DAYS = int(os.environ.get('NJA_LOAN_DEFAULT_GRACE_DAYS', '30'))
+
+# Loan eligibility: up to this many times a member's savings, less what they still owe
+LOAN_ELIGIBILITY_MULTIPLIER = float(os.environ.get('NJA_LOAN_ELIGIBILITY_MULTIPLIER', '3'))
+# Members with late installments or a defaulted loan are not eligible for a new loan
+LOAN_ELIGIBILITY_BLOCK_ARREARS = os.environ.get('NJA_LOAN_ELIGIBILITY_BLOCK_ARREARS', 'True').lower() in ('true', '1', 'yes')
+# Weeks of expected repayments shown in the liquidity report's cash projection
+LIQUIDITY_PROJECTION_WEEKS = int(os.environ.get('NJA_LIQUIDITY_PROJECTION_WEEKS', '12'))
+
+# Times a repayment or withdrawal approval is attempted when the database aborts it on a write conflict
+WRITE_RETRY_ATTEMPTS = int(os.environ.get('NJA_WRITE_RETRY_ATTEMPTS', '3'))
+# Base pause in seconds between attempts; it grows with each attempt and is jittered
+WRITE_RETRY_BACKOFF = float(os.environ.get('NJA_WRITE_RETRY_BACKOFF', '0.05'))
+
+# Server-Timing header (DB, template and cache time, view name) on staff responses
+SERVER_TIMING_ENABLED = os.environ.get('NJA_SERVER_TIMING', 'False').lower() in ('true', '1', 'yes')
+
+# Prometheus metrics at /metrics. Under gunicorn, workers share samples through
+# PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py). Scrapers authenticate with
+# "Authorization: Bearer <NJA_METRICS_TOKEN>"; without a token only staff sessions may read it.
+METRICS_ENABLED = os.environ.get('NJA_METRICS', 'False').lower() in ('true', '1', 'yes')
+METRICS_TOKEN = os.environ.get('NJA_METRICS_TOKEN', '')
+
+# /readyz runs its dependency checks at most once per this many seconds per worker
+HEALTH_CHECK_CACHE_SECONDS = float(os.environ.get('NJA_HEALTH_CACHE_SECONDS', '5'))
+
+# Slow-query log: queries at or above the threshold are logged with their view and,
+# once per query shape, their EXPLAIN plan (0 disables, see /monitoring/slow-queries/)
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('NJA_SLOW_QUERY_MS', '0'))
+SLOW_QUERY_EXPLAIN = os.environ.get('NJA_SLOW_QUERY_EXPLAIN', 'True').lower() in ('true', '1', 'yes')
+SLOW_QUERY_LOG_FILE = os.environ.get('NJA_SLOW_QUERY_LOG', str(BASE_DIR / 'logs' / 'slow_queries.log'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'nja.slow_queries': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+if SLOW_QUERY_THRESHOLD_MS:
+    Path(SLOW_QUERY_LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+    LOGGING['handlers']['slow_query_file'] = {
+        'class': 'logging.handlers.RotatingFileHandler',
+        'filename': SLOW_QUERY_LOG_FILE,
+        'maxBytes': 5 * 1024 * 1024,
+        'backupCount': 5,
+    }
+    LOGGING['loggers']['nja.slow_queries']['handlers'].append('slow_query_file')
@@ -0,0 +1,43 @@
+"""
+Row-by-row reading of uploaded CSV and XLSX files, shared by the record and member imports.
+
+XLSX files are opened with openpyxl in read-only mode and CSV files through the
+``csv`` module, so memory use does not grow with the size of the file.
+"""
+import csv
+import io
+import re
+
+XLSX_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def header_key(value):
+    """'Requested Date ' -> 'requested_date'"""
+    return re.sub(r'\W+', '_', str(value or '').strip().casefold()).strip('_')
+
+
+def _rows_with_header(rows):
+    """Turn raw rows into (row number, {column: value}) pairs, skipping blank rows"""
+    header = [header_key(value) for value in next(rows, [])]
+    for number, values in enumerate(rows, start=2):
+        if not any(value not in (None, '') for value in values):
+            continue
+        yield number, dict(zip(header, values))
+
+
+def read_rows(file, filename):
+    """Yield (row number, {column: value}) from a binary CSV or XLSX file without loading it whole"""
+    if filename.lower().endswith(XLSX_EXTENSIONS):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            yield from _rows_with_header(workbook.active.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+    else:
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        try:
+            yield from _rows_with_header(csv.reader(text))
+        finally:
+            text.detach()
@@ -0,0 +1,91 @@
+"""
+Server startup helpers: migration plan check and warm-up of shared state.
+
+Called from gunicorn.conf.py in the master process, after the app is preloaded
+and before workers are forked, so workers inherit the warmed state copy-on-write.
+"""
+import logging
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+def pending_migrations(using=DEFAULT_DB_ALIAS):
+    """Return the unapplied migrations as (app_label, name) pairs.
+
+    Only reads the migration files and the django_migrations table, so it is
+    much cheaper than running ``migrate`` (which also runs system checks and
+    post_migrate handlers) on every boot.
+    """
+    executor = MigrationExecutor(connections[using])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [(migration.app_label, migration.name) for migration, _ in plan]
+
+
+def migrate_if_needed(using=DEFAULT_DB_ALIAS):
+    """Run ``migrate`` only when the migration plan is not empty. Returns the applied migrations."""
+    pending = pending_migrations(using)
+    if pending:
+        call_command('migrate', database=using, interactive=False)
+    return pending
+
+
+def warm_url_resolvers():
+    """Build the URL resolver's reverse and namespace tables."""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.namespace_dict
+    resolver.app_dict
+
+
+def warm_templates():
+    """Compile every project and app template into the cached template loaders. Returns the count."""
+    compiled = 0
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = Path(directory)
+            for path in directory.rglob('*'):
+                if path.suffix not in TEMPLATE_SUFFIXES or not path.is_file():
+                    continue
+                try:
+                    engine.get_template(path.relative_to(directory).as_posix())
+                except (TemplateSyntaxError, UnicodeDecodeError):
+                    logger.warning('Could not precompile template %s', path, exc_info=True)
+                else:
+                    compiled += 1
+    return compiled
+
+
+def check_database_connections():
+    """Open (and verify) a connection to every configured database."""
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def close_database_connections():
+    """Close connections and connection pools; sockets and pool threads must not cross a fork."""
+    connections.close_all()
+    for connection in connections.all(initialized_only=True):
+        if getattr(connection, 'pool', None):
+            connection.close_pool()
+
+
+def warm_up():
+    """Prepare the shared state workers inherit, then drop connections before they fork.
+
+    Returns the number of compiled templates.
+    """
+    try:
+        check_database_connections()
+        warm_url_resolvers()
+        return warm_templates()
+    finally:
+        close_database_connections()
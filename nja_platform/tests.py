@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+from django.db import OperationalError, transaction
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from members.models import Member
+from .replica import STICKY_COOKIE, ReplicaRouter, ReplicaStickinessMiddleware, use_replica
+from .startup import migrate_if_needed, pending_migrations, warm_templates
+from .transactions import atomic_with_retries, is_retryable
+
+
+class StartupTests(TestCase):
+    """Startup helpers used by gunicorn.conf.py"""
+
+    def test_no_pending_migrations_skips_migrate(self):
+        self.assertEqual(pending_migrations(), [])
+        self.assertEqual(migrate_if_needed(), [])
+
+    def test_warm_templates_fills_cached_loader(self):
+        self.assertGreater(warm_templates(), 0)
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('dashboard/index.html', {key.split('-')[0] for key in loader.get_template_cache})
+
+
+
+@patch('nja_platform.replica.replica_configured', return_value=True)
+class ReplicaRouterTests(SimpleTestCase):
+    """Only GETs to use_replica views read from the replica"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+        @use_replica
+        def view(request):
+            return HttpResponse(self.router.db_for_read(Member))
+        self.view = view
+
+    def test_get_reads_from_replica(self, configured):
+        self.assertEqual(self.view(RequestFactory().get('/')).content, b'replica')
+        self.assertEqual(self.router.db_for_read(Member), 'default')
+
+    def test_writes_and_sticky_clients_use_primary(self, configured):
+        self.assertEqual(self.view(RequestFactory().post('/')).content, b'default')
+        request = RequestFactory().get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.assertEqual(self.view(request).content, b'default')
+        self.assertEqual(self.router.db_for_write(Member), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'members'))
+
+    def test_without_replica(self, configured):
+        configured.return_value = False
+        self.assertEqual(self.view(RequestFactory().get('/')).content, b'default')
+
+    def test_post_makes_client_sticky(self, configured):
+        middleware = ReplicaStickinessMiddleware(lambda request: HttpResponse())
+        self.assertIn(STICKY_COOKIE, middleware(RequestFactory().post('/')).cookies)
+        self.assertNotIn(STICKY_COOKIE, middleware(RequestFactory().get('/')).cookies)
+
+
+@override_settings(WRITE_RETRY_ATTEMPTS=3, WRITE_RETRY_BACKOFF=0)
+class WriteRetryTests(TransactionTestCase):
+    """atomic_with_retries runs a whole transaction again after a write conflict, a bounded number of times"""
+
+    def write(self, error, failures):
+        attempts = []
+
+        @atomic_with_retries
+        def write():
+            attempts.append(len(attempts) + 1)
+            Member.objects.create(name=f'Writer {len(attempts)}')
+            if len(attempts) <= failures:
+                raise OperationalError(error)
+        try:
+            write()
+        finally:
+            self.attempts = len(attempts)
+
+    def test_conflicts_are_retried(self):
+        with self.assertLogs('nja_platform.transactions', 'WARNING') as logs:
+            self.write('database is locked', failures=2)
+        self.assertEqual((self.attempts, len(logs.output)), (3, 2))
+        # The aborted attempts were rolled back
+        self.assertEqual(list(Member.objects.values_list('name', flat=True)), ['Writer 3'])
+
+        with self.assertRaises(OperationalError), self.assertLogs('nja_platform.transactions', 'WARNING'):
+            self.write('database is locked', failures=3)
+        self.assertEqual(self.attempts, 3)
+
+    def test_other_errors_and_outer_transactions_are_not_retried(self):
+        with self.assertRaises(OperationalError):
+            self.write('no such table: members_member', failures=1)
+        self.assertEqual(self.attempts, 1)
+
+        with self.assertRaises(OperationalError), transaction.atomic():
+            self.write('database is locked', failures=1)
+        self.assertEqual(self.attempts, 1)
+
+    def test_postgresql_sqlstates(self):
+        for sqlstate, retryable in (('40001', True), ('40P01', True), ('23505', False)):
+            cause = Exception('conflict')
+            cause.sqlstate = sqlstate
+            exc = OperationalError('conflict')
+            exc.__cause__ = cause
+            self.assertEqual(is_retryable(exc), retryable)
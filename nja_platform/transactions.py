@@ -0,0 +1,49 @@
+"""
+Retried write transactions for money movements.
+
+Repayments and withdrawal approvals lock the Loan or Member row they change with
+``select_for_update()`` and check the balance inside the same transaction, so two
+treasurers posting at once queue on that row instead of both passing a stale check.
+The database may still abort one of them (a PostgreSQL serialization failure or
+deadlock, a locked SQLite database); ``atomic_with_retries`` then runs the whole
+transaction again, at most WRITE_RETRY_ATTEMPTS times with a short jittered backoff.
+"""
+import logging
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# serialization_failure, deadlock_detected
+RETRYABLE_SQLSTATES = ('40001', '40P01')
+
+
+def is_retryable(exc):
+    """Whether running the aborted transaction again may succeed"""
+    cause = exc.__cause__
+    sqlstate = getattr(cause, 'sqlstate', None) or getattr(cause, 'pgcode', None)
+    if sqlstate:
+        return sqlstate in RETRYABLE_SQLSTATES
+    return 'database is locked' in str(exc)
+
+
+def atomic_with_retries(func):
+    """Run ``func`` in its own transaction, again from the start when the database aborts it on a conflict."""
+    @wraps(func)
+    def _wrapped(*args, **kwargs):
+        # Inside an outer transaction the conflict aborted the outer one too; leave retrying to its owner
+        attempts = 1 if connections[DEFAULT_DB_ALIAS].in_atomic_block else settings.WRITE_RETRY_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt >= attempts or not is_retryable(exc):
+                    raise
+                logger.warning('%s hit a write conflict (attempt %d of %d): %s', func.__name__, attempt, attempts, exc)
+                time.sleep(settings.WRITE_RETRY_BACKOFF * attempt * random.uniform(0.5, 1.5))
+    return _wrapped
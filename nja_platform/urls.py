@@ -7,6 +7,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
 from gallery import views as gallery_views
+from monitoring import views as monitoring_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -17,6 +18,10 @@ urlpatterns = [
     path('announcements/', include('announcements.urls')),
     path('loans/', include('loans.urls')),
     path('gallery/', include('gallery.urls')),
+    path('monitoring/', include('monitoring.urls')),
+    path('metrics', monitoring_views.metrics, name='metrics'),  # Prometheus scrape endpoint
+    path('healthz', monitoring_views.healthz, name='healthz'),  # Liveness probe
+    path('readyz', monitoring_views.readyz, name='readyz'),  # Readiness probe
     path('upload-media/', gallery_views.media_upload, name='upload_media'),  # Direct access for admins
     path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(template_name='registration/logout.html', next_page='dashboard:index'), name='logout'),
@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import TaskRun
+
+
+@admin.register(TaskRun)
+class TaskRunAdmin(admin.ModelAdmin):
+    list_display = ['name', 'last_status', 'last_started_at', 'last_duration_ms', 'last_result', 'run_count',
+                    'failure_count']
+    list_filter = ['last_status']
+    readonly_fields = ['last_status', 'last_started_at', 'last_finished_at', 'last_duration_ms', 'last_result',
+                       'run_count', 'failure_count', 'locked_until', 'locked_by']
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class SchedulerConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'scheduler'
+
+    def ready(self):
+        # Each app registers its periodic tasks in its tasks.py
+        autodiscover_modules('tasks')
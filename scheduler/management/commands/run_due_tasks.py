@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from scheduler.registry import tasks
+from scheduler.runner import FAILED, describe, run_due_tasks
+
+
+class Command(BaseCommand):
+    help = 'Run the periodic maintenance tasks that are due, once (for cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--task', action='append', dest='names', metavar='NAME',
+                            help='Only this task (repeatable)')
+        parser.add_argument('--force', action='store_true', help='Run even if the task is not due yet')
+        parser.add_argument('--list', action='store_true', help='List the registered tasks and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, task in sorted(tasks.items()):
+                self.stdout.write(f'{name}: every {task.every}')
+            return
+        unknown = set(options['names'] or ()) - tasks.keys()
+        if unknown:
+            raise CommandError(f"Unknown task: {', '.join(sorted(unknown))}")
+
+        outcomes = run_due_tasks(options['names'], force=options['force'])
+        for name, (outcome, result) in outcomes.items():
+            line = describe(name, outcome, result)
+            self.stdout.write(self.style.ERROR(line) if outcome == FAILED else line)
+        failed = [name for name, (outcome, _) in outcomes.items() if outcome == FAILED]
+        if failed:
+            raise CommandError(f"Failed: {', '.join(failed)}")
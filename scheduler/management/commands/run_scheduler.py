@@ -0,0 +1,39 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from scheduler.runner import FAILED, NOT_DUE, describe, run_due_tasks
+
+
+class Command(BaseCommand):
+    help = 'Run due periodic maintenance tasks in a loop until stopped (SIGTERM or Ctrl+C)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=60,
+                            help='Seconds between checks for due tasks (default: 60)')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        self.stdout.write(f"Scheduler checking for due tasks every {options['interval']:g}s")
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                try:
+                    outcomes = run_due_tasks()
+                except Exception as exc:
+                    # A database outage must not end the process; try again on the next tick
+                    self.stderr.write(self.style.ERROR(f'{type(exc).__name__}: {exc}'))
+                    outcomes = {}
+                for name, (outcome, result) in outcomes.items():
+                    if outcome != NOT_DUE:
+                        line = describe(name, outcome, result)
+                        self.stdout.write(self.style.ERROR(line) if outcome == FAILED else line)
+                stop.wait(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            close_old_connections()
+        self.stdout.write('Scheduler stopped')
@@ -0,0 +1,38 @@
+"""
+Registry of periodic maintenance tasks.
+
+Apps declare tasks in their ``tasks.py``::
+
+    @periodic_task(every=timedelta(hours=1))
+    def mark_defaulted_loans():
+        return Loan.objects.filter(...).update(status='defaulted')
+
+A task returns what it changed (usually a row count), which is recorded as its last result.
+"""
+tasks = {}
+
+
+class PeriodicTask:
+    """A function run at most once every ``every`` across all nodes"""
+
+    def __init__(self, name, func, every, lease):
+        self.name = name
+        self.func = func
+        self.every = every
+        # How long the lock is held before another node may assume this run died
+        self.lease = lease
+
+    def __call__(self):
+        return self.func()
+
+    def __repr__(self):
+        return f'<PeriodicTask {self.name} every {self.every}>'
+
+
+def periodic_task(every, name=None, lease=None):
+    """Register the decorated function as a task named ``<app>.<function>``"""
+    def decorator(func):
+        task_name = name or f"{func.__module__.split('.')[0]}.{func.__name__}"
+        tasks[task_name] = PeriodicTask(task_name, func, every, lease or every)
+        return func
+    return decorator
@@ -0,0 +1,113 @@
+"""
+Run the registered periodic tasks that are due.
+
+Only one node runs a task at a time: on PostgreSQL through a session advisory lock
+(released when the connection closes, so a crashed runner never leaves it held),
+elsewhere through a lease on the task's TaskRun row taken with a conditional UPDATE.
+"""
+import hashlib
+import logging
+import os
+import socket
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import TaskRun
+from .registry import tasks
+
+logger = logging.getLogger(__name__)
+
+OWNER = f'{socket.gethostname()}:{os.getpid()}'[:100]
+
+RAN, NOT_DUE, LOCKED, FAILED = 'ran', 'not due', 'locked', 'failed'
+
+
+def _lock_key(name):
+    """Signed 64-bit advisory lock key of a task"""
+    return int.from_bytes(hashlib.blake2b(f'nja-task:{name}'.encode(), digest_size=8).digest(), 'big', signed=True)
+
+
+@contextmanager
+def task_lock(task, now):
+    """Yield whether this process holds the task's lock for the enclosed block"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [_lock_key(task.name)])
+            acquired = cursor.fetchone()[0]
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(%s)', [_lock_key(task.name)])
+        return
+
+    acquired = TaskRun.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lte=now), name=task.name,
+    ).update(locked_until=now + task.lease, locked_by=OWNER)
+    try:
+        yield bool(acquired)
+    finally:
+        if acquired:
+            TaskRun.objects.filter(name=task.name, locked_by=OWNER).update(locked_until=None, locked_by='')
+
+
+def describe(name, outcome, result):
+    """One output line for a task's outcome"""
+    return f'{name}: {outcome}' + ('' if result is None else f' ({result})')
+
+
+def is_due(task, run, now):
+    return run.last_started_at is None or run.last_started_at + task.every <= now
+
+
+def run_task(task):
+    """Run one task and record the outcome on its TaskRun. Returns (outcome, result)."""
+    started = timezone.now()
+    TaskRun.objects.filter(name=task.name).update(last_status='running', last_started_at=started)
+    start = time.perf_counter()
+    counters = {}
+    try:
+        result = task()
+        status, outcome = 'succeeded', RAN
+    except Exception as exc:
+        logger.exception('Periodic task %s failed', task.name)
+        status, outcome, result = 'failed', FAILED, f'{type(exc).__name__}: {exc}'
+        counters['failure_count'] = F('failure_count') + 1
+    TaskRun.objects.filter(name=task.name).update(
+        last_status=status,
+        last_finished_at=timezone.now(),
+        last_duration_ms=round((time.perf_counter() - start) * 1000, 2),
+        last_result='' if result is None else str(result)[:1000],
+        run_count=F('run_count') + 1,
+        **counters,
+    )
+    return outcome, result
+
+
+def run_due_tasks(names=None, force=False):
+    """Run every due task (or only ``names``; ``force`` ignores the schedule). Returns {name: (outcome, result)}."""
+    selected = {name: task for name, task in tasks.items() if not names or name in names}
+    TaskRun.objects.bulk_create([TaskRun(name=name) for name in selected], ignore_conflicts=True)
+    runs = {run.name: run for run in TaskRun.objects.filter(name__in=selected)}
+
+    outcomes = {}
+    for name, task in sorted(selected.items()):
+        now = timezone.now()
+        if not force and not is_due(task, runs[name], now):
+            outcomes[name] = (NOT_DUE, None)
+            continue
+        with task_lock(task, now) as acquired:
+            if not acquired:
+                outcomes[name] = (LOCKED, None)
+                continue
+            # Another node may have run it between reading the schedule and taking the lock
+            if not force and not is_due(task, TaskRun.objects.get(name=name), now):
+                outcomes[name] = (NOT_DUE, None)
+                continue
+            outcomes[name] = run_task(task)
+    return outcomes
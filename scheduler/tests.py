@@ -0,0 +1,136 @@
+import io
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from announcements.models import Announcement
+from contributions.models import Contribution, ImportJob, TransactionLog
+from loans.models import Loan
+from loans.schedule import create_schedule
+from members.models import Member
+from . import registry, runner
+from .models import TaskRun
+
+
+class SchedulerTests(TestCase):
+    """Due tasks run once per interval, under a lock, with their last run recorded"""
+
+    def setUp(self):
+        self.calls = []
+        self.tasks = {
+            'test.count': registry.PeriodicTask('test.count', lambda: self.calls.append(1) or 3, timedelta(hours=1),
+                                                timedelta(minutes=5)),
+            'test.fail': registry.PeriodicTask('test.fail', lambda: 1 / 0, timedelta(hours=1), timedelta(minutes=5)),
+        }
+        patcher = patch.dict(registry.tasks, self.tasks, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_runs_when_due_and_records_last_run(self):
+        with self.assertLogs('scheduler.runner', 'ERROR'):
+            outcomes = runner.run_due_tasks()
+        self.assertEqual(outcomes['test.count'], (runner.RAN, 3))
+        self.assertEqual(outcomes['test.fail'][0], runner.FAILED)
+
+        run = TaskRun.objects.get(name='test.count')
+        self.assertEqual((run.last_status, run.last_result, run.run_count), ('succeeded', '3', 1))
+        self.assertIsNone(run.locked_until)
+        failed = TaskRun.objects.get(name='test.fail')
+        self.assertEqual((failed.last_status, failed.failure_count), ('failed', 1))
+        self.assertIn('ZeroDivisionError', failed.last_result)
+
+        self.assertEqual(runner.run_due_tasks(['test.count'])['test.count'][0], runner.NOT_DUE)
+        self.assertEqual(runner.run_due_tasks(['test.count'], force=True)['test.count'][0], runner.RAN)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_lease_held_by_another_node(self):
+        TaskRun.objects.create(name='test.count', locked_until=timezone.now() + timedelta(minutes=1), locked_by='other')
+        self.assertEqual(runner.run_due_tasks(['test.count'])['test.count'], (runner.LOCKED, None))
+        self.assertEqual(self.calls, [])
+
+        # An expired lease belongs to a runner that died
+        TaskRun.objects.filter(name='test.count').update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(runner.run_due_tasks(['test.count'])['test.count'][0], runner.RAN)
+
+    def test_command_fails_when_a_task_fails(self):
+        stdout = io.StringIO()
+        with self.assertRaisesMessage(CommandError, 'Failed: test.fail'), self.assertLogs('scheduler.runner'):
+            call_command('run_due_tasks', stdout=stdout)
+        self.assertIn('test.count: ran (3)', stdout.getvalue())
+
+
+class MaintenanceTaskTests(TestCase):
+    """The registered tasks persist time-based state with set-based UPDATEs"""
+
+    def test_defaulted_loans_and_expired_announcements(self):
+        today = timezone.localdate()
+        member = Member.objects.create(name='Late Payer')
+        late = Loan.objects.create(
+            member=member, amount=Decimal('600'), purpose='x', status='active',
+            requested_date=today - timedelta(days=200), due_date=today - timedelta(days=60),
+        )
+        recent = Loan.objects.create(
+            member=member, amount=Decimal('600'), purpose='x', status='active',
+            requested_date=today - timedelta(days=20), due_date=today + timedelta(days=40),
+        )
+        for loan in (late, recent):
+            create_schedule(loan)
+        now = timezone.now()
+        Announcement.objects.create(title='Old', content='x', expires_at=now - timedelta(minutes=1))
+        Announcement.objects.create(title='Current', content='x', expires_at=now + timedelta(days=1))
+        Announcement.objects.create(title='Forever', content='x')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(registry.tasks['loans.mark_defaulted_loans'](), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(registry.tasks['announcements.deactivate_expired_announcements'](), 1)
+
+        self.assertEqual(
+            dict(Loan.objects.values_list('pk', 'status')), {late.pk: 'defaulted', recent.pk: 'active'},
+        )
+        self.assertEqual(
+            sorted(Announcement.objects.filter(is_active=True).values_list('title', flat=True)), ['Current', 'Forever'],
+        )
+
+    def test_archiving_is_opt_in(self):
+        log = TransactionLog.objects.create(transaction_type='contribution', amount=Decimal('100'), description='x')
+        TransactionLog.objects.filter(pk=log.pk).update(created_at=timezone.now() - timedelta(days=800))
+
+        self.assertEqual(registry.tasks['contributions.archive_closed_years'](), 0)
+        self.assertTrue(TransactionLog.objects.filter(pk=log.pk).exists())
+        with override_settings(ARCHIVE_CLOSED_YEARS=True):
+            self.assertEqual(registry.tasks['contributions.archive_closed_years'](), 1)
+        self.assertFalse(TransactionLog.objects.filter(pk=log.pk).exists())
+
+    def test_stalled_import_is_imported_once(self):
+        admin = User.objects.create_user('tasks-admin', password='x', is_staff=True)
+        member = Member.objects.create(name='Importer', phone='+237650000009')
+        self.client.force_login(admin)
+        executor = Mock()
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), \
+                patch('contributions.importer._executor', executor):
+            for _ in range(2):
+                upload = SimpleUploadedFile('c.csv', b'phone,date,amount\n+237650000009,2020-05-01,300\n')
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.client.post(reverse('contributions:import_list'), {'kind': 'contributions', 'file': upload})
+            # Both uploads are handed to the import thread, but neither has run yet
+            submitted = [call.args for call in executor.submit.call_args_list]
+            (executor_first, first_id), (executor_last, last_id) = submitted
+            ImportJob.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+            # The import thread gets to the first job before the task, the task to the last one first
+            self.assertIsNotNone(executor_first(first_id))
+            self.assertEqual(registry.tasks['contributions.run_stalled_imports'](), {'ran': 1, 'failed': 0})
+            self.assertIsNone(executor_last(last_id))
+
+        self.assertEqual(list(ImportJob.objects.values_list('status', flat=True)), ['completed', 'completed'])
+        self.assertEqual(Contribution.objects.filter(member=member).count(), 2)
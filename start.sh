@@ -1,13 +1,9 @@
 #!/usr/bin/env bash
-# Startup script for Render - runs migrations then starts gunicorn
+# Startup script for Render - starts gunicorn with gunicorn.conf.py, which applies
+# pending migrations (skipping migrate when the plan is already applied), preloads
+# the app and warms it up before forking workers
 
 set -e
 
-echo "Running startup migrations..."
-python manage.py migrate --no-input || {
-    echo "WARNING: Migrations failed at startup"
-}
-
 echo "Starting gunicorn..."
 exec gunicorn nja_platform.wsgi
-